@@ -140,10 +140,9 @@ def on_mouse_press(x, y, button):
     nodes['fixed'] = False
     nodes['weight'] = 1
 
-    P = nodes['position'] -  (x,window.height-y,0)
-    D = np.sqrt((P**2).sum(axis=1))
-    index = np.argmin(D)
-    if D[index] < 10:
+    picked = picker.pick(x, y, wait=True)
+    if picked is not None:
+        index = picked[1]
         nodes['fixed'][index] = True
         nodes['weight'][index] = 0.01
         drag = True
@@ -188,7 +187,8 @@ def on_timer(dt):
 transform = OrthographicProjection(Position3D(), aspect=None) + Viewport()
 window.attach(transform)
 
-markers = collections.MarkerCollection(marker='disc', transform=transform)
+markers = collections.MarkerCollection(marker='disc', transform=transform,
+                                       picking=True)
 segments = collections.SegmentCollection('agg', transform=transform)
 
 nodes,links = graph( )
@@ -203,5 +203,6 @@ tgt = nodes[links['target']]['position']
 segments.append(src, tgt, linewidth=1.5, itemsize=1,
                 color=(0.75,0.75,0.75,1.00))
 drag,index = False, -1
+picker = collections.Picker(window, [markers], size=15)
 
 app.run()
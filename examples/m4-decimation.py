@@ -0,0 +1,60 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright (c) 2014, Nicolas P. Rougier. All Rights Reserved.
+# Distributed under the (new) BSD License.
+# -----------------------------------------------------------------------------
+""" This example shows min/max (M4) decimation of a 10M samples series that
+    is re-evaluated whenever pan-zoom changes (at most 4 vertices per pixel
+    column are uploaded and drawn). """
+
+import numpy as np
+from glumpy import app, gl, gloo
+from glumpy.transforms import PanZoom, Position2D
+from glumpy.graphics.collections import M4
+
+vertex = """
+    attribute vec2 position;
+    void main()
+    {
+        gl_Position = <transform>;
+    }
+"""
+
+fragment = """
+    void main()
+    {
+        gl_FragColor = vec4(0,0,0,1);
+    }
+"""
+
+window = app.Window(width=1200, height=600, color=(1,1,1,1))
+
+@window.event
+def on_draw(dt):
+    window.clear()
+    P = m4.update(transform, window.width)
+    if P is not None:
+        count[0] = len(P)
+        program["position"][:len(P)] = P
+    program.draw(gl.GL_LINE_STRIP, ranges=[(0, count[0])])
+
+@window.event
+def on_key_press(key, modifiers):
+    if key == app.window.key.SPACE:
+        transform.reset()
+
+n = 10*1000*1000
+x = np.linspace(-1, 1, n)
+y = np.cumsum(np.random.normal(0, 1, n))
+y = 0.9*(2*(y - y.min())/(y.max() - y.min()) - 1)
+m4 = M4(y, x)
+
+# At most 4 vertices per column (plus 2 outside of view)
+program = gloo.Program(vertex, fragment, count=4*4096+2)
+count = [0]
+transform = PanZoom(Position2D("position"), aspect=None)
+program['transform'] = transform
+window.attach(transform)
+
+app.run()
@@ -34,7 +34,7 @@ app.parser.get_default().add_argument(
 options = app.parser.get_options()
 
 filename = options.movie[0]
-reader = FFMPEG_VideoReader(filename)
+reader = FFMPEG_VideoReader(filename, prefetch=8, loop=True)
 width,height = reader.infos["video_size"]
 duration = reader.infos["duration"]
 
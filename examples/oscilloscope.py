@@ -11,12 +11,16 @@ from glumpy import app, gl, glm, gloo
 
 
 vertex = """
-attribute float x, y, intensity;
+uniform float head, size;
+attribute float index, y;
 
 varying float v_intensity;
 void main (void)
 {
-    v_intensity = intensity;
+    // Newest sample (at head-1) has age 0
+    float age = mod(head - 1.0 - index + size, size);
+    float x = -1.0 + 2.0*index/(size-1.0);
+    v_intensity = 1.0 - age/size;
     gl_Position = vec4(x, y, 0.0, 1.0);
 }
 """
@@ -33,16 +37,16 @@ window = app.Window(width=1024, height=512)
 
 @window.event
 def on_draw(dt):
-    global index
     window.clear()
-    oscilloscope.draw(gl.GL_LINE_STRIP)
-    index = (index-1) % len(oscilloscope)
-    oscilloscope['intensity'] -= 1.0/len(oscilloscope)
-    oscilloscope['y'][index] = np.random.uniform(-0.25, +0.25)
-    oscilloscope['intensity'][index] = 1.0
+    oscilloscope["head"] = samples.head
+    oscilloscope.draw(gl.GL_LINE_STRIP, samples.strips(), samples.ranges)
+    # Only the new sample is uploaded
+    samples.append(np.random.uniform(-0.25, +0.25, 1))
 
-index = 0
 oscilloscope = gloo.Program(vertex, fragment, count=150)
-oscilloscope['x'] = np.linspace(-1,1,len(oscilloscope))
+samples = np.zeros(len(oscilloscope), [("y", np.float32, 1)]).view(gloo.RingBuffer)
+oscilloscope.bind(samples)
+oscilloscope['index'] = np.arange(len(oscilloscope))
+oscilloscope['size'] = samples.slots
 
 app.run()
@@ -0,0 +1,76 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright (c) 2014, Nicolas P. Rougier. All Rights Reserved.
+# Distributed under the (new) BSD License.
+# -----------------------------------------------------------------------------
+""" This example shows streaming of a file backed min/max pyramid (50M
+    samples) into a fixed size vertex buffer. Only the level and the window
+    matching the view are uploaded such that any view costs the same. Use
+    mouse scroll to zoom and mouse drag to pan. """
+
+import os
+import tempfile
+import numpy as np
+from glumpy import app, gl, gloo
+from glumpy.graphics.collections import Pyramid, PyramidLoader
+
+vertex = """
+    attribute vec2 position;
+    void main()
+    {
+        gl_Position = vec4(position, 0.0, 1.0);
+    }
+"""
+
+fragment = """
+    void main()
+    {
+        gl_FragColor = vec4(0,0,0,1);
+    }
+"""
+
+window = app.Window(width=1200, height=600, color=(1,1,1,1))
+
+@window.event
+def on_draw(dt):
+    window.clear()
+    count = loader.update(view[0], view[1], window.width)
+    program.draw(gl.GL_LINE_STRIP, ranges=[(0, count)])
+
+@window.event
+def on_mouse_scroll(x, y, dx, dy):
+    xmin, xmax = view
+    center = xmin + (xmax - xmin) * x / float(window.width)
+    scale = max(1 - dy/10.0, 0.1)
+    view[0] = center - (center - xmin)*scale
+    view[1] = center + (xmax - center)*scale
+
+@window.event
+def on_mouse_drag(x, y, dx, dy, button):
+    offset = dx * (view[1] - view[0]) / float(window.width)
+    view[0] -= offset
+    view[1] -= offset
+
+@window.event
+def on_key_press(key, modifiers):
+    if key == app.window.key.SPACE:
+        view[:] = 0, pyramid.count
+
+
+# Samples are appended by chunks (as they would be while monitoring)
+filename = os.path.join(tempfile.mkdtemp(), "signal.data")
+pyramid = Pyramid(filename=filename)
+y = 0
+for i in range(50):
+    Y = y + np.cumsum(np.random.normal(0, 1, 1000*1000))
+    y = Y[-1]
+    pyramid.append(0.0002*Y)
+pyramid.flush()
+
+loader = PyramidLoader(pyramid, size=4096)
+program = gloo.Program(vertex, fragment)
+program.bind(loader.buffer)
+view = [0.0, float(pyramid.count)]
+
+app.run()
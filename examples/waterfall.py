@@ -0,0 +1,74 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright (c) 2014, Nicolas P. Rougier. All Rights Reserved.
+# Distributed under the (new) BSD License.
+# -----------------------------------------------------------------------------
+""" This example shows a 4096 bins waterfall at 200 lines/second where only
+    new lines are uploaded (the texture scrolls by offsetting texture
+    coordinates and wrapping around). """
+
+import numpy as np
+from glumpy import app, gl, gloo
+
+vertex = """
+    attribute vec2 position;
+    attribute vec2 texcoord;
+    varying vec2 v_texcoord;
+    void main()
+    {
+        gl_Position = vec4(position, 0.0, 1.0);
+        v_texcoord = texcoord;
+    }
+"""
+
+fragment = """
+    #include "colormaps/hot.glsl"
+    uniform sampler2D waterfall;
+    uniform float offset;
+    varying vec2 v_texcoord;
+    void main()
+    {
+        float t = texture2D(waterfall, vec2(v_texcoord.x, v_texcoord.y + offset)).r;
+        gl_FragColor = vec4(colormap_hot(t), 1.0);
+    }
+"""
+
+window = app.Window(width=1024, height=512)
+
+@window.event
+def on_draw(dt):
+    global time, pending
+    window.clear()
+    pending += 200*dt
+    n = int(pending)
+    pending -= n
+    if n:
+        T = time + np.arange(n)/200.0
+        time = T[-1] + 1/200.0
+        texture.append(spectrum(T))
+        program["offset"] = texture.offset
+    program.draw(gl.GL_TRIANGLE_STRIP)
+
+def spectrum(T):
+    """ Noisy spectra with two moving peaks """
+    f = np.linspace(0, 1, bins)
+    S = np.random.uniform(0, 0.2, (len(T), bins))
+    for c, w in ((0.5 + 0.3*np.sin(T), 0.01), (0.2 + 0.1*np.cos(3*T), 0.005)):
+        S += np.exp(-(f - c.reshape(-1,1))**2/(2*w*w))
+    return np.minimum(S, 1)
+
+bins, lines = 4096, 512
+time, pending = 0.0, 0.0
+texture = np.zeros((lines, bins, 1), np.float32).view(gloo.ScrollingTexture2D)
+texture.gpu_format = gl.GL_R32F
+texture.interpolation = gl.GL_LINEAR
+
+# Newest line (at texcoord 1) is on top
+program = gloo.Program(vertex, fragment, count=4)
+program['position'] = [(-1,-1), (-1,+1), (+1,-1), (+1,+1)]
+program['texcoord'] = [( 0, 0), ( 0, 1), ( 1, 0), ( 1, 1)]
+program['waterfall'] = texture
+program['offset'] = texture.offset
+
+app.run()
@@ -12,8 +12,9 @@ import logging
 import importlib
 import numpy as np
 
-from glumpy import gl
+from glumpy import gl, profiler
 from glumpy.log import log
+from glumpy.gloo.readback import Readback
 from glumpy.ext.inputhook import inputhook_manager, stdin_ready
 from glumpy.app.window import backends
 
@@ -51,7 +52,7 @@ def use(backend, api=None, major=None, minor=None, profile=None):
     Parameters
     ----------
 
-    backend : ['osxglut', 'freeglut', 'pyglet', 'glfw', 'sdl', 'sdl2', 'pyside']
+    backend : ['osxglut', 'freeglut', 'pyglet', 'glfw', 'sdl', 'sdl2', 'pyside', 'headless']
         Graphical toolkit to use
 
     api : ['GL'|'ES']
@@ -235,6 +236,7 @@ def __init__(clock=None, framerate=None, backend=None):
     else:
         __clock__ = clock
     __clock__.set_fps_limit(framerate)
+    __clock__.set_vsync(options.vsync)
 
     # OpenGL Initialization
     gl.glPixelStorei(gl.GL_UNPACK_ALIGNMENT, 1)
@@ -264,6 +266,20 @@ def __init__(clock=None, framerate=None, backend=None):
 
 
 
+# -------------------------------------------------------------------- wait ---
+def _wait(clock):
+    """ Wait until a window needs to be redrawn (on-demand rendering) """
+
+    for window in __backend__.windows():
+        if not window.on_demand or window.damaged:
+            return
+
+    # Wake up for the next scheduled function (if any)
+    if hasattr(__backend__, "wait"):
+        __backend__.wait(clock.get_sleep_time(True))
+
+
+
 # -------------------------------------------------------------------- quit ---
 def quit():
     global __running__
@@ -279,7 +295,7 @@ def quit():
 
 # --------------------------------------------------------------------- run ---
 def run(clock=None, framerate=None, interactive=None,
-        duration = sys.maxint, framecount = sys.maxint):
+        duration = sys.maxint, framecount = sys.maxint, on_demand=None):
     """ Run the main loop
 
     Parameters
@@ -295,6 +311,10 @@ def run(clock=None, framerate=None, interactive=None,
 
     framecount : int
         Number of frame to display before stopping.
+
+    on_demand : bool
+        Whether to redraw windows only when their content has changed
+        and to sleep until then.
     """
     global __running__
 
@@ -304,6 +324,12 @@ def run(clock=None, framerate=None, interactive=None,
     if interactive is None:
         interactive = options.interactive
 
+    if on_demand is None:
+        on_demand = options.on_demand
+    if on_demand and not options.record:
+        for window in __backend__.windows():
+            window.on_demand = True
+
     writer = None
     if options.record:
         from glumpy.ext.ffmpeg_writer import FFMPEG_VideoWriter
@@ -311,9 +337,9 @@ def run(clock=None, framerate=None, interactive=None,
         window = __backend__.windows()[0]
         width, height = window.width, window.height
         filename = "movie.mp4"
-        writer = FFMPEG_VideoWriter(filename, (width, height), fps=framerate)
-        fbuffer = np.zeros((height, width, 3), dtype=np.uint8)
-        data = fbuffer.copy()
+        writer = FFMPEG_VideoWriter(filename, (width, height),
+                                    fps=framerate, threaded=True)
+        readback = Readback(width, height, callback=writer.write_frame)
         log.info("Recording movie in '%s'" % filename)
 
     if interactive:
@@ -322,7 +348,11 @@ def run(clock=None, framerate=None, interactive=None,
 
         def run():
             while not stdin_ready():
-                __backend__.process(clock.tick())
+                dt = clock.tick()
+                profiler.frame()
+                __backend__.process(dt)
+                if options.vsync:
+                    clock.vsync()
             return 0
         inputhook_manager.set_inputhook(run)
 
@@ -331,16 +361,22 @@ def run(clock=None, framerate=None, interactive=None,
         count = len(__backend__.windows())
         while count and duration > 0 and framecount > 0 and __running__:
             dt = clock.tick()
+            profiler.frame()
             duration -= dt
             framecount -= 1
             count = __backend__.process(dt)
+            if options.vsync:
+                clock.vsync()
+            if count:
+                _wait(clock)
 
             # Record one frame (if there is writer available)
             if writer is not None:
-                gl.glReadPixels(0, 0, window.width, window.height,
-                                gl.GL_RGB, gl.GL_UNSIGNED_BYTE, fbuffer)
-                data[...] = fbuffer[::-1,:,:]
-                writer.write_frame(data)
+                window.activate()
+                readback.read()
 
         if writer is not None:
+            window.activate()
+            readback.flush()
+            readback.delete()
             writer.close()
@@ -0,0 +1,227 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright (c) 2014, Nicolas P. Rougier
+# Distributed under the (new) BSD License. See LICENSE.txt for more info.
+# -----------------------------------------------------------------------------
+"""
+Batch rendering using a pool of worker processes.
+
+Each worker owns a persistent headless window (see the headless backend) and
+renders jobs made of a scene builder and some data. A scene builder is a
+(picklable, i.e. module level) function that takes the window as argument,
+creates programs and uploads static resources, and returns a function that
+draws the scene for a given data. Builders are called only once per worker
+such that programs are compiled once and static resources stay on the GPU.
+
+Example usage:
+--------------
+
+  def builder(window):
+      program = gloo.Program(vertex, fragment, count=1000)
+      program['x'] = np.linspace(-1, +1, 1000)
+      def draw(data):
+          program['y'] = data
+          window.clear()
+          program.draw(gl.GL_LINE_STRIP)
+      return draw
+
+  with Batch(width=256, height=256) as batch:
+      for image in batch.map(builder, datasets):
+          ...
+      batch.map(builder, datasets, ["plot-%03d.png" % i for i in range(n)])
+
+Workers are forked from the calling process which hence must not hold any
+GL context when the batch is created.
+"""
+import os
+import sys
+import multiprocessing
+import numpy as np
+
+
+# Worker state (window, initialization error and scenes indexed by builder)
+__window__ = None
+__error__ = None
+__scenes__ = {}
+
+
+def _initialize(width, height):
+    """ Create the worker headless window """
+
+    global __window__, __error__
+
+    # Worker do not have command line options of their own
+    sys.argv = sys.argv[:1]
+
+    # An exception raised here would make the pool respawn workers forever,
+    # it is instead raised by the jobs
+    try:
+        from glumpy import app
+        if app.use("headless") is None:
+            raise RuntimeError("Headless backend is not available")
+        __window__ = app.Window(width, height)
+        app.__init__(backend=app.__backend__)
+    except Exception as error:
+        __error__ = RuntimeError("Cannot create headless window (%s)" % error)
+
+
+def _render(job):
+    """ Render a single job in the worker """
+
+    if __error__ is not None:
+        raise __error__
+
+    builder, data, filename = job
+    window = __window__
+    window.activate()
+
+    scene = __scenes__.get(builder)
+    if scene is None:
+        scene = builder(window)
+        __scenes__[builder] = scene
+    scene(data)
+
+    image = window.read()
+    if filename is None:
+        return image
+    save(filename, image)
+    return filename
+
+
+def save(filename, image):
+    """
+    Save an image (top row first, as returned by window.read) with a format
+    depending on filename extension: '.npy' (numpy), '.png' (pure python png)
+    or any format supported by ffmpeg.
+    """
+
+    extension = os.path.splitext(filename)[1].lower()
+    if extension == ".npy":
+        np.save(filename, image)
+    elif extension == ".png":
+        from glumpy.ext import png
+        height, width, depth = image.shape
+        mode = "RGBA" if depth == 4 else "RGB"
+        png.from_array(image.reshape(height, width*depth), mode).save(filename)
+    else:
+        from glumpy.ext.ffmpeg_writer import ffmpeg_write_image
+        ffmpeg_write_image(filename, np.ascontiguousarray(image))
+
+
+
+class Batch(object):
+    """ Pool of headless rendering processes
+
+    Parameters
+    ----------
+
+    width : int
+        Width of rendered images
+
+    height : int
+        Height of rendered images
+
+    processes : int
+        Number of worker processes (default is the number of cpus)
+    """
+
+    def __init__(self, width=512, height=512, processes=None):
+        from glumpy.app.window.backends import backend_headless
+        if not backend_headless.available():
+            raise RuntimeError("Headless backend is not available")
+
+        self._width = width
+        self._height = height
+        self._pool = multiprocessing.Pool(processes, _initialize, (width, height))
+
+
+    @property
+    def width(self):
+        """ Width of rendered images """
+        return self._width
+
+
+    @property
+    def height(self):
+        """ Height of rendered images """
+        return self._height
+
+
+    def render(self, builder, data, filename=None):
+        """
+        Render a single job.
+
+        Parameters
+        ----------
+
+        builder : function
+            Scene builder
+
+        data : object
+            Data given to the scene
+
+        filename : str
+            Filename where to save the image (optional)
+
+        Return
+        ------
+            Image as a (height,width,3) array or filename if given.
+        """
+
+        return self._pool.apply(_render, ((builder, data, filename),))
+
+
+    def map(self, builder, data, filenames=None, ordered=True, chunksize=1):
+        """
+        Render a scene for each data, results being streamed back as soon as
+        they are available.
+
+        Parameters
+        ----------
+
+        builder : function
+            Scene builder
+
+        data : iterable
+            Data to be rendered, one image per item
+
+        filenames : iterable
+            Filenames where to save images (optional)
+
+        ordered : bool
+            Whether results are given in the same order as data
+
+        chunksize : int
+            Number of jobs sent to a worker at once
+
+        Return
+        ------
+            Iterator over images (or filenames if given)
+        """
+
+        if filenames is None:
+            jobs = ((builder, item, None) for item in data)
+        else:
+            jobs = ((builder, item, filename)
+                    for item, filename in zip(data, filenames))
+        if ordered:
+            return self._pool.imap(_render, jobs, chunksize)
+        return self._pool.imap_unordered(_render, jobs, chunksize)
+
+
+    def close(self):
+        """ Wait for pending jobs and terminate workers """
+
+        self._pool.close()
+        self._pool.join()
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, type, value, traceback):
+        if type is None:
+            self.close()
+        else:
+            self._pool.terminate()
@@ -66,8 +66,19 @@ This causes `clock` to sleep during each `tick` in an attempt to keep the
 number of ticks (frames) per second below 60.
 
 The implementation uses platform-dependent high-resolution sleep functions to
-achieve better accuracy with busy-waiting than would not be possible using just
-the `time` module.
+sleep until just before the deadline and then busy-waits for a short margin
+that is calibrated at runtime from the measured sleep overshoot. Pacing
+accuracy can be checked with `get_pacing_stats`.
+
+When buffer swaps are synchronized with the vertical blank, the clock can be
+told when each swap returns so that frames are phase locked onto the display
+refresh::
+
+    clock.set_vsync(True)
+    while True:
+        dt = clock.tick()
+        # ... update, render and swap ...
+        clock.vsync()
 
 Scheduling
 ==========
@@ -144,6 +155,9 @@ __version__ = '$Id$'
 
 import time
 import sys
+import heapq
+import bisect
+import itertools
 import ctypes, ctypes.util
 
 if sys.platform in ('win32', 'cygwin'):
@@ -191,6 +205,55 @@ class _ScheduledIntervalItem(object):
         self.args = args
         self.kwargs = kwargs
 
+class _SortedTimes(object):
+    '''Sorted timestamps (duplicates allowed) kept in a list of bounded
+    sorted buckets such that adding, removing and searching a timestamp
+    only bisects the bucket minimums and a single bucket.
+    '''
+    _load = 64
+
+    def __init__(self):
+        self._buckets = []
+        self._mins = []
+
+    def add(self, ts):
+        buckets, mins = self._buckets, self._mins
+        if not buckets:
+            buckets.append([ts])
+            mins.append(ts)
+            return
+        i = max(bisect.bisect_right(mins, ts) - 1, 0)
+        bucket = buckets[i]
+        bisect.insort(bucket, ts)
+        mins[i] = bucket[0]
+        if len(bucket) > 2 * self._load:
+            buckets.insert(i + 1, bucket[self._load:])
+            mins.insert(i + 1, bucket[self._load])
+            del bucket[self._load:]
+
+    def remove(self, ts):
+        buckets, mins = self._buckets, self._mins
+        i = bisect.bisect_right(mins, ts) - 1
+        bucket = buckets[i]
+        del bucket[bisect.bisect_left(bucket, ts)]
+        if bucket:
+            mins[i] = bucket[0]
+        else:
+            del buckets[i]
+            del mins[i]
+
+    def any_between(self, lo, hi):
+        '''Return True if a timestamp lies within [lo, hi].'''
+        buckets, mins = self._buckets, self._mins
+        i = bisect.bisect_right(mins, lo) - 1
+        if i < 0:
+            return bool(mins) and mins[0] <= hi
+        bucket = buckets[i]
+        j = bisect.bisect_left(bucket, lo)
+        if j < len(bucket):
+            return bucket[j] <= hi
+        return i + 1 < len(buckets) and mins[i + 1] <= hi
+
 def _dummy_schedule_func(*args, **kwargs):
     '''Dummy function that does nothing, placed onto zombie scheduled items
     to ensure they have no side effect if already queued inside tick() method.
@@ -211,15 +274,34 @@ class Clock(_ClockBase):
     MIN_SLEEP = 0.005
 
     #: The amount of time in seconds this clock subtracts from sleep values
-    #: to compensate for lazy operating systems.
+    #: to compensate for lazy operating systems. This is only the initial
+    #: value of the busy-wait margin that is then calibrated from the measured
+    #: sleep overshoot (and kept between MIN_SPIN and MIN_SLEEP).
     SLEEP_UNDERSHOOT = MIN_SLEEP - 0.001
 
+    #: The minimum amount of time in seconds this clock busy-waits for before
+    #: a frame is due.
+    MIN_SPIN = 0.0002
+
     # List of functions to call every tick.
     _schedule_items = None
 
-    # List of schedule interval items kept in sort order.
+    # Heap of (next_ts, order, item) schedule interval items. Unscheduled
+    # items are not removed from the heap but discarded when popped.
     _schedule_interval_items = None
 
+    # Number of unscheduled items still in the heap
+    _schedule_interval_dead = 0
+
+    # Counter making items with same next_ts called in schedule order
+    _schedule_interval_order = None
+
+    # Scheduled (live) interval items indexed by function
+    _schedule_interval_funcs = None
+
+    # Sorted next_ts of live interval items (for soft scheduling)
+    _schedule_interval_times = None
+
     # If True, a sleep(0) is inserted on every tick.
     _force_sleep = False
 
@@ -247,8 +329,27 @@ class Clock(_ClockBase):
         self.set_fps_limit(fps_limit)
         self.cumulative_time = 0
 
+        # Sleep overshoot estimate (mean and deviation) and busy-wait margin
+        self._oversleep = 0.
+        self._oversleep_dev = 0.
+        self._spin = self.SLEEP_UNDERSHOOT
+
+        # Pacing errors, sleep and busy-wait durations of recent frames
+        self._pacing = []
+
+        # Vertical synchronization
+        self._vsync_align = False
+        self._vsync_refresh = None
+        self._vsync_ts = None
+        self._vsync_last = None
+        self._vsync_intervals = []
+
         self._schedule_items = []
         self._schedule_interval_items = []
+        self._schedule_interval_dead = 0
+        self._schedule_interval_funcs = {}
+        self._schedule_interval_order = itertools.count()
+        self._schedule_interval_times = _SortedTimes()
 
     def update_time(self):
         '''Get the elapsed time since the last call to `update_time`.
@@ -298,44 +399,54 @@ class Clock(_ClockBase):
             result = True
             item.func(dt, *item.args, **item.kwargs)
 
-        # Call all scheduled interval functions and reschedule for future.
-        need_resort = False
-        # Dupe list just in case one of the items unchedules itself
-        for item in list(self._schedule_interval_items):
-            if item.next_ts > ts:
-                break
+        # Pop all elapsed interval items first such that items scheduled
+        # by callbacks are not called before next tick.
+        heap = self._schedule_interval_items
+        elapsed = []
+        while heap and heap[0][0] <= ts:
+            item = heapq.heappop(heap)[2]
+            if item.func is _dummy_schedule_func:
+                self._schedule_interval_dead -= 1
+            else:
+                self._schedule_interval_times.remove(item.next_ts)
+                item.next_ts = None
+                elapsed.append(item)
+
+        # Call elapsed interval functions and reschedule for future.
+        for item in elapsed:
+            if item.func is _dummy_schedule_func:
+                # Unscheduled by a previous callback
+                continue
             result = True
             item.func(ts - item.last_ts, *item.args, **item.kwargs)
+            if item.func is _dummy_schedule_func:
+                # Unscheduled by itself
+                continue
             if item.interval:
                 # Try to keep timing regular, even if overslept this time;
                 # but don't schedule in the past (which could lead to
                 # infinitely-worsing error).
-                item.next_ts = item.last_ts + item.interval
+                next_ts = item.last_ts + item.interval
                 item.last_ts = ts
-                if item.next_ts <= ts:
-                    if ts - item.next_ts < 0.05:
+                if next_ts <= ts:
+                    if ts - next_ts < 0.05:
                         # Only missed by a little bit, keep the same schedule
-                        item.next_ts = ts + item.interval
+                        next_ts = ts + item.interval
                     else:
                         # Missed by heaps, do a soft reschedule to avoid
                         # lumping everything together.
-                        item.next_ts = self._get_soft_next_ts(ts, item.interval)
+                        next_ts = self._get_soft_next_ts(ts, item.interval)
                         # Fake last_ts to avoid repeatedly over-scheduling in
                         # future.  Unfortunately means the next reported dt is
                         # incorrect (looks like interval but actually isn't).
-                        item.last_ts = item.next_ts - item.interval
-                need_resort = True
+                        item.last_ts = next_ts - item.interval
+                self._push_item(item, next_ts)
             else:
-                item.next_ts = None
-
-        # Remove finished one-shots.
-        self._schedule_interval_items = \
-            [item for item in self._schedule_interval_items \
-             if item.next_ts is not None]
-
-        if need_resort:
-            # TODO bubble up changed items might be faster
-            self._schedule_interval_items.sort(key=lambda a: a.next_ts)
+                # Remove finished one-shot
+                items = self._schedule_interval_funcs[item.func]
+                items.remove(item)
+                if not items:
+                    del self._schedule_interval_funcs[item.func]
 
         return result
 
@@ -375,20 +486,29 @@ class Clock(_ClockBase):
         '''Sleep until the next frame is due.  Called automatically by
         `tick` if a framerate limit has been set.
 
-        This method uses several heuristics to determine whether to
-        sleep or busy-wait (or both).
+        This method sleeps until the deadline minus a busy-wait margin
+        calibrated from the measured sleep overshoot and then busy-waits.
         '''
         ts = self.time()
-        # Sleep to just before the desired time
-        sleeptime = self.get_sleep_time(False)
-        while sleeptime - self.SLEEP_UNDERSHOOT > self.MIN_SLEEP:
-            self.sleep(1000000 * (sleeptime - self.SLEEP_UNDERSHOOT))
-            sleeptime = self.get_sleep_time(False)
+        if self._vsync_align and self._vsync_ts is not None:
+            self._align()
+
+        # Sleep to just before the desired time, leaving a calibrated margin
+        now = ts
+        while self.next_ts - now > self._spin:
+            request = self.next_ts - now - self._spin
+            self.sleep(1000000 * request)
+            last, now = now, self.time()
+            self._calibrate(now - last - request)
+        slept = now - ts
 
         # Busy-loop CPU to get closest to the mark
-        sleeptime = self.next_ts - self.time()
-        while sleeptime > 0:
-            sleeptime = self.next_ts - self.time()
+        while now < self.next_ts:
+            now = self.time()
+        sleeptime = self.next_ts - now
+        self._pacing.append((now - self.next_ts, slept, now - ts - slept))
+        if len(self._pacing) > self.window_size:
+            self._pacing.pop(0)
 
         if sleeptime < -2 * self.period_limit:
             # Missed the time by a long shot, let's reset the clock
@@ -398,6 +518,92 @@ class Clock(_ClockBase):
             # Otherwise keep the clock steady
             self.next_ts = self.next_ts + self.period_limit
 
+    def _calibrate(self, oversleep):
+        '''Update the busy-wait margin from a measured sleep overshoot.
+
+        The margin follows an exponential moving average of the overshoot
+        plus four times its mean deviation.
+        '''
+        self._oversleep += 0.1 * (oversleep - self._oversleep)
+        self._oversleep_dev += 0.1 * (abs(oversleep - self._oversleep)
+                                      - self._oversleep_dev)
+        spin = self._oversleep + 4 * self._oversleep_dev
+        self._spin = min(max(spin, self.MIN_SPIN), self.MIN_SLEEP)
+
+    def _align(self):
+        '''Phase lock the next frame deadline onto the last vertical blank.
+
+        The deadline is placed half a refresh period before the vertical blank
+        at which the frame is due, such that rendering does not straddle a
+        vertical blank and the swap returns at the expected time.
+        '''
+        refresh = self._vsync_refresh
+        if refresh is None and self._vsync_intervals:
+            refresh = min(self._vsync_intervals)
+        if refresh:
+            count = max(int(round(self.period_limit / refresh)), 1)
+            next_ts = self._vsync_ts + count * refresh - 0.5 * refresh
+            if abs(next_ts - self.next_ts) < self.period_limit:
+                self.next_ts = next_ts
+        self._vsync_ts = None
+
+    def set_vsync(self, align, refresh=None):
+        '''Enable or disable phase locking of frames onto vertical blanks.
+
+        :Parameters:
+            `align` : bool
+                Whether to align frame deadlines with the timestamps given
+                to `vsync`.
+            `refresh` : float
+                Display refresh period in seconds. If None, it is estimated
+                from the shortest interval between consecutive swaps.
+        '''
+        self._vsync_align = align
+        self._vsync_refresh = refresh
+        self._vsync_ts = None
+        self._vsync_last = None
+        self._vsync_intervals = []
+
+    def vsync(self, ts=None):
+        '''Signal that a buffer swap synchronized with vertical blank has
+        just returned.
+
+        :Parameters:
+            `ts` : float
+                Time of the vertical blank (default is now).
+        '''
+        if ts is None:
+            ts = self.time()
+        if self._vsync_last is not None:
+            self._vsync_intervals.append(ts - self._vsync_last)
+            if len(self._vsync_intervals) > self.window_size:
+                self._vsync_intervals.pop(0)
+        self._vsync_last = self._vsync_ts = ts
+
+    def get_pacing_stats(self):
+        '''Get frame pacing statistics of recent history.
+
+        The pacing error is the delay between the time a frame was due and the
+        time `tick` returned.
+
+        :rtype: dict
+        :return: Number of frames, mean, 95th percentile and maximum pacing
+            error, number of late frames (more than 1ms), mean sleep and
+            busy-wait durations (all in seconds), and current busy-wait margin.
+        '''
+        if not self._pacing:
+            return { 'count': 0, 'spin_margin': self._spin }
+        errors = sorted(error for error, slept, spun in self._pacing)
+        count = len(errors)
+        return { 'count': count,
+                 'mean': sum(errors) / count,
+                 'p95': errors[min(int(0.95 * count), count - 1)],
+                 'max': errors[-1],
+                 'late': sum(1 for error in errors if error > 0.001),
+                 'sleep': sum(slept for error, slept, spun in self._pacing) / count,
+                 'spin': sum(spun for error, slept, spun in self._pacing) / count,
+                 'spin_margin': self._spin }
+
     def get_sleep_time(self, sleep_idle):
         '''Get the time until the next item is scheduled.
 
@@ -428,19 +634,18 @@ class Clock(_ClockBase):
 
         :since: pyglet 1.1
         '''
+        next_ts = self._get_next_interval_ts()
         if self._schedule_items or not sleep_idle:
             if not self.period_limit:
                 return 0.
             else:
                 wake_time = self.next_ts
-                if self._schedule_interval_items:
-                    wake_time = min(wake_time,
-                                    self._schedule_interval_items[0].next_ts)
+                if next_ts is not None:
+                    wake_time = min(wake_time, next_ts)
                 return max(wake_time - self.time(), 0.)
 
-        if self._schedule_interval_items:
-            return max(self._schedule_interval_items[0].next_ts - self.time(),
-                       0)
+        if next_ts is not None:
+            return max(next_ts - self.time(), 0)
 
         return None
 
@@ -509,15 +714,28 @@ class Clock(_ClockBase):
 
     def _schedule_item(self, func, last_ts, next_ts, interval, *args, **kwargs):
         item = _ScheduledIntervalItem(
-            func, interval, last_ts, next_ts, args, kwargs)
-
-        # Insert in sort order
-        for i, other in enumerate(self._schedule_interval_items):
-            if other.next_ts is not None and other.next_ts > next_ts:
-                self._schedule_interval_items.insert(i, item)
-                break
-        else:
-            self._schedule_interval_items.append(item)
+            func, interval, last_ts, None, args, kwargs)
+        self._schedule_interval_funcs.setdefault(func, []).append(item)
+        self._push_item(item, next_ts)
+
+    def _push_item(self, item, next_ts):
+        # Order makes items with same next_ts called in schedule order
+        item.next_ts = next_ts
+        self._schedule_interval_times.add(next_ts)
+        order = next(self._schedule_interval_order)
+        heapq.heappush(self._schedule_interval_items, (next_ts, order, item))
+
+    def _get_next_interval_ts(self):
+        '''Get the next_ts of the first scheduled interval item (or None),
+        discarding unscheduled items from the top of the heap.
+        '''
+        heap = self._schedule_interval_items
+        while heap and heap[0][2].func is _dummy_schedule_func:
+            heapq.heappop(heap)
+            self._schedule_interval_dead -= 1
+        if heap:
+            return heap[0][0]
+        return None
 
     def schedule_interval(self, func, interval, *args, **kwargs):
         '''Schedule a function to be called every `interval` seconds.
@@ -592,18 +810,13 @@ class Clock(_ClockBase):
         self._schedule_item(func, last_ts, next_ts, interval, *args, **kwargs)
 
     def _get_soft_next_ts(self, last_ts, interval):
+        times = self._schedule_interval_times
+
         def taken(ts, e):
             '''Return True if the given time has already got an item
             scheduled nearby.
             '''
-            for item in self._schedule_interval_items:
-                if item.next_ts is None:
-                    pass
-                elif abs(item.next_ts - ts) <= e:
-                    return True
-                elif item.next_ts > ts + e:
-                    return False
-            return False
+            return times.any_between(ts - e, ts + e)
 
         # Binary division over interval:
         #
@@ -678,18 +891,27 @@ class Clock(_ClockBase):
             if item.func == func:
                 item.func = _dummy_schedule_func
 
-        for item in self._schedule_interval_items:
-            if item.func == func:
-                item.func = _dummy_schedule_func
-
-        # Now remove matching items from both schedule lists.
+        # Now remove matching items from schedule list.
         self._schedule_items = \
             [item for item in self._schedule_items \
                   if item.func is not _dummy_schedule_func]
 
-        self._schedule_interval_items = \
-            [item for item in self._schedule_interval_items \
-                  if item.func is not _dummy_schedule_func]
+        # Interval items are left in the heap and discarded when popped.
+        for item in self._schedule_interval_funcs.pop(func, []):
+            item.func = _dummy_schedule_func
+            if item.next_ts is not None:
+                self._schedule_interval_dead += 1
+                self._schedule_interval_times.remove(item.next_ts)
+                item.next_ts = None
+
+        # Rebuild heap when mostly made of unscheduled items
+        heap = self._schedule_interval_items
+        if self._schedule_interval_dead > len(heap)//2 + 32:
+            heap = [entry for entry in heap
+                    if entry[2].func is not _dummy_schedule_func]
+            heapq.heapify(heap)
+            self._schedule_interval_items = heap
+            self._schedule_interval_dead = 0
 
 # Default clock.
 _default = Clock()
@@ -762,6 +984,15 @@ def get_fps():
     '''
     return _default.get_fps()
 
+def get_pacing_stats():
+    '''Return frame pacing statistics of the default clock.
+
+    See `Clock.get_pacing_stats` for details.
+
+    :rtype: dict
+    '''
+    return _default.get_pacing_stats()
+
 def set_fps_limit(fps_limit):
     '''Set the framerate limit for the default clock.
 
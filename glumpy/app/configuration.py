@@ -262,16 +262,37 @@ def gl_get_configuration():
     import OpenGL.GL as gl
 
     configuration =  Configuration()
+
+    # Offscreen windows render into a framebuffer object, read its attachments
+    color, depth, stencil = gl.GL_FRONT_LEFT, gl.GL_DEPTH, gl.GL_STENCIL
     try:
-        gl.glBindFramebuffer(gl.GL_FRAMEBUFFER, 0)
+        framebuffer = int(gl.glGetIntegerv(gl.GL_FRAMEBUFFER_BINDING))
     except:
-        log.warn("Cannot bind framebuffer")
+        framebuffer = 0
+    if framebuffer:
+        color = gl.GL_COLOR_ATTACHMENT0
+        depth = gl.GL_DEPTH_ATTACHMENT
+        stencil = gl.GL_STENCIL_ATTACHMENT
+        try:
+            value = ctypes.c_int()
+            gl.glGetFramebufferAttachmentParameteriv(
+                gl.GL_FRAMEBUFFER, stencil,
+                gl.GL_FRAMEBUFFER_ATTACHMENT_OBJECT_TYPE, value )
+            if value.value == gl.GL_NONE:
+                stencil = None
+        except:
+            pass
+    else:
+        try:
+            gl.glBindFramebuffer(gl.GL_FRAMEBUFFER, 0)
+        except:
+            log.warn("Cannot bind framebuffer")
 
     value = ctypes.c_int()
 
     try:
         gl.glGetFramebufferAttachmentParameteriv(
-            gl.GL_FRAMEBUFFER, gl.GL_FRONT_LEFT,
+            gl.GL_FRAMEBUFFER, color,
             gl.GL_FRAMEBUFFER_ATTACHMENT_RED_SIZE, value )
         configuration._red_size = value.value
     except:
@@ -280,7 +301,7 @@ def gl_get_configuration():
 
     try:
         gl.glGetFramebufferAttachmentParameteriv(
-            gl.GL_FRAMEBUFFER, gl.GL_FRONT_LEFT,
+            gl.GL_FRAMEBUFFER, color,
             gl.GL_FRAMEBUFFER_ATTACHMENT_GREEN_SIZE, value )
         configuration._green_size = value.value
     except:
@@ -289,7 +310,7 @@ def gl_get_configuration():
 
     try:
         gl.glGetFramebufferAttachmentParameteriv(
-            gl.GL_FRAMEBUFFER, gl.GL_FRONT_LEFT,
+            gl.GL_FRAMEBUFFER, color,
             gl.GL_FRAMEBUFFER_ATTACHMENT_BLUE_SIZE, value )
         configuration._blue_size = value.value
     except:
@@ -298,7 +319,7 @@ def gl_get_configuration():
 
     try:
         gl.glGetFramebufferAttachmentParameteriv(
-            gl.GL_FRAMEBUFFER, gl.GL_FRONT_LEFT,
+            gl.GL_FRAMEBUFFER, color,
             gl.GL_FRAMEBUFFER_ATTACHMENT_ALPHA_SIZE, value )
         configuration._alpha_size = value.value
     except:
@@ -307,25 +328,28 @@ def gl_get_configuration():
 
     try:
         gl.glGetFramebufferAttachmentParameteriv(
-            gl.GL_FRAMEBUFFER, gl.GL_DEPTH,
+            gl.GL_FRAMEBUFFER, depth,
             gl.GL_FRAMEBUFFER_ATTACHMENT_DEPTH_SIZE, value )
         configuration._depth_size = value.value
     except:
         log.warn("Cannot read DEPTH size from the framebuffer")
         configuration._depth_size = 0
 
-    try:
-        gl.glGetFramebufferAttachmentParameteriv(
-            gl.GL_FRAMEBUFFER, gl.GL_STENCIL,
-            gl.GL_FRAMEBUFFER_ATTACHMENT_STENCIL_SIZE, value )
-        configuration._stencil_size = value.value
-    except:
-        log.warn("Cannot read STENCIL size from the framebuffer")
+    if stencil is None:
         configuration._stencil_size = 0
+    else:
+        try:
+            gl.glGetFramebufferAttachmentParameteriv(
+                gl.GL_FRAMEBUFFER, stencil,
+                gl.GL_FRAMEBUFFER_ATTACHMENT_STENCIL_SIZE, value )
+            configuration._stencil_size = value.value
+        except:
+            log.warn("Cannot read STENCIL size from the framebuffer")
+            configuration._stencil_size = 0
 
     try:
         gl.glGetFramebufferAttachmentParameteriv(
-            gl.GL_FRAMEBUFFER, gl.GL_FRONT_LEFT,
+            gl.GL_FRAMEBUFFER, color,
             gl.GL_FRAMEBUFFER_ATTACHMENT_COLOR_ENCODING, value )
         if value.value == gl.GL_LINEAR:
             configuration._srgb = False
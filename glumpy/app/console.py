@@ -200,6 +200,6 @@ class Console(object):
         # Update row and scroll if necessary
         self._row += 1
         if self._row > self._rows-1:
-            self._data["glyph"][:-n] = self._data["glyph"][n:]
-            self._data["glyph"][-n:] = 0
+            self._data["glyph"][:-1] = self._data["glyph"][1:]
+            self._data["glyph"][-1:] = 0
             self._row = self._rows-1
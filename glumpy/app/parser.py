@@ -39,7 +39,7 @@ def set_default_options(parser):
     # Backend option
     parser.add_argument("--backend", "-b",
                         default = glumpy.defaults.backend(),
-                        choices = ('glfw', 'sdl2', 'pyside', 'pyglet', 'sdl',  'osxglut'),
+                        choices = ('glfw', 'sdl2', 'pyside', 'pyglet', 'sdl',  'osxglut', 'headless'),
                         help="Backend to use, one of ")
 
     # Record
@@ -58,6 +58,11 @@ def set_default_options(parser):
                         type=int,
                         help="Framerate in frames/second")
 
+    # On-demand rendering option
+    parser.add_argument("--on-demand",
+                        action='store_true',
+                        help="Redraw windows only when their content has changed")
+
     # Display framerate option
     parser.add_argument("--display-fps",
                         action='store_true',
@@ -9,4 +9,5 @@ __backends__ = ('glfw',
                 'sdl2',
                 'osxglut',
                 'freeglut',
-                'pyside')
+                'pyside',
+                'headless')
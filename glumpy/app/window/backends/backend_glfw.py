@@ -3,10 +3,10 @@
 # Copyright (c) 2014, Nicolas P. Rougier
 # Distributed under the (new) BSD License. See LICENSE.txt for more info.
 # -----------------------------------------------------------------------------
-import os, sys
-from glumpy import gl
+import os, sys, time
+from glumpy import gl, profiler
 from glumpy.log import log
-from glumpy.app import configuration
+from glumpy.app import configuration, parser
 from glumpy.app.window import window
 
 
@@ -197,7 +197,7 @@ class Window(window.Window):
             sys.exit()
 
         glfw.glfwMakeContextCurrent(self._native_window)
-        glfw.glfwSwapInterval(0)
+        glfw.glfwSwapInterval(1 if parser.get_options().vsync else 0)
 
         # OSX: check framebuffer size / window size. On retina display, they
         #      can be different so we try to correct window size such as having
@@ -365,6 +365,20 @@ def windows():
     return __windows__
 
 
+# -------------------------------------------------------------------- wait ---
+def wait(timeout):
+    """ Wait for events (at most timeout seconds or forever if None) """
+
+    if timeout is None:
+        glfw.glfwWaitEvents()
+    elif hasattr(glfw, "glfwWaitEventsTimeout"):
+        glfw.glfwWaitEventsTimeout(timeout)
+    else:
+        # GLFW < 3.2
+        glfw.glfwPollEvents()
+        time.sleep(min(timeout, 0.01))
+
+
 # ----------------------------------------------------------------- process ---
 def process(dt):
 
@@ -375,14 +389,17 @@ def process(dt):
         # Make window active
         window.activate()
 
-        # Dispatch the main draw event
-        window.dispatch_event('on_draw', dt)
+        # Dispatch the main draw event (if window content has changed)
+        damaged = window.damaged
+        if damaged:
+            window.dispatch_event('on_draw', dt)
 
         # Dispatch the idle event
         window.dispatch_event('on_idle', dt)
 
         # Swap buffers
-        window.swap()
+        if damaged:
+            profiler.timed("swap", window.swap)
 
 
     return len(__windows__)
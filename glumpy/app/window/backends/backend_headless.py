@@ -0,0 +1,424 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright (c) 2014, Nicolas P. Rougier
+# Distributed under the (new) BSD License. See LICENSE.txt for more info.
+# -----------------------------------------------------------------------------
+"""
+Headless (offscreen) backend
+
+This backend does not need any windowing system. An OpenGL context is created
+using EGL (surfaceless platform) or OSMesa (as a fallback) and each window
+renders into its own framebuffer object. Both work on CPU-only nodes using
+the Mesa llvmpipe software rasterizer.
+
+Rendered frames can be read back as numpy arrays using window.read():
+
+  app.use("headless")
+  window = app.Window(512, 512)
+
+  @window.event
+  def on_draw(dt):
+      window.clear()
+      ...
+
+  app.run(framecount=1)
+  image = window.read()
+
+Note that PyOpenGL needs to know about the current context and the backend
+tells it how to get it. GL functions must however be resolvable from the
+PyOpenGL platform, which is the case for the default platform on Linux with
+a libglvnd based libGL. If it is not, set PYOPENGL_PLATFORM to "egl" or
+"osmesa" before importing glumpy.
+"""
+import sys
+import time
+import ctypes
+import ctypes.util
+import numpy as np
+from glumpy import gl, profiler
+from glumpy.log import log
+from glumpy.app import configuration
+from glumpy.app.window import window
+from glumpy.gloo.framebuffer import FrameBuffer, ColorBuffer, DepthBuffer
+
+
+# Backend name
+__name__ = "Headless"
+
+# Backend version (if available)
+__version__ = ""
+
+# Backend availability
+__availability__ = False
+
+# Whether the framework has been initialized
+__initialized__ = False
+
+# Active windows
+__windows__ = []
+
+# Offscreen platform ("EGL" or "OSMesa")
+__platform__ = None
+
+
+# ---------------------------------------------------- convenient functions ---
+def name():      return __name__
+def version():   return __version__
+def available(): return __availability__
+
+
+# --------------------------------------------------------------------- EGL ---
+EGL_NONE                        = 0x3038
+EGL_SURFACE_TYPE                = 0x3033
+EGL_PBUFFER_BIT                 = 0x0001
+EGL_RENDERABLE_TYPE             = 0x3040
+EGL_OPENGL_BIT                  = 0x0008
+EGL_OPENGL_ES2_BIT              = 0x0004
+EGL_OPENGL_API                  = 0x30A2
+EGL_OPENGL_ES_API               = 0x30A0
+EGL_VERSION                     = 0x3054
+EGL_CONTEXT_MAJOR_VERSION       = 0x3098
+EGL_CONTEXT_MINOR_VERSION       = 0x30FB
+EGL_CONTEXT_OPENGL_PROFILE_MASK = 0x30FD
+EGL_CONTEXT_CORE_PROFILE_BIT    = 0x0001
+EGL_CONTEXT_COMPAT_PROFILE_BIT  = 0x0002
+EGL_PLATFORM_SURFACELESS_MESA   = 0x31DD
+
+# ------------------------------------------------------------------ OSMesa ---
+OSMESA_RGBA = gl.GL_RGBA
+
+
+def _load_egl():
+    """ Load EGL library and get a surfaceless display """
+
+    library = ctypes.util.find_library("EGL")
+    if library is None:
+        raise ImportError("EGL library not found")
+    egl = ctypes.CDLL(library)
+    egl.eglGetProcAddress.restype = ctypes.c_void_p
+    egl.eglGetProcAddress.argtypes = [ctypes.c_char_p]
+    egl.eglInitialize.argtypes = [ctypes.c_void_p]*3
+    egl.eglTerminate.argtypes = [ctypes.c_void_p]
+    egl.eglQueryString.restype = ctypes.c_char_p
+    egl.eglQueryString.argtypes = [ctypes.c_void_p, ctypes.c_int]
+    egl.eglChooseConfig.argtypes = [ctypes.c_void_p, ctypes.POINTER(ctypes.c_int),
+                                    ctypes.POINTER(ctypes.c_void_p), ctypes.c_int,
+                                    ctypes.POINTER(ctypes.c_int)]
+    egl.eglBindAPI.argtypes = [ctypes.c_uint]
+    egl.eglCreateContext.restype = ctypes.c_void_p
+    egl.eglCreateContext.argtypes = [ctypes.c_void_p]*3 + [ctypes.POINTER(ctypes.c_int)]
+    egl.eglDestroyContext.argtypes = [ctypes.c_void_p]*2
+    egl.eglMakeCurrent.argtypes = [ctypes.c_void_p]*4
+    egl.eglGetCurrentContext.restype = ctypes.c_void_p
+
+    address = egl.eglGetProcAddress(b"eglGetPlatformDisplayEXT")
+    if not address:
+        raise ImportError("EGL platform extension not available")
+    prototype = ctypes.CFUNCTYPE(ctypes.c_void_p, ctypes.c_uint,
+                                 ctypes.c_void_p, ctypes.c_void_p)
+    display = prototype(address)(EGL_PLATFORM_SURFACELESS_MESA, None, None)
+    if not display or not egl.eglInitialize(display, None, None):
+        raise ImportError("Cannot initialize EGL surfaceless display")
+    return egl, display
+
+
+def _load_osmesa():
+    """ Load OSMesa library """
+
+    library = ctypes.util.find_library("OSMesa")
+    if library is None:
+        raise ImportError("OSMesa library not found")
+    osmesa = ctypes.CDLL(library)
+    osmesa.OSMesaCreateContextExt.restype = ctypes.c_void_p
+    osmesa.OSMesaCreateContextExt.argtypes = [ctypes.c_uint, ctypes.c_int,
+                                              ctypes.c_int, ctypes.c_int,
+                                              ctypes.c_void_p]
+    osmesa.OSMesaDestroyContext.argtypes = [ctypes.c_void_p]
+    osmesa.OSMesaMakeCurrent.argtypes = [ctypes.c_void_p, ctypes.c_void_p,
+                                         ctypes.c_uint, ctypes.c_int, ctypes.c_int]
+    osmesa.OSMesaGetCurrentContext.restype = ctypes.c_void_p
+    return osmesa
+
+
+def _set_context_lookup(function):
+    """
+    PyOpenGL stores per-context data using the current context as given by
+    its platform (GLX by default on Linux) that does not know about EGL or
+    OSMesa contexts.
+    """
+
+    from OpenGL import platform
+    def GetCurrentContext():
+        return function() or 0
+    platform.GetCurrentContext = GetCurrentContext
+    platform.CurrentContextIsValid = GetCurrentContext
+
+
+# --------------------------------------------------------------- init/exit ---
+def __init__():
+    global __initialized__
+    __initialized__ = True
+
+def __exit__():
+    global __initialized__
+    if __platform__ == "EGL":
+        __egl__.eglTerminate(__display__)
+    __initialized__ = False
+
+
+# ------------------------------------------------------------ availability ---
+try:
+    __egl__, __display__ = _load_egl()
+    __platform__ = "EGL"
+    __version__ = "EGL %s" % __egl__.eglQueryString(__display__, EGL_VERSION).decode()
+    __availability__ = True
+    _set_context_lookup(__egl__.eglGetCurrentContext)
+    __init__()
+except ImportError:
+    try:
+        __osmesa__ = _load_osmesa()
+        __platform__ = "OSMesa"
+        __version__ = "OSMesa"
+        __availability__ = True
+        _set_context_lookup(__osmesa__.OSMesaGetCurrentContext)
+        __init__()
+    except ImportError:
+        __availability__ = False
+        __version__ = None
+
+
+# -------------------------------------------------------------- capability ---
+capability = {
+    "Window position get/set" : False,
+    "Window size get/set"     : True,
+    "Multiple windows"        : True,
+    "Mouse scroll events"     : False,
+    "Non-decorated window"    : True,
+    "Non-sizeable window"     : True,
+    "Fullscreen mode"         : False,
+    "Unicode processing"      : False,
+    "Set GL version"          : True,
+    "Set GL profile"          : True,
+    "Share GL context"        : True,
+}
+
+
+# ------------------------------------------------------- set_configuration ---
+def set_configuration(config):
+    """ Get EGL context attributes from gl configuration """
+
+    attributes = []
+    if config.api not in ("ES", "es") and config.major_version >= 3:
+        attributes += [EGL_CONTEXT_MAJOR_VERSION, config.major_version,
+                       EGL_CONTEXT_MINOR_VERSION, config.minor_version]
+        if config.profile == "core":
+            attributes += [EGL_CONTEXT_OPENGL_PROFILE_MASK,
+                           EGL_CONTEXT_CORE_PROFILE_BIT]
+        elif config.profile == "compatibility":
+            attributes += [EGL_CONTEXT_OPENGL_PROFILE_MASK,
+                           EGL_CONTEXT_COMPAT_PROFILE_BIT]
+    elif config.api in ("ES", "es"):
+        attributes += [EGL_CONTEXT_MAJOR_VERSION, config.major_version]
+    attributes.append(EGL_NONE)
+    return (ctypes.c_int*len(attributes))(*attributes)
+
+
+# ------------------------------------------------------------------ Window ---
+class Window(window.Window):
+
+    def __init__( self, width=512, height=512, title=None, visible=True, aspect=None,
+                  decoration=True, fullscreen=False, config=None, context=None, color=(0,0,0,1)):
+
+        window.Window.__init__(self, width=width,
+                                     height=height,
+                                     title=title,
+                                     visible=visible,
+                                     aspect=aspect,
+                                     decoration=decoration,
+                                     fullscreen=fullscreen,
+                                     config=config,
+                                     context=context,
+                                     color=color)
+
+        if config is None:
+            config = configuration.Configuration()
+        share = context._native_context if context is not None else None
+
+        if __platform__ == "EGL":
+            api = EGL_OPENGL_API
+            renderable = EGL_OPENGL_BIT
+            if config.api in ("ES", "es"):
+                api, renderable = EGL_OPENGL_ES_API, EGL_OPENGL_ES2_BIT
+            __egl__.eglBindAPI(api)
+            attributes = (ctypes.c_int*5)(EGL_SURFACE_TYPE, EGL_PBUFFER_BIT,
+                                          EGL_RENDERABLE_TYPE, renderable, EGL_NONE)
+            config_ = ctypes.c_void_p()
+            count = ctypes.c_int()
+            __egl__.eglChooseConfig(__display__, attributes,
+                                    ctypes.byref(config_), 1, ctypes.byref(count))
+            # Surfaceless contexts do not need a config (EGL_KHR_no_config_context)
+            if not count.value:
+                config_ = None
+            self._native_context = __egl__.eglCreateContext(
+                __display__, config_, share, set_configuration(config))
+        else:
+            self._native_context = __osmesa__.OSMesaCreateContextExt(
+                OSMESA_RGBA, config.depth_size, config.stencil_size, 0, share)
+            self._buffer = np.zeros((height, width, 4), dtype=np.ubyte)
+
+        if not self._native_context:
+            log.critical("Offscreen context creation failed")
+            __exit__()
+            sys.exit()
+
+        self._framebuffer = None
+        self._make_current()
+        self._create_framebuffer(width, height)
+        __windows__.append(self)
+
+
+    def _make_current(self):
+        if __platform__ == "EGL":
+            __egl__.eglMakeCurrent(__display__, None, None, self._native_context)
+        else:
+            h, w = self._buffer.shape[:2]
+            __osmesa__.OSMesaMakeCurrent(self._native_context,
+                                         self._buffer.ctypes.data,
+                                         gl.GL_UNSIGNED_BYTE, w, h)
+
+
+    def _create_framebuffer(self, width, height):
+        """ Create the framebuffer this window is rendering into """
+
+        if self._framebuffer is not None:
+            self._framebuffer.deactivate()
+            self._framebuffer.color.delete()
+            self._framebuffer.depth.delete()
+            self._framebuffer.delete()
+        self._framebuffer = FrameBuffer(color=ColorBuffer(width, height, gl.GL_RGBA8),
+                                        depth=DepthBuffer(width, height,
+                                                          gl.GL_DEPTH_COMPONENT24))
+        self._framebuffer.activate()
+        self._width, self._height = width, height
+
+
+    @property
+    def framebuffer(self):
+        """ Framebuffer this window is rendering into """
+        return self._framebuffer
+
+
+    def read(self, alpha=False):
+        """
+        Read the window content.
+
+        Parameters
+        ----------
+
+        alpha : bool
+            Whether to read the alpha channel
+
+        Return
+        ------
+            uint8 array of shape (height, width, 3 or 4), top row first
+        """
+
+        self.activate()
+        format, depth = (gl.GL_RGBA, 4) if alpha else (gl.GL_RGB, 3)
+        data = np.empty((self._height, self._width, depth), dtype=np.ubyte)
+        gl.glPixelStorei(gl.GL_PACK_ALIGNMENT, 1)
+        gl.glReadPixels(0, 0, self._width, self._height,
+                        format, gl.GL_UNSIGNED_BYTE, data)
+        return data[::-1]
+
+
+    def show(self):
+        self._visible = True
+        self.dispatch_event('on_show')
+
+    def hide(self):
+        self._visible = False
+        self.dispatch_event('on_hide')
+
+    def close(self):
+        __windows__.remove(self)
+        for i in range(len(self._timer_stack)):
+            handler, interval = self._timer_stack[i]
+            self._clock.unschedule(handler)
+        self.dispatch_event('on_close')
+        if __platform__ == "EGL":
+            __egl__.eglMakeCurrent(__display__, None, None, None)
+            __egl__.eglDestroyContext(__display__, self._native_context)
+        else:
+            __osmesa__.OSMesaDestroyContext(self._native_context)
+        self._native_context = None
+
+    def set_title(self, title):
+        self._title = title
+
+    def get_title(self):
+        return self._title
+
+    def set_size(self, width, height):
+        if (width, height) != (self._width, self._height):
+            self.activate()
+            if __platform__ == "OSMesa":
+                self._buffer = np.zeros((height, width, 4), dtype=np.ubyte)
+                self._make_current()
+            self._create_framebuffer(width, height)
+            self.dispatch_event('on_resize', width, height)
+
+    def get_size(self):
+        return self._width, self._height
+
+    def set_position(self, x, y):
+        self._x, self._y = x, y
+
+    def get_position(self):
+        return self._x, self._y
+
+    def swap(self):
+        # Nothing to swap, just make sure rendering is done
+        gl.glFlush()
+
+    def activate(self):
+        self._make_current()
+        if self._framebuffer is not None:
+            gl.glBindFramebuffer(gl.GL_FRAMEBUFFER, self._framebuffer.handle)
+
+
+
+# ----------------------------------------------------------------- windows ---
+def windows():
+    return __windows__
+
+
+# -------------------------------------------------------------------- wait ---
+def wait(timeout):
+    """ Wait for events (at most timeout seconds or forever if None) """
+
+    # There is no event source, only scheduled functions may change things
+    if timeout is not None:
+        time.sleep(timeout)
+
+
+# ----------------------------------------------------------------- process ---
+def process(dt):
+
+    for window in __windows__:
+        # Make window active
+        window.activate()
+
+        # Dispatch the main draw event (if window content has changed)
+        damaged = window.damaged
+        if damaged:
+            window.dispatch_event('on_draw', dt)
+
+        # Dispatch the idle event
+        window.dispatch_event('on_idle', dt)
+
+        # Swap buffers
+        if damaged:
+            profiler.timed("swap", window.swap)
+
+    return len(__windows__)
@@ -4,7 +4,7 @@
 # Distributed under the (new) BSD License. See LICENSE.txt for more info.
 # -----------------------------------------------------------------------------
 import os, sys
-from glumpy import gl
+from glumpy import gl, profiler
 from glumpy.log import log
 from glumpy.app import configuration
 from glumpy.app.window import window
@@ -373,14 +373,17 @@ def process(dt):
         # Make window active
         window.activate()
 
-        # Dispatch the main draw event
-        window.dispatch_event('on_draw', dt)
+        # Dispatch the main draw event (if window content has changed)
+        damaged = window.damaged
+        if damaged:
+            window.dispatch_event('on_draw', dt)
 
         # Dispatch the idle event
         window.dispatch_event('on_idle', dt)
 
         # Swap buffers
-        window.swap()
+        if damaged:
+            profiler.timed("swap", window.swap)
 
 
     return len(__windows__)
@@ -4,9 +4,9 @@
 # Distributed under the (new) BSD License. See LICENSE.txt for more info.
 # -----------------------------------------------------------------------------
 import sys, ctypes
-from glumpy import gl
+from glumpy import gl, profiler
 from glumpy.log import log
-from glumpy.app import configuration
+from glumpy.app import configuration, parser
 from glumpy.app.window import window
 
 
@@ -194,7 +194,7 @@ class Window(window.Window):
                                                     width, height, flags)
         self._native_context = sdl2.SDL_GL_CreateContext(self._native_window)
         self._native_id = sdl2.SDL_GetWindowID(self._native_window)
-        sdl2.SDL_GL_SetSwapInterval(0)
+        sdl2.SDL_GL_SetSwapInterval(1 if parser.get_options().vsync else 0)
 
         # OSX: check framebuffer size / window size. On retina display, they
         #      can be different so we try to correct window size such as having
@@ -364,6 +364,17 @@ def windows():
     return __windows__.values()
 
 
+# -------------------------------------------------------------------- wait ---
+def wait(timeout):
+    """ Wait for events (at most timeout seconds or forever if None) """
+
+    # Events are left in the queue (NULL event)
+    if timeout is None:
+        sdl2.SDL_WaitEvent(None)
+    else:
+        sdl2.SDL_WaitEventTimeout(None, int(1000*timeout))
+
+
 # ----------------------------------------------------------------- process ---
 def process(dt):
 
@@ -379,13 +390,16 @@ def process(dt):
         # Make window active
         window.activate()
 
-        # Dispatch the main draw event
-        window.dispatch_event('on_draw', dt)
+        # Dispatch the main draw event (if window content has changed)
+        damaged = window.damaged
+        if damaged:
+            window.dispatch_event('on_draw', dt)
 
         # Dispatch the idle event
         window.dispatch_event('on_idle', dt)
 
         # Swap buffers
-        window.swap()
+        if damaged:
+            profiler.timed("swap", window.swap)
 
     return len(__windows__.values())
@@ -4,7 +4,7 @@
 # Distributed under the (new) BSD License. See LICENSE.txt for more info.
 # -----------------------------------------------------------------------------
 import os, sys
-from glumpy import gl
+from glumpy import gl, profiler
 from glumpy.log import log
 from glumpy.app import configuration
 from glumpy.app.window import window
@@ -122,6 +122,14 @@ def windows():
     return __windows__
 
 
+# -------------------------------------------------------------------- wait ---
+def wait(timeout):
+    """ Wait for events (at most timeout seconds or forever if None) """
+
+    # -> Add toolkit specific code here to block until an event is available
+    pass
+
+
 # ----------------------------------------------------------------- process ---
 def process(dt):
 
@@ -133,16 +141,18 @@ def process(dt):
         # Make window active
         window.activate()
 
-        # Clear window using window clear flags
-        gl.glClear(window._clearflags)
-
-        # Dispatch the main draw event
-        window.dispatch_event('on_draw', dt)
+        # Dispatch the main draw event (if window content has changed)
+        damaged = window.damaged
+        if damaged:
+            # Clear window using window clear flags
+            gl.glClear(window._clearflags)
+            window.dispatch_event('on_draw', dt)
 
         # Dispatch the idle event
         window.dispatch_event('on_idle', dt)
 
         # Swap buffers
-        window.swap()
+        if damaged:
+            profiler.timed("swap", window.swap)
 
     return len(__windows__)
@@ -104,6 +104,10 @@ prevents further propogation.
 To remove all handlers on the top stack level, use
 `EventDispatcher.pop_handlers`.
 
+Handlers attached using `EventDispatcher.push_post_handlers` are not part of
+the stack: they are called after all other handlers, whether the event has
+been handled or not (e.g. to draw an overlay on top of the window content).
+
 Note that any handlers pushed onto the stack have precedence over the
 handlers set directly on the instance (for example, using the methods
 described in the previous section), regardless of when they were set.
@@ -140,6 +144,7 @@ __docformat__ = 'restructuredtext'
 __version__ = '$Id: event.py 2319 2008-10-12 02:50:08Z Alex.Holkner $'
 
 import inspect
+from glumpy import profiler
 
 EVENT_HANDLED = True
 EVENT_UNHANDLED = None
@@ -157,6 +162,13 @@ class EventDispatcher(object):
     # Placeholder empty stack; real stack is created only if needed
     _event_stack = ()
 
+    # Handlers of each event type, in dispatch order (built on demand from the
+    # event stack and cleared when the stack is modified)
+    _event_table = None
+
+    # Handlers called after the stack ones (real dict is created only if needed)
+    _event_post = ()
+
     @classmethod
     def register_event_type(cls, name):
         '''Register an event type with the dispatcher.
@@ -201,6 +213,7 @@ class EventDispatcher(object):
 
         # Place dict full of new handlers at beginning of stack
         self._event_stack.insert(0, {})
+        self._event_table = None
         self.set_handlers(*args, **kwargs)
 
     def _get_handlers(self, args, kwargs):
@@ -254,6 +267,7 @@ class EventDispatcher(object):
             self._event_stack = [{}]
 
         self._event_stack[0][name] = handler
+        self._event_table = None
 
     def pop_handlers(self):
         '''
@@ -262,6 +276,7 @@ class EventDispatcher(object):
         assert self._event_stack and 'No handlers pushed'
 
         del self._event_stack[0]
+        self._event_table = None
 
     def remove_handlers(self, *args, **kwargs):
         '''Remove event handlers from the event stack.
@@ -291,6 +306,7 @@ class EventDispatcher(object):
         # No frame matched; no error.
         if not frame:
             return
+        self._event_table = None
 
         # Remove each handler from the frame.
         for name, handler in handlers:
@@ -324,10 +340,63 @@ class EventDispatcher(object):
             try:
                 if frame[name] is handler:
                     del frame[name]
+                    self._event_table = None
                     break
             except KeyError:
                 pass
 
+    def push_post_handlers(self, *args, **kwargs):
+        '''Attach event handlers that are called after all the other handlers
+        of an event type, whether one of them returned True or not.
+
+        See `push_handlers` for the accepted argument types.
+        '''
+        # Create post handlers if necessary
+        if type(self._event_post) is tuple:
+            self._event_post = {}
+
+        for name, handler in self._get_handlers(args, kwargs):
+            self._event_post.setdefault(name, []).append(handler)
+
+    def remove_post_handlers(self, *args, **kwargs):
+        '''Remove event handlers attached using `push_post_handlers`.
+
+        No error is raised if any handler is not attached.
+        '''
+        for name, handler in self._get_handlers(args, kwargs):
+            handlers = self._event_post and self._event_post.get(name)
+            if handlers and handler in handlers:
+                handlers.remove(handler)
+
+    def __getstate__(self):
+        # The dispatch table may hold bound methods that cannot be copied
+        state = self.__dict__.copy()
+        state.pop('_event_table', None)
+        return state
+
+    def _get_event_handlers(self, event_type):
+        '''Get handlers of the given event type in dispatch order, i.e. from
+        the top of the stack followed by the instance handler (if any).
+
+        Stack handlers are cached per event type until the stack is modified.
+        The instance handler is not since it can be set at any time (e.g.
+        ``dispatcher.on_resize = on_resize``).
+        '''
+        table = self._event_table
+        if table is None:
+            table = self._event_table = {}
+        try:
+            handlers = table[event_type]
+        except KeyError:
+            assert event_type in self.event_types
+            handlers = table[event_type] = tuple(
+                frame[event_type] for frame in self._event_stack
+                if frame.get(event_type, None))
+        handler = getattr(self, event_type, None)
+        if handler is not None:
+            return handlers + (handler,)
+        return handlers
+
     def dispatch_event(self, event_type, *args):
         '''Dispatch a single event to the attached handlers.
 
@@ -348,36 +417,41 @@ class EventDispatcher(object):
             True if an event handler returned True; False if one or more event
             handlers were invoked but returned only Fasle.
         '''
-        assert event_type in self.event_types
-
-        invoked = False
-
-        # Search handler stack for matching event handlers
-        for frame in list(self._event_stack):
-            handler = frame.get(event_type, None)
-            if handler:
-                try:
-                    invoked = True
-                    if handler(*args):
-                        return EVENT_HANDLED
-                except TypeError:
-                    self._raise_dispatch_exception(event_type, args, handler)
-
-
-        # Check instance for an event handler
-        if hasattr(self, event_type):
-            try:
-                invoked = True
-                if getattr(self, event_type)(*args):
-                    return EVENT_HANDLED
-            except TypeError:
-                self._raise_dispatch_exception(
-                    event_type, args, getattr(self, event_type))
-
-        if invoked:
-            return EVENT_UNHANDLED
-
-        return False
+        # Profiling: on_draw handlers are timed individually
+        timer = profiler.active()
+        if timer is not None and event_type != 'on_draw':
+            return timer.call('events', self._dispatch_event, event_type, args, None)
+        return self._dispatch_event(event_type, args, timer)
+
+    def _dispatch_event(self, event_type, args, timer=None):
+        handlers = self._get_event_handlers(event_type)
+        result = EVENT_UNHANDLED if handlers else False
+        for handler in handlers:
+            if self._invoke_handler(event_type, handler, args, timer):
+                result = EVENT_HANDLED
+                break
+
+        # Post handlers are called whether the event has been handled or not
+        if self._event_post:
+            for handler in self._event_post.get(event_type, ()):
+                self._invoke_handler(event_type, handler, args, timer)
+
+        return result
+
+    def _invoke_handler(self, event_type, handler, args, timer):
+        try:
+            if timer is None:
+                return handler(*args)
+            return self._call_handler(handler, args, timer)
+        except TypeError:
+            self._raise_dispatch_exception(event_type, args, handler)
+
+    def _call_handler(self, handler, args, timer):
+        name = getattr(handler, '__name__', type(handler).__name__)
+        owner = getattr(handler, '__self__', None)
+        if owner is not None:
+            name = '%s.%s' % (type(owner).__name__, name)
+        return timer.call('draw:%s' % name, handler, *args)
 
     def _raise_dispatch_exception(self, event_type, args, handler):
         # A common problem in applications is having the wrong number of
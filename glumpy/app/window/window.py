@@ -7,6 +7,7 @@ import sys
 from glumpy import gl
 from glumpy.log import log
 from glumpy.app import configuration
+from glumpy.gloo import globject
 from . import key
 from . import mouse
 from . import event
@@ -65,10 +66,13 @@ class Window(event.EventDispatcher):
           'The mouse was moved with some buttons pressed.'
           pass
 
-      def on_mouse_scroll(self, dx, dy):
+      def on_mouse_scroll(x, y, dx, dy):
           'The mouse wheel was scrolled by (dx,dy).'
           pass
 
+    Mouse events can be coalesced such that handlers are called at most once
+    per frame (see `coalesce`).
+
 
     Window::
 
@@ -150,6 +154,11 @@ class Window(event.EventDispatcher):
         self._timer_stack = []
         self._timer_date = []
         self._backend = None
+        self._on_demand = False
+        self._damaged = True
+        self._generation = None
+        self._coalesce = {}
+        self._pending_events = []
         self.color = color
 
         self._clearflags = gl.GL_COLOR_BUFFER_BIT
@@ -175,6 +184,114 @@ class Window(event.EventDispatcher):
     def config(self):
         return self._config
 
+    @property
+    def on_demand(self):
+        """ Whether window is only redrawn when its content has changed.
+
+        In on-demand mode, the window is redrawn only after an event has been
+        dispatched (input, resize, etc.), some data or uniform has been
+        modified, or the window has been invalidated. """
+        return self._on_demand
+
+    @on_demand.setter
+    def on_demand(self, value):
+        self._on_demand = value
+        self._damaged = True
+
+    @property
+    def damaged(self):
+        """ Whether window needs to be redrawn """
+
+        if not self._on_demand:
+            return True
+        return self._damaged or self._generation != globject.generation()
+
+    def invalidate(self):
+        """ Request the window to be redrawn (on-demand mode) """
+        self._damaged = True
+
+    @property
+    def coalesce(self):
+        """ Per event type coalescing policy.
+
+        Coalesced events are queued and dispatched just before the next draw,
+        consecutive events of the same type being merged according to their
+        policy:
+
+        * 'merge': last position is kept and offsets (dx,dy) are summed
+          (only for on_mouse_motion, on_mouse_drag and on_mouse_scroll)
+        * 'last': only the last event is kept
+
+        The order of events relative to other (non coalesced) events is
+        preserved. Setting coalesce to True merges mouse motion, drag and
+        scroll events while setting it to False (or None) disables coalescing.
+        """
+        return self._coalesce
+
+    @coalesce.setter
+    def coalesce(self, policy):
+        if policy is True:
+            policy = { 'on_mouse_motion': 'merge',
+                       'on_mouse_drag':   'merge',
+                       'on_mouse_scroll': 'merge' }
+        policy = dict(policy or {})
+        for event_type, value in policy.items():
+            if value not in ('merge', 'last', None):
+                raise ValueError("Unknown coalescing policy ('%s')" % value)
+            if value == 'merge' and event_type not in ('on_mouse_motion',
+                                                       'on_mouse_drag',
+                                                       'on_mouse_scroll'):
+                raise ValueError("Event %s cannot be merged" % event_type)
+        self._flush_events()
+        self._coalesce = policy
+
+    def _queue_event(self, event_type, args, policy):
+        """ Queue an event, merging it with the previous one if possible """
+
+        if self._pending_events:
+            last_type, last_args = self._pending_events[-1]
+            if last_type == event_type:
+                if policy == 'last':
+                    self._pending_events[-1] = event_type, args
+                    return
+                # Events are (x, y, dx, dy, *extra) and extra (buttons) must match
+                if last_args[4:] == args[4:]:
+                    x, y, dx, dy = args[:4]
+                    args = (x, y, last_args[2]+dx, last_args[3]+dy) + args[4:]
+                    self._pending_events[-1] = event_type, args
+                    return
+        self._pending_events.append((event_type, args))
+
+    def _flush_events(self):
+        """ Dispatch queued (coalesced) events """
+
+        while self._pending_events:
+            pending, self._pending_events = self._pending_events, []
+            for event_type, args in pending:
+                event.EventDispatcher.dispatch_event(self, event_type, *args)
+
+    def dispatch_event(self, event_type, *args):
+        """ Dispatch an event, keeping track of window damages and
+        coalescing events if requested """
+
+        if event_type == 'on_draw':
+            self._flush_events()
+            # Data changes made while drawing do not require another draw
+            # but explicit invalidations (e.g. pending readbacks) do
+            self._damaged = False
+            result = event.EventDispatcher.dispatch_event(self, event_type, *args)
+            self._generation = globject.generation()
+            return result
+        elif event_type != 'on_idle':
+            self._damaged = True
+            if self._coalesce:
+                policy = self._coalesce.get(event_type)
+                if policy is not None:
+                    self._queue_event(event_type, args, policy)
+                    return event.EVENT_UNHANDLED
+                self._flush_events()
+        return event.EventDispatcher.dispatch_event(self, event_type, *args)
+
     def clear(self):
         """ Clear the whole window """
 
@@ -194,17 +311,21 @@ class Window(event.EventDispatcher):
             return True
         elif k == key.F10:
             import os, sys
-            import numpy as np
             from glumpy.ext import png
-            framebuffer = np.zeros((self.height, self.width * 3), dtype=np.uint8)
-            gl.glReadPixels(0, 0, self.width, self.height,
-                            gl.GL_RGB, gl.GL_UNSIGNED_BYTE, framebuffer)
+            from glumpy.gloo.readback import Readback
 
             basename = os.path.basename(os.path.realpath(sys.argv[0]))
             dirname = os.path.dirname(os.path.realpath(sys.argv[0]))
             basename = '.'.join(basename.split('.')[:-1])
             filename = os.path.join(dirname,"%s.png" % basename)
-            png.from_array(framebuffer[::-1], 'RGB').save(filename)
+
+            def save(framebuffer):
+                framebuffer = framebuffer.reshape(self.height, self.width*3)
+                png.from_array(framebuffer, 'RGB').save(filename)
+            readback = Readback(self.width, self.height, count=1, callback=save)
+            readback.read()
+            readback.flush()
+            readback.delete()
 #            index = 0
 #            filename = "%s-%04d.png" % (basename,index)
 #            while os.path.exists(os.path.join(dirname, filename)):
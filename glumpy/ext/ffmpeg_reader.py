@@ -31,6 +31,7 @@ using ffmpeg. It is quite ugly, as there are many pitfalls to avoid
 from __future__ import division
 
 import subprocess as sp
+import threading
 import re
 
 import numpy as np
@@ -39,9 +40,33 @@ from . ffmpeg_tools import cvsecs
 
 
 class FFMPEG_VideoReader:
+    """ A class for FFMPEG-based video reading.
+
+    Parameters
+    -----------
+
+    filename
+      Name of the video file.
+
+    prefetch
+      Number of decoded frames kept in a ring of preallocated buffers
+      filled by a background decode thread (0 means synchronous reads).
+      Frames returned in this mode are views on the ring and remain valid
+      until the next call to ``get_frame``. Recently decoded frames are
+      served from the ring without seeking.
+
+    loop
+      Boolean. Set to ``True`` to have ffmpeg loop over the file such that
+      looping playback (``get_frame(t % duration)``) never restarts it.
+
+    seek_index
+      Boolean. Set to ``True`` to build an index of keyframe times. Forward
+      jumps then reuse the running process unless a keyframe lies between
+      the current position and the target.
+    """
 
     def __init__(self, filename, print_infos=False, bufsize = None,
-                 pix_fmt="rgb24"):
+                 pix_fmt="rgb24", prefetch=0, loop=False, seek_index=False):
 
         self.filename = filename
         infos = ffmpeg_parse_infos(filename, print_infos)
@@ -64,6 +89,20 @@ class FFMPEG_VideoReader:
             bufsize = self.depth * w * h + 100
 
         self.bufsize= bufsize
+        self.loop = loop
+        # Number of frames in one loop (video_nframes overestimates it)
+        self.loop_nframes = max(1, int(round(self.duration*self.fps)))
+        self.keyframes = None
+        if seek_index:
+            self.keyframes = ffmpeg_keyframes(filename)
+
+        self.ring = None
+        if prefetch:
+            w, h = self.size
+            self.ring = np.empty((max(4, prefetch), h, w, self.depth), dtype=np.uint8)
+            self.condition = threading.Condition()
+            self.thread = None
+
         self.initialize()
 
 
@@ -83,6 +122,8 @@ class FFMPEG_VideoReader:
                     '-ss', "%.03f" % offset]
         else:
             i_arg = [ '-i', self.filename]
+        if self.loop:
+            i_arg = ['-stream_loop', '-1'] + i_arg
 
 
         cmd = ([FFMPEG_BINARY]+ i_arg +
@@ -96,12 +137,79 @@ class FFMPEG_VideoReader:
                                    stdout=sp.PIPE,
                                    stderr=sp.PIPE)
 
-
-
+        if self.ring is not None:
+            # Frames are numbered from 1 (as self.pos)
+            self.first = int(self.fps*starttime)+1
+            self.decoded = self.first-1
+            self.anchor = self.first
+            self.eof = False
+            self.closing = False
+            self.thread = threading.Thread(target=self._decode, args=(self.proc,))
+            self.thread.daemon = True
+            self.thread.start()
+
+
+    def _decode(self, proc):
+        """ Decode frames into the ring (background thread) """
+
+        size = len(self.ring)
+        ahead = size - size//4
+        while True:
+            with self.condition:
+                while self.decoded+1 >= self.anchor+ahead and not self.closing:
+                    self.condition.wait()
+                if self.closing:
+                    return
+                index = self.decoded+1
+            eof = not self._readinto(proc.stdout, self.ring[index % size])
+            with self.condition:
+                if eof:
+                    self.eof = True
+                else:
+                    self.decoded = index
+                self.condition.notify_all()
+            if eof:
+                return
+
+
+    def _readinto(self, stream, frame):
+        """ Read one frame into a preallocated buffer """
+
+        view = memoryview(frame.reshape(-1))
+        nbytes, count = len(view), 0
+        while count < nbytes:
+            n = stream.readinto(view[count:])
+            if not n:
+                return False
+            count += n
+        return True
+
+
+    def _need_seek(self, pos, current):
+        """ Whether reaching frame pos from frame current needs a new process """
+
+        if pos < current:
+            return True
+        if self.keyframes is None:
+            return pos > current+100
+        # Decoding up to one second forward is cheaper than restarting ffmpeg
+        if pos <= current+max(self.fps, 1):
+            return False
+        start, stop = (current-1)/self.fps, (pos-1)/self.fps
+        if self.loop:
+            start, stop = start % self.duration, stop % self.duration
+            if stop < start:
+                return True
+        i = np.searchsorted(self.keyframes, start, side='right')
+        return i < len(self.keyframes) and self.keyframes[i] <= stop
 
 
     def skip_frames(self, n=1):
         """Reads and throws away n frames """
+        if self.ring is not None:
+            self.pos += n
+            self.lastread = self._fetch(self.pos)
+            return
         w, h = self.size
         for i in range(n):
             self.proc.stdout.read(self.depth*w*h)
@@ -109,7 +217,34 @@ class FFMPEG_VideoReader:
         self.pos += n
 
 
+    def _fetch(self, pos):
+        """ Wait for frame pos to be decoded and return it """
+
+        with self.condition:
+            self.anchor = pos
+            self.condition.notify_all()
+            while self.decoded < pos and not self.eof:
+                self.condition.wait()
+            if self.decoded >= pos:
+                return self.ring[pos % len(self.ring)]
+
+        print( "Warning: in file %s, "%(self.filename)+
+               "failed to read frame %d/%d, at time %.02f/%.02f sec. "%(
+                pos,self.nframes,
+                1.0*pos/self.fps,
+                self.duration)+
+               "Using the last valid frame instead.")
+        if not hasattr(self, 'lastread'):
+            raise IOError(("MoviePy error: failed to read the first frame of "
+                           "video file %s.")%(self.filename))
+        return self.lastread
+
+
     def read_frame(self):
+        if self.ring is not None:
+            return self._fetch(self.anchor if not hasattr(self, 'lastread')
+                               else self.anchor+1)
+
         w, h = self.size
         nbytes= self.depth*w*h
 
@@ -156,20 +291,64 @@ class FFMPEG_VideoReader:
 
         pos = int(self.fps*t)+1
 
+        if self.ring is not None:
+            return self._get_prefetched(pos, t)
+
         if pos == self.pos:
             return self.lastread
         else:
-            if(pos < self.pos) or (pos > self.pos+100):
+            if self.loop:
+                # The stream never rewinds, go to the same frame in next loop
+                n = self.loop_nframes
+                pos += n*((self.pos-1)//n)
+                if pos < self.pos:
+                    pos += n
+            if self._need_seek(pos, self.pos):
                 self.initialize(t)
+                pos = int(self.fps*t)+1
             else:
                 self.skip_frames(pos-self.pos-1)
             result = self.read_frame()
             self.pos = pos
             return result
 
+
+    def _get_prefetched(self, pos, t):
+        """ Get frame pos from the ring, seeking only if necessary """
+
+        size = len(self.ring)
+        with self.condition:
+            oldest = max(self.first, self.decoded-size+2)
+            current = self.decoded
+            if self.loop:
+                # The stream never rewinds, find the same frame in the ring
+                # or in next loop
+                n = self.loop_nframes
+                pos += n*((oldest-1)//n)
+                if pos < oldest:
+                    pos += n
+            if pos == self.pos:
+                return self.lastread
+            if pos >= oldest:
+                # Pin frame such that the decode thread does not overwrite it
+                self.anchor = pos
+        if pos < oldest or (pos > current and self._need_seek(pos, current)):
+            self.initialize(t)
+            pos = self.first
+        self.lastread = self._fetch(pos)
+        self.pos = pos
+        return self.lastread
+
+
     def close(self):
         if hasattr(self,'proc'):
             self.proc.terminate()
+            if self.ring is not None and self.thread is not None:
+                with self.condition:
+                    self.closing = True
+                    self.condition.notify_all()
+                self.thread.join()
+                self.thread = None
             self.proc.stdout.close()
             self.proc.stderr.close()
             del self.proc
@@ -181,6 +360,17 @@ class FFMPEG_VideoReader:
 
 
 
+def ffmpeg_keyframes(filename):
+    """ Get the (sorted) times of the keyframes of a video file """
+
+    cmd = [FFMPEG_BINARY, "-skip_frame", "nokey", "-i", filename,
+           "-vf", "showinfo", "-an", "-f", "null", "-"]
+    proc = sp.Popen(cmd, bufsize=10**5, stdout=sp.PIPE, stderr=sp.PIPE)
+    infos = proc.communicate()[1].decode('utf8', 'ignore')
+    times = [float(t) for t in re.findall(r"pts_time:\s*([0-9.]+)", infos)]
+    return np.unique(times)
+
+
 def ffmpeg_read_image(filename, with_mask=True):
     """ Read an image file (PNG, BMP, JPEG...).
 
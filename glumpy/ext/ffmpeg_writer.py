@@ -28,6 +28,8 @@ On the long term this will implement several methods to make videos
 out of VideoClips
 """
 
+import threading
+import collections
 import numpy as np
 import subprocess as sp
 
@@ -91,20 +93,40 @@ class FFMPEG_VideoWriter:
       Boolean. Set to ``True`` if there is a mask in the video to be
       encoded.
 
+    threaded
+      Boolean. Set to ``True`` to copy frames into a bounded ring of
+      preallocated buffers that a background thread feeds to ffmpeg, such
+      that ``write_frame`` does not block on the encoder.
+
+    queue_size
+      Number of frame buffers in the ring (threaded mode only).
+
+    policy
+      What to do when the ring is full (threaded mode only): 'block'
+      (default) waits for a free buffer, 'drop-oldest' discards the oldest
+      queued frame (or the frame being written when all buffers are held by
+      the encoder) and 'drop-newest' discards the frame being written.
+      Discarded frames are counted in ``dropped``.
+
     """
 
 
 
     def __init__(self, filename, size, fps, codec="libx264", audiofile=None,
                  preset="medium", bitrate=None, withmask=False,
-                 logfile=None):
+                 logfile=None, threaded=False, queue_size=8, policy="block"):
 
         if logfile is None:
           logfile = sp.PIPE
 
+        if policy not in ("block", "drop-oldest", "drop-newest"):
+            raise ValueError("Unknown queue policy '%s'" % policy)
+
         self.filename = filename
         self.codec = codec
         self.ext = self.filename.split(".")[-1]
+        self.encoded = 0
+        self.dropped = 0
 
         cmd = (
             [ FFMPEG_BINARY, '-y']
@@ -134,11 +156,97 @@ class FFMPEG_VideoWriter:
                                   stderr=logfile,
                                   stdout=DEVNULL)
 
+        self.thread = None
+        if threaded:
+            depth = 4 if withmask else 3
+            self.policy = policy
+            self.buffers = np.empty((max(1,queue_size), size[1], size[0], depth),
+                                    dtype=np.uint8)
+            self.free = list(range(len(self.buffers)))
+            self.queue = collections.deque()
+            self.error = None
+            self.closing = False
+            self.condition = threading.Condition()
+            self.thread = threading.Thread(target=self._run)
+            self.thread.daemon = True
+            self.thread.start()
+
+
+    @property
+    def stats(self):
+        """ Number of encoded, dropped and queued frames """
+        queued = len(self.queue) if self.thread is not None else 0
+        return { "encoded" : self.encoded,
+                 "dropped" : self.dropped,
+                 "queued"  : queued }
+
 
     def write_frame(self,img_array):
         """ Writes one frame in the file."""
+
+        if self.thread is None:
+            self._write(np.ascontiguousarray(img_array))
+            return
+
+        with self.condition:
+            if self.error is not None:
+                raise self.error
+            if not self.free:
+                if self.policy == "drop-newest":
+                    self.dropped += 1
+                    return
+                elif self.policy == "drop-oldest":
+                    # The only buffer may be held by the encoder, leaving no
+                    # queued frame to drop but the new one
+                    if not self.queue:
+                        self.dropped += 1
+                        return
+                    self.free.append(self.queue.popleft())
+                    self.dropped += 1
+                else:
+                    while not self.free and self.error is None:
+                        self.condition.wait()
+                    if self.error is not None:
+                        raise self.error
+            index = self.free.pop()
+
+        # Copy outside of the lock, the buffer is not visible to the thread yet
+        self.buffers[index][...] = img_array
+
+        with self.condition:
+            self.queue.append(index)
+            self.condition.notify_all()
+
+
+    def _run(self):
+        """ Feed queued frames to ffmpeg (background thread) """
+
+        while True:
+            with self.condition:
+                while not self.queue and not self.closing:
+                    self.condition.wait()
+                if not self.queue:
+                    return
+                index = self.queue.popleft()
+            try:
+                self._write(self.buffers[index])
+            except IOError as err:
+                with self.condition:
+                    self.error = err
+                    self.queue.clear()
+                    self.free = list(range(len(self.buffers)))
+                    self.condition.notify_all()
+                return
+            with self.condition:
+                self.free.append(index)
+                self.condition.notify_all()
+
+
+    def _write(self, img_array):
+        """ Writes one contiguous frame using the buffer protocol."""
         try:
-            self.proc.stdin.write(img_array.tostring())
+            self.proc.stdin.write(img_array)
+            self.encoded += 1
         except IOError as err:
             ffmpeg_error = self.proc.stderr.read()
             error = (str(err)+ ("\n\nMoviePy error: FFMPEG encountered "
@@ -173,12 +281,23 @@ class FFMPEG_VideoWriter:
             raise IOError(error)
 
     def close(self):
-        self.proc.stdin.close()
-        if self.proc.stderr is not None:
-            self.proc.stderr.close()
-        self.proc.wait()
-
-        del self.proc
+        try:
+            if self.thread is not None:
+                with self.condition:
+                    self.closing = True
+                    self.condition.notify_all()
+                self.thread.join()
+                self.thread = None
+                if self.error is not None:
+                    raise self.error
+        finally:
+            # ffmpeg is waited for even when the writer thread failed
+            self.proc.stdin.close()
+            if self.proc.stderr is not None:
+                self.proc.stderr.close()
+            self.proc.wait()
+
+            del self.proc
 
 def ffmpeg_write_video(clip, filename, fps, codec="libx264", bitrate=None,
                        preset = "medium", withmask=False, write_logfile=False,
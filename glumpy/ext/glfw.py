@@ -423,6 +423,10 @@ glfwGetWindowUserPointer       = _glfw.glfwGetWindowUserPointer
 # glfwSetFramebufferSizeCallback = _glfw.glfwSetFramebufferSizeCallback
 glfwPollEvents                 = _glfw.glfwPollEvents
 glfwWaitEvents                 = _glfw.glfwWaitEvents
+if hasattr(_glfw, "glfwWaitEventsTimeout"):
+    # GLFW >= 3.2
+    glfwWaitEventsTimeout      = _glfw.glfwWaitEventsTimeout
+    glfwWaitEventsTimeout.argtypes = [c_double]
 
 # --- Input -------------------------------------------------------------------
 glfwGetInputMode               = _glfw.glfwGetInputMode
@@ -3,12 +3,13 @@
 # Copyright (c) 2014, Nicolas P. Rougier. All rights reserved.
 # Distributed under the terms of the new BSD License.
 # -----------------------------------------------------------------------------
-from . atlas import Atlas
+from . atlas import Atlas, PagedAtlas
 from . snippet import Snippet
 from . program import Program
 from . uniforms import Uniforms
-from . texture import Texture1D, Texture2D
+from . texture import Texture1D, Texture2D, ScrollingTexture2D
 from . texture import TextureFloat1D, TextureFloat2D
-from . buffer import VertexBuffer, IndexBuffer
+from . buffer import VertexBuffer, IndexBuffer, RingBuffer
 from . shader import VertexShader, FragmentShader, GeometryShader
 from . framebuffer import FrameBuffer, ColorBuffer, DepthBuffer, StencilBuffer
+from . readback import Readback
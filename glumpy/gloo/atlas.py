@@ -16,7 +16,8 @@ Jylänki at: http://clb.demon.fi/files/RectangleBinPack/
 Example usage:
 --------------
 """
-import sys
+import numpy as np
+from collections import OrderedDict
 from glumpy.log import log
 from . texture import Texture2D
 
@@ -52,7 +53,14 @@ class Atlas(Texture2D):
 
     def __init__(self):
         Texture2D.__init__(self)
-        self.nodes  = [(0,0,self.width),]
+        self.reset()
+
+
+    def reset(self):
+        """ Forget about all allocated regions (data is left untouched). """
+
+        # Skyline nodes as (x, y, width) rows, sorted by x
+        self.nodes  = np.array([(0,0,self.width),], dtype=np.int64)
         self.used   = 0
 
 
@@ -71,100 +79,262 @@ class Atlas(Texture2D):
             Texture2D or None
         """
 
-        height, width = shape
-        best_height = sys.maxint
-        best_index = -1
-        best_width = sys.maxint
-        region = 0, 0, width, height
-
-        for i in range(len(self.nodes)):
-            y = self._fit(i, width, height)
-            if y >= 0:
-                node = self.nodes[i]
-                if (y+height < best_height or
-                    (y+height == best_height and node[2] < best_width)):
-                    best_height = y+height
-                    best_index = i
-                    best_width = node[2]
-                    region = node[0], y, width, height
-
-        if best_index == -1:
+        region = self._pack(shape)
+        if region is None:
             log.warn("No enough free space in atlas")
-            return None
+        return region
 
-        node = region[0], region[1]+height, width
-        self.nodes.insert(best_index, node)
-
-        i = best_index+1
-        while i < len(self.nodes):
-            node = self.nodes[i]
-            prev_node = self.nodes[i-1]
-            if node[0] < prev_node[0]+prev_node[2]:
-                shrink = prev_node[0]+prev_node[2] - node[0]
-                x,y,w = self.nodes[i]
-                self.nodes[i] = x+shrink, y, w-shrink
-                if self.nodes[i][2] <= 0:
-                    del self.nodes[i]
-                    i -= 1
-                else:
-                    break
-            else:
-                break
-            i += 1
 
-        self._merge()
+    def _pack(self, shape):
+        """
+        Find the best bottom-left position for a region of given shape and
+        update the skyline accordingly. All candidate nodes are tested at
+        once using the node arrays.
+
+        Parameters
+        ----------
+
+        shape : (int,int)
+            Shape of region  as (heigth, width)
+
+        Return
+        ------
+            (x,y,width,height) or None
+        """
+
+        height, width = int(shape[0]), int(shape[1])
+        nodes = self.nodes
+        X, Y, W = nodes[:,0], nodes[:,1], nodes[:,2]
+        n = len(nodes)
+
+        # Last node spanned by a region starting at each node
+        last = np.searchsorted(X, X+max(width,1), side='left') - 1
+
+        # Highest node over each [i, last] span
+        bounds = np.empty(2*n, dtype=np.intp)
+        bounds[0::2] = np.arange(n)
+        bounds[1::2] = last+1
+        top = np.maximum.reduceat(np.append(Y,0), bounds)[0::2]
+
+        valid = np.flatnonzero((X+width <= self.width) & (top+height <= self.height))
+        if not len(valid):
+            return None
+
+        # Lowest top first, then narrowest node
+        best = valid[np.lexsort((W[valid], top[valid]+height))[0]]
+        x, y, k = int(X[best]), int(top[best]), last[best]
+
+        # Insert new node, shrink the last spanned one and drop covered ones
+        parts = [nodes[:best], [(x, y+height, width)]]
+        stop = X[k]+W[k]
+        if stop > x+width:
+            parts.append([(x+width, Y[k], stop-x-width)])
+        parts.append(nodes[k+1:])
+        nodes = np.concatenate(parts).astype(np.int64)
+
+        # Merge consecutive nodes at same height
+        start = np.flatnonzero(np.r_[True, nodes[1:,1] != nodes[:-1,1]])
+        if len(start) < len(nodes):
+            widths = np.add.reduceat(nodes[:,2], start)
+            nodes = nodes[start]
+            nodes[:,2] = widths
+        self.nodes = nodes
         self.used += width*height
-        x,y,width,height = region
-        return region
-        # return self[y:y+height, x:x+width]
-        # return self[x:x+width, y:y+height]
+        return x, y, width, height
+
+
+
+class PagedAtlas(object):
+    """ Multi-page atlas with least-recently-used eviction
+
+    Regions are allocated by key (e.g. a glyph charcode) into a list of
+    atlas pages. A new page is created whenever the existing ones are full.
+    When the maximum number of pages has been reached, entries that are not
+    referenced anymore (see `acquire` and `release`) are evicted, starting
+    from the least recently used one, and the surviving entries of the page
+    are repacked. Relocated entries are reported to handlers such that
+    texture coordinates can be fixed.
+
+    Parameters
+    ----------
+
+    shape : tuple of integers
+        Shape of a single page
+
+    dtype : dtype
+        Page data type
+
+    max_pages : int or None
+        Maximum number of pages (None means no limit)
+    """
+
+    def __init__(self, shape=(1024,1024), dtype=np.float32, max_pages=4):
+        self._shape = shape
+        self._dtype = dtype
+        self._max_pages = max_pages
+        self._pages = []
+        # key -> [page index, (x,y,width,height), reference count]
+        # (ordered from least to most recently used)
+        self._entries = OrderedDict()
+        self._handlers = []
+
+
+    @property
+    def pages(self):
+        """ List of atlas pages """
+        return self._pages
+
+
+    def __len__(self):
+        return len(self._entries)
+
+
+    def __contains__(self, key):
+        return key in self._entries
 
 
+    def add_handler(self, handler):
+        """
+        Add a relocation handler, called as handler(key, page, region) each
+        time an entry is moved to a new region.
+        """
+        self._handlers.append(handler)
+
+
+    def remove_handler(self, handler):
+        """ Remove a relocation handler """
+        self._handlers.remove(handler)
+
 
-    def _fit(self, index, width, height):
+    def get(self, key):
+        """
+        Get (page, region) of an entry and mark it as recently used.
+
+        Return
+        ------
+            (int, (x,y,width,height)) or None
         """
-        Test if region (width,height) fit into self.nodes[index]
+
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return None
+        self._entries[key] = entry
+        return entry[0], entry[1]
+
+
+    def texcoords(self, key):
+        """ Get (page, (u0,v0,u1,v1)) normalized texture coordinates of an entry """
+
+        page, (x,y,w,h) = self.get(key)
+        height, width = float(self._shape[0]), float(self._shape[1])
+        return page, (x/width, y/height, (x+w)/width, (y+h)/height)
+
+
+    def allocate(self, key, shape):
+        """
+        Allocate a region of given shape for key (or return the region
+        already allocated to this key).
 
         Parameters
         ----------
 
-        index : int
-            Index of the internal node to be tested
+        key : hashable
+            Entry identifier
 
-        width : int
-            Width or the region to be tested
+        shape : (int,int)
+            Shape of region  as (heigth, width)
 
-        height : int
-            Height or the region to be tested
+        Return
+        ------
+            (int, (x,y,width,height)) or None
         """
 
-        node = self.nodes[index]
-        x,y = node[0], node[1]
-        width_left = width
-
-        if x+width > self.width:
-            return -1
-
-        i = index
-        while width_left > 0:
-            node = self.nodes[i]
-            y = max(y, node[1])
-            if y+height > self.height:
-                return -1
-            width_left -= node[2]
-            i += 1
-        return y
-
-
-    def _merge(self):
-        """ Merge nodes. """
-
-        i = 0
-        while i < len(self.nodes)-1:
-            node = self.nodes[i]
-            next_node = self.nodes[i+1]
-            if node[1] == next_node[1]:
-                self.nodes[i] = node[0], node[1], node[2]+next_node[2]
-                del self.nodes[i+1]
-            else:
-                i += 1
+        if key in self._entries:
+            return self.get(key)
+
+        for index, page in enumerate(self._pages):
+            region = page._pack(shape)
+            if region is not None:
+                break
+        else:
+            index, region = self._grow(shape)
+
+        if region is None:
+            log.warn("No enough free space in atlas")
+            return None
+        self._entries[key] = [index, region, 0]
+        return index, region
+
+
+    def acquire(self, key):
+        """ Add a reference to an entry, preventing its eviction """
+        self._entries[key][2] += 1
+
+
+    def release(self, key):
+        """ Remove a reference to an entry """
+        entry = self._entries.get(key)
+        if entry is not None and entry[2] > 0:
+            entry[2] -= 1
+
+
+    def remove(self, key):
+        """ Remove an entry (its space is reclaimed when its page is repacked) """
+        del self._entries[key]
+
+
+    def _grow(self, shape):
+        """ Create a new page if possible, else evict entries from existing ones """
+
+        if self._max_pages is None or len(self._pages) < self._max_pages:
+            page = np.zeros(self._shape, self._dtype).view(Atlas)
+            self._pages.append(page)
+            return len(self._pages)-1, page._pack(shape)
+
+        # Pages ordered by their least recently used unreferenced entry
+        candidates = []
+        for entry in self._entries.values():
+            if entry[2] == 0 and entry[0] not in candidates:
+                candidates.append(entry[0])
+        for index in candidates:
+            if self._repack(index):
+                region = self._pages[index]._pack(shape)
+                if region is not None:
+                    return index, region
+        return None, None
+
+
+    def _repack(self, index):
+        """ Evict unreferenced entries of a page and repack the others """
+
+        page = self._pages[index]
+        keys = [key for key, entry in self._entries.items()
+                    if entry[0] == index and entry[2] > 0]
+        keys.sort(key=lambda key: -self._entries[key][1][3])
+
+        nodes, used = page.nodes, page.used
+        page.reset()
+        regions = []
+        for key in keys:
+            region = page._pack(self._entries[key][1][3:1:-1])
+            if region is None:
+                page.nodes, page.used = nodes, used
+                return False
+            regions.append(region)
+
+        for key in [key for key, entry in self._entries.items()
+                        if entry[0] == index and entry[2] == 0]:
+            del self._entries[key]
+
+        data = np.array(page)
+        page[...] = 0
+        for key, region in zip(keys, regions):
+            entry = self._entries[key]
+            x0,y0,w,h = entry[1]
+            x1,y1,_,_ = region
+            page[y1:y1+h,x1:x1+w] = data[y0:y0+h,x0:x0+w]
+            if region != entry[1]:
+                entry[1] = region
+                for handler in self._handlers:
+                    handler(key, index, region)
+        return True
@@ -88,3 +88,106 @@ class IndexBuffer(Buffer):
 
     def __init__(self, usage=gl.GL_DYNAMIC_DRAW):
         Buffer.__init__(self, gl.GL_ELEMENT_ARRAY_BUFFER, usage)
+
+
+
+class RingBuffer(VertexBuffer):
+    """
+    Vertex buffer where new data is written at a moving head (wrapping around)
+    such that only new data is uploaded. Buffer can be 1-D (one vertex per
+    slot) or 2-D (one vertex per slot and channel, slot major).
+
+    Age of slot i is (head - 1 - i) modulo slots, i.e. newest data has age 0.
+
+    Example
+    -------
+
+    Y = np.zeros((1000, 4), [("y", np.float32, 1)]).view(RingBuffer)
+    Y.append(np.random.uniform(-1, 1, (10,4)))
+    program.bind(Y)
+    program["head"], program["size"] = Y.head, Y.slots
+    program.draw(gl.GL_LINE_STRIP, Y.strips(), Y.ranges)
+    """
+
+    def __init__(self, usage=gl.GL_DYNAMIC_DRAW):
+        VertexBuffer.__init__(self, usage)
+        self._head = 0
+        self._strips = None
+
+
+    @property
+    def head(self):
+        """ Index of next slot to be written """
+
+        return self._head
+
+
+    @property
+    def slots(self):
+        """ Number of slots """
+
+        return len(self)
+
+
+    @property
+    def channels(self):
+        """ Number of channels (vertices per slot) """
+
+        return int(np.prod(self.shape[1:]))
+
+
+    def append(self, data):
+        """
+        Write data (one row per slot) at head and move head. Only written
+        slots are uploaded, but for the write that wraps around (the pending
+        area being contiguous).
+        """
+
+        size, head = len(self), self._head
+        data = np.asarray(data)
+        if data.dtype.names is None and self.dtype.names is not None:
+            if len(self.dtype.names) > 1:
+                raise ValueError("Data must be structured (several fields)")
+            Z = np.empty(data.shape[:1] + self.shape[1:], self.dtype)
+            Z[self.dtype.names[0]] = data.reshape(Z.shape)
+            data = Z
+        else:
+            data = data.reshape((-1,) + self.shape[1:])
+        n = len(data)
+        if n >= size:
+            data, head, n = data[n-size:], (head + n - size) % size, size
+        first = min(n, size - head)
+        self[head:head+first] = data[:first]
+        if n > first:
+            self[:n-first] = data[first:]
+        self._head = (head + n) % size
+
+
+    def strips(self):
+        """
+        Index buffer to draw each channel as a line strip (from slot 0 to
+        slot slots-1 and back to slot 0) using ranges.
+        """
+
+        if self._strips is None:
+            size, channels = len(self), self.channels
+            I = np.arange(size+1) % size
+            I = (I*channels + np.arange(channels).reshape(-1, 1)).ravel()
+            self._strips = I.astype(np.uint32).view(IndexBuffer)
+        return self._strips
+
+
+    @property
+    def ranges(self):
+        """
+        Ranges of strips() indices drawing each channel from oldest to newest
+        slot, without the segment between newest and oldest slots.
+        """
+
+        size, head = len(self), self._head
+        if head == 0:
+            ranges = [(0, size)]
+        else:
+            ranges = [(0, head), (head, size+1)]
+        offsets = (size+1)*np.arange(self.channels).reshape(-1, 1, 1)
+        return (np.array(ranges) + offsets).reshape(-1, 2)
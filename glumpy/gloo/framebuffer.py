@@ -76,7 +76,7 @@ class RenderBuffer(GLObject):
         """ Delete buffer from GPU """
 
         log.debug("GPU: Deleting render buffer")
-        gl.glDeleteRenderbuffer(self._handle)
+        gl.glDeleteRenderbuffers(1, [self._handle])
 
 
     def _activate(self):
@@ -200,6 +200,7 @@ class FrameBuffer(GLObject):
         self._stencil = stencil
         self._need_attach = True
         self._pending_attachments = []
+        self._previous = 0
 
         if color is not None:
             self.color = color
@@ -322,8 +323,11 @@ class FrameBuffer(GLObject):
         self._width = width
         self._height = height
 
+        # Render buffers storage is reallocated when they are attached
         if isinstance(self.color, ColorBuffer):
             self.color.resize(width, height)
+            self._pending_attachments.append((gl.GL_COLOR_ATTACHMENT0, self.color))
+            self._need_attach = True
         elif isinstance(self.color, Texture2D):
             color = np.resize(self.color, (height,width, self.color.shape[2]))
             color = color.view(self.color.__class__)
@@ -333,6 +337,8 @@ class FrameBuffer(GLObject):
 
         if isinstance(self.depth, DepthBuffer):
             self.depth.resize(width, height)
+            self._pending_attachments.append((gl.GL_DEPTH_ATTACHMENT, self.depth))
+            self._need_attach = True
         elif isinstance(self.depth, Texture2D):
             depth = np.resize(self.depth, (height,width, self.depth.shape[2]))
             depth = depth.view(self.depth.__class__)
@@ -341,6 +347,8 @@ class FrameBuffer(GLObject):
 
         if isinstance(self.stencil, StencilBuffer):
             self.stencil.resize(width, height)
+            self._pending_attachments.append((gl.GL_STENCIL_ATTACHMENT, self.stencil))
+            self._need_attach = True
         elif isinstance(self.stencil, Texture2D):
             stencil = np.resize(self.stencil, (height,width, self.stencil.shape[2]))
             stencil = stencil.view(self.stencil.__class__)
@@ -360,13 +368,15 @@ class FrameBuffer(GLObject):
         """ Delete buffer from GPU """
 
         log.debug("GPU: Delete framebuffer")
-        gl.glDeleteFramebuffer(self._handle)
+        gl.glDeleteFramebuffers(1, [self._handle])
 
 
     def _activate(self):
         """ Activate framebuffer on GPU """
 
         log.debug("GPU: Activate render framebuffer")
+        # Remember current framebuffer such that framebuffers can be nested
+        self._previous = int(gl.glGetIntegerv(gl.GL_FRAMEBUFFER_BINDING))
         gl.glBindFramebuffer(gl.GL_FRAMEBUFFER, self._handle)
         if self._need_attach:
             self._attach()
@@ -377,7 +387,7 @@ class FrameBuffer(GLObject):
         """ Deactivate framebuffer on GPU """
 
         log.debug("GPU: Deactivate render framebuffer")
-        gl.glBindFramebuffer(gl.GL_FRAMEBUFFER, 0)
+        gl.glBindFramebuffer(gl.GL_FRAMEBUFFER, self._previous)
 
 
     def _attach(self):
@@ -3,6 +3,25 @@
 # Copyright (c) 2014, Nicolas P. Rougier. All rights reserved.
 # Distributed under the terms of the (new) BSD License.
 # -----------------------------------------------------------------------------
+from glumpy import profiler
+
+
+# Generation of CPU side data (incremented each time some data or uniform is
+# modified) that allows to know whether something needs to be redrawn.
+__generation__ = 0
+
+def damage():
+    """ Signal that some data needs to be uploaded (scene has changed) """
+
+    global __generation__
+    __generation__ += 1
+
+def generation():
+    """ Current data generation """
+
+    return __generation__
+
+
 
 class GLObject(object):
     """ Generic GL object that may live both on CPU and GPU """
@@ -94,7 +113,7 @@ class GLObject(object):
             self._need_setup = False
 
         if self.need_update:
-            self._update()
+            profiler.timed("upload", self._update)
             self._need_update = False
 
 
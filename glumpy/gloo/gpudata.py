@@ -5,6 +5,7 @@
 # Distributed under the (new) BSD License.
 # -----------------------------------------------------------------------------
 import numpy as np
+from . globject import damage
 
 
 class GPUData(np.ndarray):
@@ -83,6 +84,7 @@ class GPUData(np.ndarray):
         if isinstance(base, GPUData):
             base._add_pending_data(start, stop)
         else:
+            damage()
             if self._pending_data is None:
                 self._pending_data = start, stop
             else:
@@ -4,16 +4,19 @@
 # Distributed under the terms of the new BSD License.
 # -----------------------------------------------------------------------------
 import re
+import ctypes
 import numpy as np
 
-from glumpy import gl
+from glumpy import gl, profiler
 from glumpy.log import log
 from glumpy import library
 from . snippet import Snippet
-from . globject import GLObject
+from . globject import GLObject, damage
 from . buffer import VertexBuffer, IndexBuffer
 from . shader import VertexShader, FragmentShader, GeometryShader
 from . variable import gl_typeinfo, Uniform, Attribute
+from OpenGL.raw.GL.VERSION.GL_1_4 import glMultiDrawArrays as _glMultiDrawArrays
+from OpenGL.raw.GL.VERSION.GL_1_4 import glMultiDrawElements as _glMultiDrawElements
 
 
 
@@ -261,6 +264,7 @@ class Program(GLObject):
 
 
     def __setitem__(self, name, data):
+        damage()
         if name in self._hooks.keys():
             snippet = data
             shader = self._hooks[name][0]
@@ -448,7 +452,7 @@ class Program(GLObject):
 
 
 
-    def draw(self, mode = gl.GL_TRIANGLES, indices=None): #first=0, count=None):
+    def draw(self, mode = gl.GL_TRIANGLES, indices=None, ranges=None):
         """ Draw the attribute arrays in the specified mode.
 
         Parameters
@@ -457,16 +461,22 @@ class Program(GLObject):
             GL_POINTS, GL_LINES, GL_LINE_STRIP, GL_LINE_LOOP,
             GL_TRIANGLES, GL_TRIANGLE_STRIP, GL_TRIANGLE_FAN
 
-        first : int
-            The starting vertex index in the vertex array. Default 0.
+        indices : IndexBuffer
+            Indices to draw. Default all vertices.
 
-        count : int
-            The number of vertices to draw. Default all.
+        ranges : (n,2) array-like
+            Ranges (start, stop) of vertices (or indices) to draw using a
+            single multi-draw call. Default everything.
         """
 
         self.activate()
         attributes = self._attributes.values()
 
+        # GPU timing when profiling
+        timer = profiler.active()
+        if timer is not None:
+            timer.begin_query("Program-%d" % self._id)
+
         # Get buffer size first attribute
         # We need more tests here
         #  - do we have at least 1 attribute ?
@@ -478,13 +488,33 @@ class Program(GLObject):
             gltypes = { np.dtype(np.uint8) : gl.GL_UNSIGNED_BYTE,
                         np.dtype(np.uint16): gl.GL_UNSIGNED_SHORT,
                         np.dtype(np.uint32): gl.GL_UNSIGNED_INT }
-            gl.glDrawElements(mode, indices.size, gltypes[indices.dtype], None)
+            gltype = gltypes[indices.dtype]
+            if ranges is None:
+                gl.glDrawElements(mode, indices.size, gltype, None)
+            else:
+                ranges = np.asarray(ranges, dtype=np.intp).reshape(-1,2)
+                counts = (ranges[:,1] - ranges[:,0]).astype(np.int32)
+                offsets = ranges[:,0] * indices.dtype.itemsize
+                _glMultiDrawElements(mode,
+                    counts.ctypes.data_as(ctypes.POINTER(ctypes.c_int)), gltype,
+                    offsets.ctypes.data_as(ctypes.POINTER(ctypes.c_void_p)),
+                    len(ranges))
             indices.deactivate()
+        elif ranges is not None:
+            ranges = np.asarray(ranges, dtype=np.int32).reshape(-1,2)
+            firsts = np.ascontiguousarray(ranges[:,0])
+            counts = ranges[:,1] - ranges[:,0]
+            _glMultiDrawArrays(mode,
+                firsts.ctypes.data_as(ctypes.POINTER(ctypes.c_int)),
+                counts.ctypes.data_as(ctypes.POINTER(ctypes.c_int)), len(ranges))
         else:
             first = 0
             # count = (self._count or attributes[0].size) - first
             count = len(attributes[0])
             gl.glDrawArrays(mode, first, count)
 
+        if timer is not None:
+            timer.end_query()
+
         gl.glBindBuffer( gl.GL_ARRAY_BUFFER, 0 )
         self.deactivate()
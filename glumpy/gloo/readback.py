@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright (c) 2014, Nicolas P. Rougier. All rights reserved.
+# Distributed under the terms of the (new) BSD License.
+# -----------------------------------------------------------------------------
+"""
+Asynchronous framebuffer readback.
+
+Pixels are read into a ring of pixel pack buffers such that glReadPixels
+returns immediately. Each read is followed by a fence and the corresponding
+frame is fetched a few frames later (when the fence is signaled), which
+avoids stalling the pipeline.
+
+Example usage:
+--------------
+
+  readback = Readback(width, height, callback=writer.write_frame)
+
+  @window.event
+  def on_draw(dt):
+      ...
+      readback.read()
+"""
+import ctypes
+import numpy as np
+from glumpy import gl
+from glumpy.log import log
+from glumpy.gloo.globject import GLObject
+from OpenGL.raw.GL.VERSION.GL_1_0 import glReadPixels as _glReadPixels
+
+
+class Readback(GLObject):
+    """ Asynchronous framebuffer readback using pixel pack buffers
+
+    Frames are delivered (oldest first) to the callback and/or the queue
+    as vertically flipped views (top row first) on internal buffers that are
+    reused `count` frames later. Consumers that need to keep a frame must
+    copy it.
+
+    Parameters
+    ----------
+
+    width : int
+        Width of the region to be read
+
+    height : int
+        Height of the region to be read
+
+    format : GLEnum
+        gl.GL_RGB or gl.GL_RGBA
+
+    count : int
+        Number of pack buffers (maximum number of frames in flight)
+
+    callback : callable
+        Function called with each frame
+
+    queue : Queue
+        Queue where frames are put
+    """
+
+    def __init__(self, width, height, format=gl.GL_RGB, count=3,
+                 callback=None, queue=None):
+        GLObject.__init__(self)
+        if format not in (gl.GL_RGB, gl.GL_RGBA):
+            raise ValueError("Readback format must be GL_RGB or GL_RGBA")
+        self._target = gl.GL_PIXEL_PACK_BUFFER
+        self._width = width
+        self._height = height
+        self._format = format
+        self._count = max(1, count)
+        self._callback = callback
+        self._queue = queue
+        depth = 3 if format == gl.GL_RGB else 4
+        self._frames = [np.zeros((height, width, depth), dtype=np.uint8)
+                        for i in range(self._count)]
+        self._handles = []
+        self._pending = []
+        self._index = 0
+
+
+    @property
+    def width(self):
+        """ Width of the region to be read """
+        return self._width
+
+
+    @property
+    def height(self):
+        """ Height of the region to be read """
+        return self._height
+
+
+    @property
+    def pending(self):
+        """ Number of frames in flight """
+        return len(self._pending)
+
+
+    def read(self, x=0, y=0):
+        """ Start reading the current read framebuffer (non blocking)
+
+        The oldest frame in flight is waited for only when all pack buffers
+        are in use.
+        """
+
+        if self._need_create:
+            self._create()
+            self._need_create = False
+
+        self.poll()
+        if len(self._pending) >= self._count:
+            self._fetch(wait=True)
+
+        index = self._index
+        gl.glBindBuffer(self._target, self._handles[index])
+        gl.glPixelStorei(gl.GL_PACK_ALIGNMENT, 1)
+        _glReadPixels(x, y, self._width, self._height,
+                      self._format, gl.GL_UNSIGNED_BYTE, ctypes.c_void_p(0))
+        gl.glBindBuffer(self._target, 0)
+        sync = gl.glFenceSync(gl.GL_SYNC_GPU_COMMANDS_COMPLETE, 0)
+        self._pending.append((index, sync))
+        self._index = (index+1) % self._count
+
+
+    def poll(self):
+        """ Deliver all frames whose transfer is complete """
+
+        count = 0
+        while self._pending and self._fetch(wait=False):
+            count += 1
+        return count
+
+
+    def flush(self):
+        """ Wait for and deliver all frames in flight """
+
+        while self._pending:
+            self._fetch(wait=True)
+
+
+    def _fetch(self, wait=False):
+        """ Deliver oldest frame in flight if available (or wait for it) """
+
+        index, sync = self._pending[0]
+        timeout = 10*1000*1000 if wait else 0
+        while True:
+            status = gl.glClientWaitSync(sync, gl.GL_SYNC_FLUSH_COMMANDS_BIT, timeout)
+            if status in (gl.GL_ALREADY_SIGNALED, gl.GL_CONDITION_SATISFIED):
+                break
+            elif status == gl.GL_WAIT_FAILED:
+                log.warn("Readback fence wait failed")
+                break
+            elif not wait:
+                return False
+        self._pending.pop(0)
+        gl.glDeleteSync(sync)
+
+        frame = self._frames[index]
+        gl.glBindBuffer(self._target, self._handles[index])
+        gl.glGetBufferSubData(self._target, 0, frame.nbytes, frame)
+        gl.glBindBuffer(self._target, 0)
+
+        # OpenGL rows are bottom to top, flip using a strided view
+        frame = frame[::-1]
+        if self._callback is not None:
+            self._callback(frame)
+        if self._queue is not None:
+            self._queue.put(frame)
+        return True
+
+
+    def _create(self):
+        """ Create pack buffers on GPU """
+
+        nbytes = self._frames[0].nbytes
+        handles = gl.glGenBuffers(self._count)
+        self._handles = np.atleast_1d(handles).tolist()
+        for handle in self._handles:
+            gl.glBindBuffer(self._target, handle)
+            gl.glBufferData(self._target, nbytes, None, gl.GL_STREAM_READ)
+        gl.glBindBuffer(self._target, 0)
+        log.debug("GPU: Creating readback buffers (id=%d)" % self._id)
+
+
+    def _delete(self):
+        """ Delete pack buffers and pending fences from GPU """
+
+        for index, sync in self._pending:
+            gl.glDeleteSync(sync)
+        self._pending = []
+        if self._handles:
+            gl.glDeleteBuffers(len(self._handles), self._handles)
+        self._handles = []
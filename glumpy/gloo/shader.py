@@ -137,8 +137,11 @@ class Shader(GLObject):
         if len(self.hooks):
             raise RuntimeError("Shader has pending hooks, cannot compile")
 
-        # Set shader source
-        code = "#version 120\n" + self.code
+        # Set shader source (extension directives must come first and hooks
+        # may have prepended code)
+        pattern = re.compile(r"^[ \t]*#[ \t]*extension[^\n]*\n", re.MULTILINE)
+        extensions = "".join(re.findall(pattern, self.code))
+        code = "#version 120\n" + extensions + re.sub(pattern, "", self.code)
         # code = self.code
         gl.glShaderSource(self._handle, code)
 
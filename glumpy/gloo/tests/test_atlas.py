@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright (c) 2014, Nicolas P. Rougier. All rights reserved.
+# Distributed under the terms of the new BSD License.
+# -----------------------------------------------------------------------------
+import unittest
+import numpy as np
+
+from glumpy.gloo.atlas import Atlas, PagedAtlas
+
+
+# ------------------------------------------------------------------- Atlas ---
+class AtlasTest(unittest.TestCase):
+
+    def test_allocate(self):
+        A = np.zeros((64,64),np.float32).view(Atlas)
+        assert A.allocate((10,20)) == (0,0,20,10)
+        assert A.allocate((5,20)) == (20,0,20,5)
+        assert A.allocate((10,10)) == (40,0,10,10)
+        assert A.used == 400
+
+    def test_no_overlap(self):
+        A = np.zeros((128,128),np.float32).view(Atlas)
+        Z = np.zeros((128,128),int)
+        np.random.seed(1)
+        for i in range(200):
+            region = A.allocate(np.random.randint(1,16,2))
+            if region is None:
+                continue
+            x,y,w,h = region
+            Z[y:y+h,x:x+w] += 1
+        assert Z.max() == 1
+        assert A.used == Z.sum()
+        assert A.nodes[:,2].sum() == 128
+
+    def test_full(self):
+        A = np.zeros((16,16),np.float32).view(Atlas)
+        assert A.allocate((16,16)) == (0,0,16,16)
+        assert A.allocate((1,1)) is None
+
+
+# -------------------------------------------------------------- PagedAtlas ---
+class PagedAtlasTest(unittest.TestCase):
+
+    def test_new_page(self):
+        A = PagedAtlas((16,16), max_pages=2)
+        assert A.allocate('a', (16,16)) == (0, (0,0,16,16))
+        assert A.allocate('b', (16,16)) == (1, (0,0,16,16))
+        assert A.allocate('a', (16,16)) == (0, (0,0,16,16))
+        assert len(A.pages) == 2
+
+    def test_evict(self):
+        A = PagedAtlas((16,16), max_pages=1)
+        A.allocate('a', (8,16))
+        A.allocate('b', (8,16))
+        A.acquire('b')
+        assert A.allocate('c', (8,16)) == (0, (0,8,16,8))
+        assert 'a' not in A
+        assert A.get('b') == (0, (0,0,16,8))
+
+    def test_relocate(self):
+        moved = []
+        A = PagedAtlas((16,16), max_pages=1)
+        A.add_handler(lambda key, page, region: moved.append((key,region)))
+        A.allocate('a', (8,16))
+        A.allocate('b', (8,16))
+        A.pages[0][8:16] = 1
+        A.acquire('b')
+        A.get('a')
+        A.allocate('c', (8,8))
+        assert moved == [('b', (0,0,16,8))]
+        assert (A.pages[0][0:8] == 1).all()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright (c) 2014, Nicolas P. Rougier. All rights reserved.
+# Distributed under the terms of the new BSD License.
+# -----------------------------------------------------------------------------
+import unittest
+import numpy as np
+
+from glumpy.gloo.buffer import RingBuffer
+
+
+# -----------------------------------------------------------------------------
+class RingBufferTest(unittest.TestCase):
+
+    def test_append(self):
+        R = np.zeros(5, [("y", np.float32, 1)]).view(RingBuffer)
+        R._pending_data = None
+        R.append([1, 2])
+        assert R.head == 2
+        assert R.pending_data == (0, 8)
+        R._pending_data = None
+        R.append([3])
+        assert R.pending_data == (8, 4)
+        R.append(np.arange(4, 12))
+        assert R.head == 1
+        assert np.array_equal(R["y"], [11, 7, 8, 9, 10])
+
+    def test_channels(self):
+        R = np.zeros((4, 2), [("y", np.float32, 1)]).view(RingBuffer)
+        assert R.slots == 4 and R.channels == 2
+        R.append([[1, 2], [3, 4], [5, 6]])
+        assert R.head == 3
+        I = R.strips()
+        assert np.array_equal(I[:5], [0, 2, 4, 6, 0])
+        assert np.array_equal(I[5:], [1, 3, 5, 7, 1])
+        # Oldest (3) to newest (2) slots of first channel
+        assert np.array_equal(R.ranges, [(0, 3), (3, 5), (5, 8), (8, 10)])
+        assert np.array_equal(I[3:5], [6, 0])
+        assert np.array_equal(I[0:3], [0, 2, 4])
+
+    def test_extent(self):
+        R = np.zeros((4, 2), [("y", np.float32, 1)]).view(RingBuffer)
+        assert R.size == 8
+        assert R.pending_data == (0, R.nbytes)
+
+
+# -----------------------------------------------------------------------------
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright (c) 2014, Nicolas P. Rougier. All rights reserved.
+# Distributed under the terms of the new BSD License.
+# -----------------------------------------------------------------------------
+import unittest
+import numpy as np
+
+from glumpy import gl
+from glumpy.gloo.texture import ScrollingTexture2D
+
+
+# -----------------------------------------------------------------------------
+class ScrollingTextureTest(unittest.TestCase):
+
+    def test_rows(self):
+        T = np.zeros((4, 3, 1), np.uint8).view(ScrollingTexture2D)
+        assert T.wrapping == gl.GL_REPEAT
+        T.append([1, 2, 3])
+        assert T.head == 1 and T.offset == 0.25
+        assert T._lines == [(0, 1)]
+        T.append(np.ones((2, 3)))
+        assert T._lines == [(0, 3)]
+        T.append(np.ones((2, 3)))
+        assert T.head == 1
+        assert T._lines == [(0, 4)]
+        T._queued = 0
+        T.append(np.ones((2, 3)))
+        assert T._lines == [(1, 2)]
+        T._queued = 0
+        T.append(np.ones((2, 3)))
+        assert T._lines == [(3, 1), (0, 1)]
+        assert np.array_equal(T[..., 0], np.ones((4, 3)))
+
+    def test_columns(self):
+        T = np.zeros((3, 4, 1), np.uint8).view(ScrollingTexture2D)
+        T.axis = 1
+        T.append([[1, 2, 3], [4, 5, 6]])
+        assert T.head == 2 and T.offset == 0.5
+        assert np.array_equal(T[:, :2, 0], [[1, 4], [2, 5], [3, 6]])
+        self.assertRaises(ValueError, setattr, T, "axis", 2)
+
+
+# -----------------------------------------------------------------------------
+if __name__ == "__main__":
+    unittest.main()
@@ -8,7 +8,7 @@ import numpy as np
 from glumpy import gl
 from glumpy.log import log
 from glumpy.gloo.gpudata import GPUData
-from glumpy.gloo.globject import GLObject
+from glumpy.gloo.globject import GLObject, damage
 
 
 class Texture(GPUData,GLObject):
@@ -301,21 +301,36 @@ class Texture2D(Texture):
 
             offset, nbytes = self.pending_data
 
+            # Pending texels (pending data may not be texel aligned)
             itemsize = self.strides[1]
-            offset /= itemsize
-            nbytes /= itemsize
-
-            nbytes += offset % self.width
-            offset -= offset % self.width
-            nbytes += (self.width - ((offset + nbytes) % self.width)) % self.width
+            start = offset // itemsize
+            stop = (offset + nbytes + itemsize - 1) // itemsize
+
+            # Pending texels within a single row
+            if start // self.width == (stop - 1) // self.width:
+                x = start % self.width
+                y = start // self.width
+                data = self.view(np.ndarray)[y, x:x+stop-start]
+                gl.glBindTexture(self._target, self.handle)
+                gl.glTexSubImage2D(self.target, 0, x, y, stop-start, 1,
+                                   self._cpu_format, self.gtype, data)
+                self._pending_data = None
+                self._need_update = False
+                return
+
+            # Pending rows
+            offset = start - start % self.width
+            nbytes = stop - offset
+            nbytes += (self.width - nbytes % self.width) % self.width
 
             x = 0
             y = offset // self.width
             width = self.width
             height = nbytes // self.width
+            data = self.view(np.ndarray)[y:y+height]
             gl.glBindTexture(self._target, self.handle)
             gl.glTexSubImage2D(self.target, 0, x, y, width, height,
-                               self._cpu_format, self.gtype, self)
+                               self._cpu_format, self.gtype, data)
             gl.glBindTexture(self._target, self.handle)
 
         self._pending_data = None
@@ -329,3 +344,126 @@ class TextureFloat2D(Texture2D):
     def __init__(self):
         Texture2D.__init__(self)
         self._gpu_format = Texture._gpu_float_formats[self.shape[-1]]
+
+
+
+class ScrollingTexture2D(Texture2D):
+    """
+    2D texture where new rows (axis 0) or columns (axis 1) are written at a
+    moving head (wrapping around) such that only new lines are uploaded.
+
+    Texture wraps (GL_REPEAT) such that shaders get the image from oldest to
+    newest line by offsetting texture coordinates along axis with offset.
+
+    Example
+    -------
+
+    T = np.zeros((512, 4096, 1), np.float32).view(ScrollingTexture2D)
+    T.append(spectrum)
+    program["waterfall"] = T
+    program["offset"] = T.offset
+
+    // texture2D(waterfall, vec2(texcoord.x, texcoord.y + offset))
+    """
+
+    def __init__(self):
+        Texture2D.__init__(self)
+        self._wrapping = gl.GL_REPEAT
+        self._axis = 0
+        self._head = 0
+        self._queued = 0
+
+
+    @property
+    def axis(self):
+        """ Axis along which lines are appended (0: rows, 1: columns) """
+
+        return self._axis
+
+
+    @axis.setter
+    def axis(self, value):
+        """ Axis along which lines are appended (0: rows, 1: columns) """
+
+        if value not in (0, 1):
+            raise ValueError("Axis must be 0 (rows) or 1 (columns)")
+        self._axis = value
+        self._head = 0
+
+
+    @property
+    def head(self):
+        """ Index of next line to be written """
+
+        return self._head
+
+
+    @property
+    def offset(self):
+        """ Texture coordinate (along axis) of oldest line """
+
+        return self._head / float(self.shape[self._axis])
+
+
+    @property
+    def need_update(self):
+        """ Whether object needs to be updated """
+
+        return Texture2D.need_update.fget(self) or self._queued > 0
+
+
+    @property
+    def _lines(self):
+        """
+        Queued lines as (start, count) ranges, i.e. the (at most two) ranges
+        of the last queued lines before head or all lines (single range)
+        """
+
+        size = self.shape[self._axis]
+        if self._queued >= size:
+            return [(0, size)]
+        start = (self._head - self._queued) % size
+        first = min(self._queued, size - start)
+        if first < self._queued:
+            return [(start, first), (0, self._queued - first)]
+        return [(start, first)] if first else []
+
+
+    def append(self, data):
+        """ Write lines at head (along axis) and move head """
+
+        axis, head = self._axis, self._head
+        size = self.shape[axis]
+        shape = (self.shape[1-axis],) + self.shape[2:]
+        data = np.asarray(data, dtype=self.dtype).reshape((-1,) + shape)
+        n = len(data)
+        if n >= size:
+            data, head, n = data[n-size:], (head + n - size) % size, size
+        Z = self.view(np.ndarray)
+        if axis == 1:
+            Z = Z.swapaxes(0, 1)
+        first = min(n, size - head)
+        Z[head:head+first] = data[:first]
+        if n > first:
+            Z[:n-first] = data[first:]
+        self._head = (head + n) % size
+        self._queued = min(self._queued + n, size)
+        damage()
+
+
+    def _update(self):
+        """ Update texture on GPU """
+
+        Texture2D._update(self)
+        gl.glBindTexture(self._target, self.handle)
+        for start, count in self._lines:
+            log.debug("GPU: Updating texture lines")
+            if self._axis == 0:
+                data = self.view(np.ndarray)[start:start+count]
+                gl.glTexSubImage2D(self.target, 0, 0, start, self.width, count,
+                                   self._cpu_format, self.gtype, data)
+            else:
+                data = np.ascontiguousarray(self.view(np.ndarray)[:, start:start+count])
+                gl.glTexSubImage2D(self.target, 0, start, 0, count, self.height,
+                                   self._cpu_format, self.gtype, data)
+        self._queued = 0
@@ -17,3 +17,7 @@ from . raw_path_collection import RawPathCollection
 from . raw_triangle_collection import RawTriangleCollection
 from . agg_path_collection import AggPathCollection
 from . agg_fast_path_collection import AggFastPathCollection
+from . picker import Picker
+from . spatial_index import SpatialIndex
+from . decimation import M4
+from . pyramid import Pyramid, PyramidLoader
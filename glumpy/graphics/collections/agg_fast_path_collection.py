@@ -10,9 +10,15 @@ This collection provides antialiased and accurate paths with caps and miter
 joins. It consume x4 more memory than regular lines and is a bit slower, but
 the quality of the output is worth the cost. Note that no control can be made
 on miter joins which may result in some glitches on screen.
+
+In compact mode, path points are stored only once (instead of being stored
+as prev/curr/next and duplicated) in a texture where the vertex shader fetches
+neighbours using the vertex index. This requires the GL_EXT_gpu_shader4
+extension.
 """
 import numpy as np
 from glumpy import gl, library
+from glumpy.gloo.texture import TextureFloat2D
 from glumpy.transforms import Position3D, Viewport
 from . collection import Collection
 
@@ -29,7 +35,7 @@ class AggFastPathCollection(Collection):
     """
 
     def __init__(self, user_dtype=None, transform=None,
-                 vertex=None, fragment=None, **kwargs):
+                 vertex=None, fragment=None, compact=False, **kwargs):
         """
         Initialize the collection.
 
@@ -52,6 +58,10 @@ class AggFastPathCollection(Collection):
         fragment: string
             Fragment  shader code
 
+        compact: bool
+            Whether points are stored only once (about 5 times less memory).
+            In compact mode, color, linewidth and antialias must be global.
+
         caps : string
             'local', 'shared' or 'global'
 
@@ -65,24 +75,41 @@ class AggFastPathCollection(Collection):
             'local', 'shared' or 'global'
         """
 
-        base_dtype = [ ('prev',       (np.float32, 3), '!local', (0,0,0)),
-                       ('curr',       (np.float32, 3), '!local', (0,0,0)),
-                       ('next',       (np.float32, 3), '!local', (0,0,0)),
-                       ('id',         (np.float32, 1), '!local', 0),
-                       ('color',      (np.float32, 4), 'global', (0,0,0,1)),
-                       ('linewidth',  (np.float32, 1), 'global', 1),
-                       ('antialias',  (np.float32, 1), 'global', 1) ]
+        self._compact = compact
+        if compact:
+            # Points (x,y,z,ghost) are also the texels of the points texture
+            base_dtype = [ ('curr',       (np.float32, 3), '!local', (0,0,0)),
+                           ('ghost',      (np.float32, 1), '!local', 0) ]
+            if user_dtype:
+                raise ValueError("Compact mode does not support user dtype")
+            if kwargs.get("picking"):
+                raise ValueError("Compact mode does not support picking")
+            for name in ['color', 'linewidth', 'antialias']:
+                if kwargs.get(name, 'global') != 'global':
+                    raise ValueError("Compact mode requires global %s" % name)
+        else:
+            base_dtype = [ ('prev',       (np.float32, 3), '!local', (0,0,0)),
+                           ('curr',       (np.float32, 3), '!local', (0,0,0)),
+                           ('next',       (np.float32, 3), '!local', (0,0,0)),
+                           ('id',         (np.float32, 1), '!local', 0) ]
+        base_dtype += [ ('color',      (np.float32, 4), 'global', (0,0,0,1)),
+                        ('linewidth',  (np.float32, 1), 'global', 1),
+                        ('antialias',  (np.float32, 1), 'global', 1) ]
         dtype = base_dtype
         if user_dtype:
             dtype.extend(user_dtype)
 
         if vertex is None:
-            vertex = library.get('collections/agg-fast-path.vert')
+            if compact:
+                vertex = library.get('collections/agg-fast-path-compact.vert')
+            else:
+                vertex = library.get('collections/agg-fast-path.vert')
         if fragment is None:
             fragment = library.get('collections/agg-fast-path.frag')
 
         Collection.__init__(self, dtype=dtype, itype=None, mode=gl.GL_TRIANGLE_STRIP,
                             vertex=vertex, fragment=fragment, **kwargs)
+        self._points_texture = None
 
         # Set hooks if necessary
         if "transform" in self._program._hooks.keys():
@@ -129,6 +156,15 @@ class AggFastPathCollection(Collection):
         itemcount = len(P)/itemsize
 
         P = P.reshape(itemcount,itemsize,3)
+        if self._compact:
+            # Ghost points (-1 at start, +1 at end) give neighbours of ends
+            V = np.zeros((itemcount,itemsize+2+closed), dtype=self.vtype)
+            V['curr'] = self.bake(P, closed=closed).reshape(V.shape + (3,))
+            V['ghost'][:, 0], V['ghost'][:, -1] = -1, +1
+            Collection.append(self, vertices=V.ravel(),
+                              itemsize=itemsize+2+closed)
+            return
+
         if closed:
             V = np.empty((itemcount,itemsize+3), dtype=self.vtype)
             # Apply default values on vertices
@@ -184,7 +220,8 @@ class AggFastPathCollection(Collection):
     def bake(self, P, key='curr', closed=False, itemsize=None):
         """
         Given a path P, return the baked vertices as they should be copied in the
-        collection if the path has already been appended.
+        collection if the path has already been appended. In compact mode,
+        points are baked once (key is ignored).
 
         Example:
         --------
@@ -200,6 +237,14 @@ class AggFastPathCollection(Collection):
         itemcount = len(P)/itemsize
         n = itemsize
 
+        if self._compact:
+            n = P.shape[-2] if P.ndim > 2 else n
+            if closed:
+                I = np.r_[n-1, np.arange(n), 0, 1]
+            else:
+                I = np.r_[0, np.arange(n), n-1]
+            return P.reshape(-1, n, P.shape[-1])[:, I].reshape(-1, P.shape[-1])
+
         if closed:
             I = np.arange(n+3)
             if key == 'prev':
@@ -224,9 +269,42 @@ class AggFastPathCollection(Collection):
         return P[I]
 
 
+    def _update(self):
+        """ Update vertex buffers & texture (points texture in compact mode) """
+
+        if not self._compact:
+            Collection._update(self)
+            return
+
+        # Vertices buffer is replaced by a view of the points texture
+        self._vertices_buffer = None
+        Collection._update(self)
+        if self._points_texture is not None:
+            self._points_texture._delete()
+        data = self._vertices_list._data.view(np.float32)
+        cols = min(len(self._vertices_list._data), 4096)
+        texture = data.reshape(-1, cols, 4).view(TextureFloat2D)
+        texture.interpolation = gl.GL_NEAREST
+        self._points_texture = texture
+        size = self._vertices_list.size
+        self._vertices_buffer = texture.reshape(-1)[:4*size].view(self.vtype)
+        self._program["points"] = texture
+        self._program["points_shape"] = texture.shape[:2]
+
+
     def draw(self, mode = gl.GL_TRIANGLE_STRIP):
         """ Draw collection """
 
         gl.glDepthMask(gl.GL_FALSE)
-        Collection.draw(self, mode)
+        if not self._compact:
+            Collection.draw(self, mode)
+        else:
+            # Each point is drawn using two vertices
+            if self._need_update:
+                self._update()
+            view = self._view() if self._culling is not False else None
+            ranges = self._ranges(view)
+            if ranges is None:
+                ranges = [(0, self._vertices_list.size)]
+            self._program.draw(mode, ranges=2*np.asarray(ranges))
         gl.glDepthMask(gl.GL_TRUE)
@@ -28,10 +28,97 @@ Example
 [ [0 1 2] [3 4 5] [6 7 8 9] ]
 >>> print L.data
 [0 1 2 3 4 5 6 7 8 9]
+
+When created with tombstones=True, deleted items are only marked as deleted
+and their data is kept in place until the list is compacted (explicitly or
+before any operation that would need to move data), which makes deletion
+O(1) instead of moving the whole tail of the list.
+
+Example
+-------
+
+>>> L = ArrayList( np.arange(10), [3,3,4], tombstones=True)
+>>> del L[1]
+>>> print L
+[ [0 1 2] [6 7 8 9] ]
+>>> print L.data
+[0 1 2 3 4 5 6 7 8 9]
+>>> L.compact()
+>>> print L.data
+[0 1 2 6 7 8 9]
+
+Several items can be selected, set or deleted at once using an array of
+indices or a boolean mask.
+
+Example
+-------
+
+>>> L = ArrayList( np.arange(10), [3,3,4])
+>>> print L[[0,2]]
+[ [0 1 2] [6 7 8 9] ]
+>>> del L[np.array([True,False,True])]
+>>> print L
+[ [3 4 5] ]
+
+An ArrayList can be backed by files (using memory maps) such that it does not
+need to fit in memory. Data is stored in filename and items are stored in
+filename.items. Such list is reopened (without any copy) when created with an
+existing filename and no data.
+
+Example
+-------
+
+>>> L = ArrayList( np.arange(10), [3,3,4], filename="list.data")
+>>> L.append([10,11])
+>>> L.flush()
+>>> L = ArrayList(filename="list.data", dtype=L.dtype)
+>>> print L
+[ [0 1 2] [3 4 5] [6 7 8 9] [10 11] ]
 """
+import os
 import numpy as np
 
 
+def _resize(array, capacity):
+    """ Return array with a new capacity (first dimension), keeping content """
+
+    Z = np.zeros((capacity,) + array.shape[1:], dtype=array.dtype)
+    n = min(capacity, len(array))
+    Z[:n] = array[:n]
+    return Z
+
+
+def _memmap(filename, dtype, capacity, columns=None):
+    """ Map a file as an array with given capacity (growing the file if needed) """
+
+    shape = (capacity,) if columns is None else (capacity, columns)
+    nbytes = int(np.prod(shape)) * np.dtype(dtype).itemsize
+    if os.path.getsize(filename) < nbytes:
+        # Growing a file using truncate gives a sparse file
+        with open(filename, "r+b") as file:
+            file.truncate(nbytes)
+    return np.memmap(filename, dtype=dtype, mode="r+", shape=shape)
+
+
+def _gather(starts, sizes):
+    """ Return data indices of items given their starts and sizes """
+
+    offsets = sizes.cumsum() - sizes
+    return np.arange(sizes.sum()) + np.repeat(starts - offsets, sizes)
+
+
+def _merge(items):
+    """ Return ranges (start, stop) of items, merging adjacent ones """
+
+    if not len(items):
+        return np.zeros((0, 2), dtype=int)
+    breaks = np.flatnonzero(items[1:, 0] != items[:-1, 1]) + 1
+    ranges = np.empty((len(breaks)+1, 2), dtype=int)
+    ranges[:, 0] = items[np.r_[0, breaks], 0]
+    ranges[:, 1] = items[np.r_[breaks-1, len(items)-1], 1]
+    return ranges
+
+
 class ArrayList(object):
     """
     An ArrayList is a strongly typed list whose type can be anything that can
@@ -39,7 +126,7 @@ class ArrayList(object):
     """
 
     def __init__(self, data=None, itemsize=None, dtype=float,
-                 sizeable=True, writeable=True):
+                 sizeable=True, writeable=True, tombstones=False, filename=None):
         """ Create a new buffer using given data and sizes or dtype
 
         Parameters
@@ -67,10 +154,19 @@ class ArrayList(object):
 
         writeable : boolean
             Indicate whether content can be changed
+
+        tombstones : boolean
+            Indicate whether deleted items are only marked as deleted
+            (until the list is compacted)
+
+        filename : str
+            File where data is stored (items being stored in filename.items).
+            If the file exists and no data is given, list is reopened.
         """
 
         self._sizeable = sizeable
         self._writeable = writeable
+        self._tombstones = tombstones
 
         if data is not None:
             if isinstance(data, (list, tuple)):
@@ -81,7 +177,7 @@ class ArrayList(object):
             self._size = self._data.size
 
             # Default is one group with all data inside
-            _itemsize = np.ones(1) * self._data.size
+            _itemsize = np.ones(1, dtype=int) * self._data.size
 
             # Check item sizes and get items count
             if itemsize is not None:
@@ -111,20 +207,74 @@ class ArrayList(object):
             self._size = 0
             self._count = 0
 
+        # Deleted items (tombstones)
+        self._dead = np.zeros(len(self._items), dtype=bool)
+        self._deleted = 0
+        self._live = None
+        self._ranges = None
+
+        # Incremented each time data is moved (appending does not move data)
+        self._version = 0
+
+        # File backed list
+        self._filename = filename
+        if filename is not None:
+            if data is None and os.path.exists(filename):
+                self._open()
+            else:
+                self.save(filename)
+                self._open()
+
     @property
     def data(self):
-        """ The array's elements, in memory. """
+        """ The array's elements, in memory (including deleted items). """
         return self._data[:self._size]
 
     @property
     def size(self):
-        """ Number of base elements, in memory. """
+        """ Number of base elements, in memory (including deleted items). """
         return self._size
 
     @property
     def itemsize(self):
         """ Individual item sizes """
-        return self._items[:self._count, 1] - self._items[:self._count, 0]
+        itemsize = self._items[:self._count, 1] - self._items[:self._count, 0]
+        if self._deleted:
+            return itemsize[self._live_items()]
+        return itemsize
+
+    @property
+    def filename(self):
+        """ File where data is stored (None if list is in memory) """
+        return self._filename
+
+    @property
+    def tombstones(self):
+        """ Whether deleted items are only marked as deleted """
+        return self._tombstones
+
+    @tombstones.setter
+    def tombstones(self, value):
+        if not value:
+            self.compact()
+        self._tombstones = value
+
+    @property
+    def deleted(self):
+        """ Number of deleted items waiting for compaction """
+        return self._deleted
+
+    @property
+    def ranges(self):
+        """ Data ranges (start, stop) of living items (merged when adjacent) """
+
+        if self._ranges is None:
+            if not self._deleted:
+                ranges = np.array([[0, self._size]], dtype=int)
+            else:
+                ranges = _merge(self._items[:self._count][self._live_items()])
+            self._ranges = ranges
+        return self._ranges
 
     @property
     def dtype(self):
@@ -137,12 +287,137 @@ class ArrayList(object):
 
         if capacity >= self._data.size:
             capacity = int(2 ** np.ceil(np.log2(capacity)))
-            self._data = np.resize(self._data, capacity)
+            self._reserve_data(capacity)
+
+
+    def _reserve_data(self, capacity):
+        """ Set capacity of the data array (in memory or on disk) """
+
+        if self._filename is None:
+            self._data = _resize(self._data, capacity)
+        else:
+            self._data = _memmap(self._filename, self._data.dtype, capacity)
+
+
+    def _reserve_items(self, capacity):
+        """ Set capacity of the items array (in memory or on disk) """
+
+        if self._filename is None:
+            self._items = _resize(self._items, capacity)
+        else:
+            self._header = _memmap(self._filename + ".items", np.int64,
+                                   capacity + 1, 2)
+            self._items = self._header[1:]
+        self._dead = _resize(self._dead, capacity)
+
+
+    def _open(self):
+        """ Map data and items from files """
+
+        filename = self._filename
+        dtype = self._data.dtype
+        size, count = np.fromfile(filename + ".items", np.int64, 2)
+        self._size, self._count = int(size), int(count)
+        capacity = os.path.getsize(filename) // dtype.itemsize
+        self._data = _memmap(filename, dtype, max(1, self._size, capacity))
+        capacity = os.path.getsize(filename + ".items") // 16 - 1
+        self._header = _memmap(filename + ".items", np.int64,
+                               max(1, self._count, capacity) + 1, 2)
+        self._items = self._header[1:]
+        self._dead = np.zeros(len(self._items), dtype=bool)
+        self._deleted = 0
+        self._live = None
+        self._ranges = None
+
+
+    def flush(self):
+        """ Write any change to disk (file backed list only) """
+
+        if self._filename is None:
+            return
+        self.compact()
+        self._header[0] = self._size, self._count
+        self._header.flush()
+        self._data.flush()
+
+
+    def save(self, filename):
+        """ Save list to filename (data) and filename.items (items) such that
+        it can be reopened using ArrayList(filename=filename, dtype=dtype) """
+
+        if filename == self._filename and hasattr(self, "_header"):
+            self.flush()
+            return
+        self.compact()
+        self.data.tofile(filename)
+        items = np.zeros((self._count + 1, 2), dtype=np.int64)
+        items[0] = self._size, self._count
+        items[1:] = self._items[:self._count]
+        items.tofile(filename + ".items")
+
+
+    def compact(self):
+        """ Remove deleted items data (in a single pass) """
+
+        if not self._deleted:
+            return
+        live = self._live_items()
+        items = self._items[:self._count]
+        sizes = items[:, 1] - items[:, 0]
+        keep = np.repeat(~self._dead[:self._count], sizes)
+        size = keep.sum()
+        self._data[:size] = self._data[:self._size][keep]
+        C = sizes[live].cumsum()
+        count = len(C)
+        self._items[:count, 1] = C
+        self._items[0, 0] = 0
+        self._items[1:count, 0] = C[:-1]
+        self._dead[:self._count] = False
+        self._size = size
+        self._count = count
+        self._deleted = 0
+        self._live = None
+        self._ranges = None
+        self._version += 1
+
+
+    def _live_items(self):
+        """ Indices of living items """
+
+        if self._live is None:
+            self._live = np.flatnonzero(~self._dead[:self._count])
+        return self._live
+
+
+    def _slot(self, key):
+        """ Index of the item at position key (taking tombstones into account) """
+
+        if self._deleted:
+            return self._live_items()[key]
+        return key
+
+
+    def _slots(self, key):
+        """ Positions and indices of items given an index array or a mask """
+
+        key = np.asarray(key)
+        if key.dtype == bool:
+            if key.shape != (len(self),):
+                raise IndexError("Boolean mask size does not match list size")
+            key = np.flatnonzero(key)
+        elif key.dtype.kind in "iu" or not key.size:
+            key = key.astype(int).ravel()
+            key[key < 0] += len(self)
+            if key.size and (key.min() < 0 or key.max() >= len(self)):
+                raise IndexError("List index out of range")
+        else:
+            raise TypeError("List indices must be integers")
+        return key, self._slot(key)
 
 
     def __len__(self):
         """ x.__len__() <==> len(x) """
-        return self._count
+        return self._count - self._deleted
 
     def __str__(self):
         s = '[ '
@@ -159,11 +434,13 @@ class ArrayList(object):
                 key += len(self)
             if key < 0 or key >= len(self):
                 raise IndexError("Tuple index out of range")
+            key = self._slot(key)
             dstart = self._items[key][0]
             dstop = self._items[key][1]
             return self._data[dstart:dstop]
 
         elif isinstance(key, slice):
+            self.compact()
             istart, istop, step = key.indices(len(self))
             if istart > istop:
                 istart, istop = istop, istart
@@ -174,10 +451,21 @@ class ArrayList(object):
                 dstop = self._items[istop - 1][1]
             return self._data[dstart:dstop]
 
+        elif isinstance(key, (list, np.ndarray)):
+            keys, slots = self._slots(key)
+            if not len(slots):
+                return ArrayList(dtype=self.dtype)
+            items = self._items[slots]
+            sizes = items[:, 1] - items[:, 0]
+            data = self._data[_gather(items[:, 0], sizes)]
+            return ArrayList(data, sizes)
+
         elif isinstance(key, str):
+            self.compact()
             return self._data[key][:self._size]
 
         elif key is Ellipsis:
+            self.compact()
             return self.data
 
         else:
@@ -189,6 +477,29 @@ class ArrayList(object):
         if not self._writeable:
             raise AttributeError("List is not writeable")
 
+        # Setting several items (data is given per element or per item)
+        if isinstance(key, (list, np.ndarray)):
+            keys, slots = self._slots(key)
+            items = self._items[slots]
+            sizes = items[:, 1] - items[:, 0]
+            data = np.asarray(data)
+            if data.ndim and len(data) == len(sizes) != sizes.sum():
+                data = np.repeat(data, sizes, axis=0)
+            self._data[_gather(items[:, 0], sizes)] = data
+            return
+
+        if isinstance(key, int) and self._deleted:
+            if key < 0:
+                key += len(self)
+            if key < 0 or key >= len(self):
+                raise IndexError("List assignment index out of range")
+            slot = self._slot(key)
+            dstart, dstop = self._items[slot]
+            if dstop-dstart == (len(data) if hasattr(data, "__len__") else 1):
+                self._data[dstart:dstop] = data
+                return
+        self.compact()
+
         if isinstance(key, (int,slice)):
             if isinstance(key, int):
                 if key < 0:
@@ -240,6 +551,18 @@ class ArrayList(object):
         if not self._sizeable:
             raise AttributeError("List is not sizeable")
 
+        # Several items are deleted in a single pass (using compaction)
+        if isinstance(key, (list, np.ndarray)):
+            self._tombstone(key)
+            if not self._tombstones:
+                self.compact()
+            return
+
+        if self._tombstones and key is not Ellipsis:
+            self._tombstone(key)
+            return
+        self.compact()
+
         # Deleting a single item
         if isinstance(key, int):
             if key < 0:
@@ -273,6 +596,7 @@ class ArrayList(object):
         self._data[
             dstart:dstart + self._size - dstop] = self._data[dstop:self._size]
         self._size -= dstop - dstart
+        self._version += 1
 
         # Remove corresponding items
         size = self._count - istop
@@ -280,10 +604,55 @@ class ArrayList(object):
 
         # Update other items
         size = dstop - dstart
-        self._items[istart:istop + size + 1] -= size, size
+        self._items[istart:self._count - (istop - istart)] -= size
         self._count -= istop - istart
 
 
+    def _tombstone(self, key):
+        """ Mark item(s) at key as deleted """
+
+        if isinstance(key, int):
+            if key < 0:
+                key += len(self)
+            if key < 0 or key >= len(self):
+                raise IndexError("List deletion index out of range")
+            slots = self._slot(key)
+            start, count = key, 1
+        elif isinstance(key, slice):
+            istart, istop, step = key.indices(len(self))
+            if istart > istop:
+                istart, istop = istop, istart
+            if istart == istop:
+                return
+            if self._deleted:
+                slots = self._live_items()[istart:istop]
+            else:
+                slots = slice(istart, istop)
+            start, count = istart, istop - istart
+        elif isinstance(key, (list, np.ndarray)):
+            keys, slots = self._slots(key)
+            slots = np.unique(slots)
+            count = len(slots)
+            self._dead[slots] = True
+            self._deleted += count
+            self._ranges = None
+            if self._live is not None:
+                self._live = np.delete(self._live, np.unique(keys))
+            return
+        else:
+            raise TypeError("List deletion indices must be integers")
+
+        self._dead[slots] = True
+        self._deleted += count
+        self._ranges = None
+
+        # Update living items in place (faster than recomputing them)
+        if self._live is not None:
+            live, size = self._live, len(self._live) - count
+            live[start:size] = live[start+count:]
+            self._live = live[:size]
+
+
     def insert(self, index, data, itemsize=None):
         """ Insert data before index
 
@@ -336,12 +705,12 @@ class ArrayList(object):
         # Check if data array is big enough and resize it if necessary
         if self._size + size >= self._data.size:
             capacity = int(2 ** np.ceil(np.log2(self._size + size)))
-            self._data = np.resize(self._data, capacity)
+            self._reserve_data(capacity)
 
         # Check if item array is big enough and resize it if necessary
         if self._count + _count >= len(self._items):
             capacity = int(2 ** np.ceil(np.log2(self._count + _count)))
-            self._items = np.resize(self._items, (capacity, 2))
+            self._reserve_items(capacity)
 
         # Check index
         if index < 0:
@@ -349,6 +718,15 @@ class ArrayList(object):
         if index < 0 or index > len(self):
             raise IndexError("List insertion index out of range")
 
+        # Appending after deleted items does not require compaction
+        if self._deleted:
+            if index < len(self):
+                self.compact()
+            else:
+                index = self._count
+        self._live = None
+        self._ranges = None
+
         # Inserting
         if index < self._count:
             istart = index
@@ -360,6 +738,7 @@ class ArrayList(object):
             # Update moved items
             I = self._items[istart:self._count] + size
             self._items[istart + _count:self._count + _count] = I
+            self._version += 1
 
         # Appending
         else:
@@ -8,14 +8,28 @@ A collection is a container for several (optionally indexed) objects having
 the same vertex structure (vtype) and same uniforms type (utype). A collection
 allows to manipulate objects individually and each object can have its own set
 of uniforms provided they are a combination of floats.
+
+When tombstones are enabled, deleted items are not removed from buffers but
+skipped at draw time (using draw ranges) until the collection is compacted,
+either explicitly or when a whole field is accessed.
+
+When a filename is given, vertices, indices and uniforms are stored on disk
+(see ArrayList) in filename.vertices, filename.indices and filename.uniforms
+and an existing collection is reopened from these files.
+
+Each item has an axis aligned bounding box (in the xy plane) computed from its
+vertex positions. Boxes are computed for new items only and for items that
+have been modified through the collection such that items outside a view can
+be skipped at draw time.
 """
 import math
 import numpy as np
 from glumpy import gl
+from glumpy.gloo.globject import damage
 from glumpy.gloo.texture import Texture2D
 from glumpy.gloo.buffer import VertexBuffer, IndexBuffer
 from . util import dtype_reduce
-from . array_list import ArrayList
+from . array_list import ArrayList, _merge
 
 
 def next_power_of_2(n):
@@ -72,6 +86,7 @@ class Item(object):
     @vertices.setter
     def vertices(self, data):
         self._vertices[...] = np.array(data)
+        self._parent._invalidate_bounds(self._key)
 
 
     @property
@@ -115,6 +130,7 @@ class Item(object):
 
         if key in self._vertices.dtype.names:
             self._vertices[key] = value
+            self._parent._invalidate_bounds(self._key)
         elif key in self._uniforms.dtype.names:
             self._uniforms[key] = value
         else:
@@ -129,7 +145,11 @@ class Item(object):
 
 class BaseCollection(object):
 
-    def __init__(self, vtype, utype=None, itype=None):
+    # Vertex fields used to compute item bounding boxes
+    _position_fields = ('position', 'P', 'P0', 'P1', 'p0', 'p1', 'p2', 'p3',
+                        'prev', 'curr', 'next')
+
+    def __init__(self, vtype, utype=None, itype=None, filename=None):
 
         # Vertices and type (mandatory)
         self._vertices_list = None
@@ -158,7 +178,8 @@ class BaseCollection(object):
         if itype is not None:
             if itype not in [np.uint8, np.uint16, np.uint32]:
                 raise ValueError("itype must be unsigned integer or None")
-            self._indices_list = ArrayList(dtype=itype)
+            self._indices_list = ArrayList(dtype=itype,
+                                           filename=self._filename(filename, "indices"))
 
         # No program yet
         self._program = None
@@ -194,7 +215,8 @@ class BaseCollection(object):
             if (count - r_utype[1]) > 0:
                 utype.append(('__unused__', 'f4', count-r_utype[1]))
 
-            self._uniforms_list  = ArrayList(dtype=utype)
+            self._uniforms_list  = ArrayList(dtype=utype,
+                                             filename=self._filename(filename, "uniforms"))
             self._uniforms_float_count = count
 
             # Reserve some space in texture such that we have
@@ -203,7 +225,8 @@ class BaseCollection(object):
             self._uniforms_list.reserve( shape[1] / (count/4) )
 
         # Last since utype may add a new field in vtype (collecion_index)
-        self._vertices_list = ArrayList(dtype=vtype)
+        self._vertices_list = ArrayList(dtype=vtype,
+                                        filename=self._filename(filename, "vertices"))
 
 
         # Record all types
@@ -211,6 +234,16 @@ class BaseCollection(object):
         self._itype = np.dtype(itype) if itype is not None else None
         self._utype = np.dtype(utype) if utype is not None else None
 
+        # Item bounding boxes (computed on demand, see _item_bounds)
+        self._bounds = None
+        self._bounds_count = 0
+        self._bounds_version = None
+        self._bounds_dirty = []
+        self._bounds_fields = [name for name in self._position_fields
+                               if name in self._vtype.names and
+                               self._vtype[name].shape[-1:] in [(2,), (3,), (4,)]]
+        self._culled = None
+
 
 
     def __len__(self):
@@ -219,6 +252,33 @@ class BaseCollection(object):
         return len(self._vertices_list)
 
 
+    def _filename(self, filename, name):
+        """ Filename of a list (None if collection is in memory) """
+
+        if filename is None:
+            return None
+        return "%s.%s" % (filename, name)
+
+
+    def flush(self):
+        """ Write any change to disk (file backed collection only) """
+
+        self.compact()
+        for L in self._vertices_list, self._indices_list, self._uniforms_list:
+            if L is not None:
+                L.flush()
+
+
+    def save(self, filename):
+        """ Save collection such that it can be reopened using filename """
+
+        self.compact()
+        for name in "vertices", "indices", "uniforms":
+            L = getattr(self, "_%s_list" % name)
+            if L is not None:
+                L.save(self._filename(filename, name))
+
+
     @property
     def vtype(self):
         """ Vertices dtype """
@@ -240,6 +300,161 @@ class BaseCollection(object):
         return self._utype
 
 
+    @property
+    def tombstones(self):
+        """ Whether deleted items are kept (and hidden) until compaction """
+
+        return self._vertices_list.tombstones
+
+
+    @tombstones.setter
+    def tombstones(self, value):
+        if not value:
+            self.compact()
+        for L in self._vertices_list, self._indices_list, self._uniforms_list:
+            if L is not None:
+                L.tombstones = value
+
+
+    @property
+    def deleted(self):
+        """ Number of deleted items waiting for compaction """
+
+        return self._vertices_list.deleted
+
+
+    def compact(self):
+        """ Remove deleted items (in a single pass over each buffer) """
+
+        V = self._vertices_list
+        if not V.deleted:
+            return
+
+        # Number of deleted vertices before each vertex and new item indices
+        dead = V._dead[:V._count]
+        sizes = V._items[:V._count,1] - V._items[:V._count,0]
+        offsets = np.repeat(dead, sizes).cumsum()
+        index = (~dead).cumsum() - 1
+
+        V.compact()
+        if self.itype is not None:
+            self._indices_list.compact()
+            I = self._indices_list.data
+            I -= offsets[I].astype(self.itype)
+        if self.utype is not None:
+            self._uniforms_list.compact()
+            C = V.data["collection_index"]
+            V.data["collection_index"] = index[C.astype(int)]
+
+        self._need_update = True
+        damage()
+
+
+    def _ranges(self, view=None):
+        """
+        Draw ranges of living items (None if there is no deleted item). If a
+        view (xmin, ymin, xmax, ymax) is given, only items whose bounding box
+        intersects the view are drawn.
+        """
+
+        B = self._item_bounds() if view is not None else None
+        if B is None:
+            if not self.deleted:
+                return None
+            if self._indices_list is not None:
+                return self._indices_list.ranges
+            return self._vertices_list.ranges
+
+        # Ranges are cached as long as view and items are the same
+        V = self._vertices_list
+        key = tuple(view), V._version, V._count, V.deleted, self._bounds_count
+        if self._culled is not None and self._culled[0] == key:
+            return self._culled[1]
+        xmin, ymin, xmax, ymax = view
+        visible = ((B[:, 0] <= xmax) & (B[:, 2] >= xmin) &
+                   (B[:, 1] <= ymax) & (B[:, 3] >= ymin))
+        if V.deleted:
+            visible &= ~V._dead[:V._count]
+        L = self._indices_list if self._indices_list is not None else V
+        ranges = _merge(L._items[:V._count][visible])
+        self._culled = key, ranges
+        return ranges
+
+
+    @property
+    def bounds(self):
+        """ Bounding boxes (xmin, ymin, xmax, ymax) of items """
+
+        B = self._item_bounds()
+        if B is None:
+            raise ValueError("Collection vertices have no position")
+        V = self._vertices_list
+        if V.deleted:
+            return B[V._live_items()]
+        return B.copy()
+
+
+    def _invalidate_bounds(self, key=None):
+        """ Bounding box of item key (or of all items) must be recomputed """
+
+        if key is None:
+            self._bounds_count = 0
+            self._bounds_dirty = []
+        else:
+            self._bounds_dirty.append(self._vertices_list._slot(key))
+        self._culled = None
+
+
+    def _item_bounds(self):
+        """ Bounding boxes of item slots (None if vertices have no position) """
+
+        if not self._bounds_fields:
+            return None
+        V = self._vertices_list
+        if self._bounds_version != V._version:
+            self._bounds_version = V._version
+            self._bounds_count = 0
+            self._bounds_dirty = []
+        count = V._count
+        if self._bounds is None or len(self._bounds) < count:
+            bounds = np.zeros((len(V._items), 4), dtype=np.float32)
+            if self._bounds is not None:
+                bounds[:self._bounds_count] = self._bounds[:self._bounds_count]
+            self._bounds = bounds
+        if self._bounds_dirty:
+            slots = [slot for slot in set(self._bounds_dirty)
+                     if slot < self._bounds_count]
+            self._bounds_dirty = []
+            for slot in slots:
+                self._bounds[slot] = self._compute_bounds(slot, slot+1)
+        if self._bounds_count < count:
+            start = self._bounds_count
+            self._bounds[start:count] = self._compute_bounds(start, count)
+            self._bounds_count = count
+            self._culled = None
+        return self._bounds[:count]
+
+
+    def _compute_bounds(self, start, stop):
+        """ Bounding boxes of item slots [start, stop) """
+
+        items = self._vertices_list._items[start:stop]
+        data = self._vertices_list._data[items[0, 0]:items[-1, 1]]
+        bounds = np.empty((stop - start, 4), dtype=np.float32)
+        bounds[:, :2], bounds[:, 2:] = +np.inf, -np.inf
+        if not len(data):
+            return bounds
+        # Empty items get the box of their next vertex (harmless)
+        starts = np.minimum(items[:, 0] - items[0, 0], len(data) - 1)
+        for name in self._bounds_fields:
+            P = data[name].reshape(len(data), -1)[:, :2]
+            bounds[:, :2] = np.minimum(bounds[:, :2],
+                                       np.minimum.reduceat(P, starts, axis=0))
+            bounds[:, 2:] = np.maximum(bounds[:, 2:],
+                                       np.maximum.reduceat(P, starts, axis=0))
+        return bounds
+
+
     def append(self, vertices, uniforms=None, indices=None, itemsize=None):
         """
         Parameters
@@ -292,7 +507,7 @@ class BaseCollection(object):
             raise ValueError("Itemsize not understood")
 
         if self.utype:
-            vertices["collection_index"] = index + len(self)
+            vertices["collection_index"] = index + len(self) + self.deleted
         self._vertices_list.append(vertices, itemsize)
 
 
@@ -326,6 +541,103 @@ class BaseCollection(object):
             self._uniforms_list.append(uniforms, itemsize=1)
 
         self._need_update = True
+        damage()
+
+
+    def extend(self, columns, sizes=1, indices=None):
+        """
+        Append many items at once from columns of data.
+
+        Parameters
+        ----------
+
+        columns : dict or structured numpy array
+            Values indexed by field name. Vertex fields (vtype) are given
+            per vertex while uniform fields (utype) are given per item. Values
+            are broadcasted such that a single value can be given for all
+            vertices (or items). Missing fields are set to zero.
+
+        sizes: int or 1-D array
+            Number of vertices of each item. If `sizes` is an integer, N,
+            vertices are divided into items of size N.
+
+        indices : numpy array
+            Indices local to each item, either as a 1-D array common to all
+            items or as a (count,n) array giving the indices of each item.
+            If None and collection is indexed, indices are generated.
+        """
+
+        if not isinstance(columns, dict):
+            columns = np.asarray(columns)
+            columns = dict((name, columns[name]) for name in columns.dtype.names)
+        for name in columns.keys():
+            if name not in self.vtype.names and (self.utype is None or
+                                                 name not in self.utype.names):
+                raise IndexError("Unknown field name ('%s')" % name)
+
+        # Item sizes
+        # -----------------------------
+        if isinstance(sizes, (int, np.integer)):
+            size = 0
+            for name in self.vtype.names:
+                if name in columns and np.ndim(columns[name]) > len(self.vtype[name].shape):
+                    size = len(columns[name])
+                    break
+            if sizes <= 0 or size % sizes:
+                raise ValueError("Cannot partition data as requested")
+            sizes = np.ones(size // sizes, dtype=int) * sizes
+        else:
+            sizes = np.asarray(sizes, dtype=int).ravel()
+        count = len(sizes)
+        if count == 0:
+            return
+        starts = np.zeros(count, dtype=int)
+        starts[1:] = sizes.cumsum()[:-1]
+        size = starts[-1] + sizes[-1]
+
+        # Vertices
+        # -----------------------------
+        vertices = np.zeros(size, dtype=self.vtype)
+        for name in self.vtype.names:
+            if name in columns:
+                vertices[name] = columns[name]
+        if self.utype:
+            start = len(self) + self.deleted
+            vertices["collection_index"] = np.repeat(np.arange(start,
+                                                     start+count), sizes)
+        vsize = self._vertices_list.size
+        self._vertices_list.append(vertices, sizes)
+
+        # Indices
+        # -----------------------------
+        if self.itype is not None:
+            if indices is None:
+                I = vsize + np.arange(size)
+                isizes = sizes
+            else:
+                indices = np.asarray(indices)
+                if indices.ndim == 1:
+                    isizes = np.ones(count, dtype=int) * len(indices)
+                    I = (np.tile(indices, count) +
+                         np.repeat(vsize + starts, len(indices)))
+                elif indices.ndim == 2 and len(indices) == count:
+                    isizes = np.ones(count, dtype=int) * indices.shape[1]
+                    I = (indices + (vsize + starts)[:,np.newaxis]).ravel()
+                else:
+                    raise ValueError("Indices not compatible with items")
+            self._indices_list.append(I.astype(self.itype), isizes)
+
+        # Uniforms
+        # -----------------------------
+        if self.utype:
+            uniforms = np.zeros(count, dtype=self.utype)
+            for name in self.utype.names:
+                if name in columns:
+                    uniforms[name] = columns[name]
+            self._uniforms_list.append(uniforms, itemsize=1)
+
+        self._need_update = True
+        damage()
 
 
 
@@ -349,10 +661,31 @@ class BaseCollection(object):
         # Deleting everything
         elif index is Ellipsis:
             istart, istop = 0, len(self)
+        # Deleting a set of items (index array or boolean mask) as tombstones
+        # that are removed in a single pass unless tombstones are enabled
+        elif isinstance(index, (list, np.ndarray)):
+            tombstones = self.tombstones
+            self.tombstones = True
+            for L in self._vertices_list, self._indices_list, self._uniforms_list:
+                if L is not None:
+                    del L[index]
+            self.tombstones = tombstones
+            damage()
+            return
         # Error
         else:
             raise TypeError("Collection deletion indices must be integers")
 
+        # Deleted items are only hidden (buffers are left untouched)
+        if self.tombstones:
+            for L in self._vertices_list, self._indices_list, self._uniforms_list:
+                if L is not None:
+                    del L[index]
+            if index is Ellipsis:
+                self._need_update = True
+            damage()
+            return
+
         vsize = len(self._vertices_list[index])
         if self.itype is not None:
             del self._indices_list[index]
@@ -366,6 +699,7 @@ class BaseCollection(object):
             del self._uniforms_list[index]
 
         self._need_update = True
+        damage()
 
 
 
@@ -375,6 +709,8 @@ class BaseCollection(object):
         # WARNING
         # Here we want to make sure to use buffers and texture (instead of
         # lists) since only them are aware of any external modification.
+        if self.deleted and isinstance(key, str):
+            self.compact()
         if self._need_update:
             self._update()
 
@@ -402,20 +738,26 @@ class BaseCollection(object):
 
         # Getting individual item
         elif isinstance(key, int):
-            vstart, vend = self._vertices_list._items[key]
+            slot = self._vertices_list._slot(key)
+            vstart, vend = self._vertices_list._items[slot]
             vertices = V[vstart:vend]
             indices = None
             uniforms = None
             if I is not None:
-                istart, iend = self._indices_list._items[key]
+                istart, iend = self._indices_list._items[slot]
                 indices  = I[istart:iend]
 
             if U is not None:
-                ustart, uend = self._uniforms_list._items[key]
+                ustart, uend = self._uniforms_list._items[slot]
                 uniforms  = U[ustart:uend]
 
             return Item(self, key, vertices, indices, uniforms)
 
+        # Getting several items (index array or boolean mask)
+        elif isinstance(key, (list, np.ndarray)):
+            keys, slots = self._vertices_list._slots(key)
+            return [self[int(k)] for k in keys]
+
         # Error
         else:
             raise IndexError("Cannot get more than one item at once")
@@ -427,6 +769,8 @@ class BaseCollection(object):
         # WARNING
         # Here we want to make sure to use buffers and texture (instead of
         # lists) since only them are aware of any external modification.
+        if self.deleted and isinstance(key, str):
+            self.compact()
         if self._need_update:
             self._update()
 
@@ -443,6 +787,8 @@ class BaseCollection(object):
             # Setting a named field in vertices
             if key in self.vtype.names:
                 V[key] = data
+                if key in self._bounds_fields:
+                    self._invalidate_bounds()
             # Setting a named field in uniforms
             elif self.utype and key in self.utype.names:
                 # Careful, U is the whole texture that can be bigger than list
@@ -471,7 +817,7 @@ class BaseCollection(object):
         # linesize = gl.glGetInteger(gl.GL_MAX_TEXTURE_SIZE)
         linesize = 1024
         count = self._uniforms_float_count
-        cols = linesize // float(count/4)
+        cols = int(linesize // float(count/4))
         rows = max(1,int(math.ceil(size / float(cols))))
         shape = rows, cols*(count/4), count
         self._ushape = shape
@@ -510,6 +856,8 @@ class BaseCollection(object):
                 self._program["uniforms"] = self._uniforms_texture
                 self._program["uniforms_shape"] = self._ushape
 
+        self._need_update = False
+
 
 
 # -----------------------------------------------------------------------------
@@ -532,6 +880,10 @@ if __name__ == '__main__':
     V = np.zeros(3*50000,dtype=vtype)
     C.append(V,itemsize=3*np.ones(50000,dtype=int))
 
+    C = BaseCollection(vtype, utype, itype)
+    C.extend({"value"   : np.zeros((3*50000,2)),
+              "value_1" : np.ones((50000,3))}, 3, indices=[0,1,2])
+
     # C = BaseCollection(vtype, utype, itype)
     # V = np.zeros(3,dtype=vtype)
     # for i in range(5):
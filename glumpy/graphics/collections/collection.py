@@ -12,9 +12,11 @@ interface.
 """
 
 import os
+import re
 import numpy as np
-from glumpy import gl
+from glumpy import gl, library
 from glumpy.gloo.program import Program
+from glumpy.transforms import Transform
 from . util import fetchcode
 from . base_collection import BaseCollection
 
@@ -46,6 +48,25 @@ class Collection(BaseCollection):
     fragment:  str or tuple of str
        Fragment shader to use to draw this collection
 
+    filename: str
+        Filename where data is stored (see BaseCollection)
+
+    picking: bool
+        Whether collection can be picked (see Picker). This requires the
+        GL_EXT_gpu_shader4 extension. Items are identified by their index
+        (at most 2^24 items) or, if the collection has no shared attribute,
+        by their vertices (at most 2^24 vertices).
+
+    culling: bool or float
+        Whether items whose bounding box is outside of the view are skipped
+        when drawing. The view is computed by inverting the collection
+        transform, which must hence have a CPU inverse and be separable (e.g.
+        orthographic projection, pan & zoom or scales but not polar or
+        perspective transforms, for which culling is ignored). The view is
+        enlarged by a margin (in normalized device coordinates) to account for
+        item extents not described by their vertices (e.g. marker size or line
+        width). True means a margin of 0.1, a float gives the margin.
+
     kwargs: str
         Scope can also be specified using keyword argument,
         where parameter name must be one of the dtype.
@@ -60,7 +81,8 @@ class Collection(BaseCollection):
                 ('int32', 3)   : "ivec3",
                 ('int32', 4)   : "ivec4" }
 
-    def __init__(self, dtype, itype, mode, vertex, fragment, geometry=None, **kwargs):
+    def __init__(self, dtype, itype, mode, vertex, fragment, geometry=None,
+                 filename=None, picking=False, culling=False, **kwargs):
         """
         """
 
@@ -68,6 +90,7 @@ class Collection(BaseCollection):
         self._attributes = {}
         self._varyings = {}
         self._mode = mode
+        self.culling = culling
         vtype = []
         utype = []
 
@@ -99,7 +122,8 @@ class Collection(BaseCollection):
         itype = np.dtype(itype) if itype else None
         utype = np.dtype(utype) if utype else None
 
-        BaseCollection.__init__(self, vtype=vtype, utype=utype, itype=itype)
+        BaseCollection.__init__(self, vtype=vtype, utype=utype, itype=itype,
+                                filename=filename)
         self._declarations = declarations
         self._defaults = defaults
 
@@ -115,12 +139,99 @@ class Collection(BaseCollection):
         vertex += self._declarations["attributes"]
         vertex += saved
 
+        # Wrap shaders such that collection can be rendered for picking
+        self._picking = picking
+        if picking:
+            if geometry is not None:
+                raise ValueError("Picking is not supported with geometry shader")
+            if self.utype is not None:
+                vertex = "#define PICK_COLLECTION_INDEX\n" + vertex
+            vertex = self._pick_code(vertex, "collections/pick.vert")
+            fragment = self._pick_code(library.get(fragment), "collections/pick.frag")
+
         self._program = Program(vertex, fragment, geometry)
 
         # Initialize uniforms
         for name in self._uniforms.keys():
             self._uniforms[name] = self._defaults.get(name)
             self._program[name] = self._uniforms[name]
+        if picking:
+            self._program["pick_mode"] = 0
+
+
+    @property
+    def culling(self):
+        """ Margin of view culling (False if culling is disabled) """
+        return self._culling
+
+    @culling.setter
+    def culling(self, value):
+        """ Enable/disable view culling """
+        if value is True:
+            value = 0.1
+        self._culling = value
+
+
+    def _view(self):
+        """ View bounds (xmin, ymin, xmax, ymax) in data coordinates or None """
+
+        if "transform" not in self._program._hooks.keys():
+            return None
+        transform = self._program["transform"]
+        if not isinstance(transform, Transform) or not transform.separable:
+            return None
+        m = 1.0 + self._culling
+        P = [[-m,-m,0,1], [+m,-m,0,1], [-m,+m,0,1], [+m,+m,0,1]]
+        try:
+            P = transform.inverse(P)
+        except (NotImplementedError, np.linalg.LinAlgError):
+            return None
+        if not np.isfinite(P[:,:2]).all():
+            return None
+        return P[:,0].min(), P[:,1].min(), P[:,0].max(), P[:,1].max()
+
+
+    @property
+    def picking(self):
+        """ Whether collection can be picked """
+
+        return self._picking
+
+
+    def _set_pick_mode(self, mode):
+        """ Set picking mode (without damaging the window) """
+
+        self._program._uniforms["pick_mode"].set_data(mode)
+
+
+    def _pick_code(self, code, wrapper):
+        """ Rename main function of code and append the picking wrapper """
+
+        code, count = re.subn(r"void\s+main\s*\(", "void pick_main(", code)
+        if count != 1:
+            raise ValueError("Cannot find main function in shader code")
+        return ("#extension GL_EXT_gpu_shader4 : enable\n" + code +
+                library.get(wrapper))
+
+
+    def extend(self, columns, sizes=1, indices=None):
+        """
+        Append many items at once from columns of data, fields that are not
+        given being set to their default value (see BaseCollection.extend).
+        """
+
+        if not isinstance(columns, dict):
+            columns = np.asarray(columns)
+            columns = dict((name, columns[name]) for name in columns.dtype.names)
+        else:
+            columns = dict(columns)
+        names = list(self.vtype.names)
+        if self.utype is not None:
+            names += list(self.utype.names)
+        for name in names:
+            if name not in columns and self._defaults.get(name) is not None:
+                columns[name] = self._defaults[name]
+        BaseCollection.extend(self, columns, sizes, indices)
 
 
     def __getitem__(self, key):
@@ -147,7 +258,9 @@ class Collection(BaseCollection):
             self._update()
 
         mode = mode or self._mode
+        view = self._view() if self._culling is not False else None
+        ranges = self._ranges(view)
         if self._indices_list is not None:
-            self._program.draw(mode, self._indices_buffer)
+            self._program.draw(mode, self._indices_buffer, ranges)
         else:
-            self._program.draw(mode)
+            self._program.draw(mode, ranges=ranges)
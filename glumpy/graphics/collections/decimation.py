@@ -0,0 +1,240 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright (c) 2014, Nicolas P. Rougier. All rights reserved.
+# Distributed under the terms of the new BSD License.
+# -----------------------------------------------------------------------------
+"""
+Zoom adaptive min/max (M4) decimation of large series.
+
+For a given x range and a given width (in pixels), M4 decimation keeps the
+first, min, max and last samples of each pixel column. The line strip
+through these samples is rasterized exactly as the line strip through all
+the samples, at a cost of at most 4 vertices per pixel column.
+
+Min and max of a column are found using a min/max pyramid (argmin/argmax of
+blocks of samples at power-of-two levels) such that decimation cost depends
+on the number of columns and not on the number of visible samples.
+
+NaN samples are missing values: they are never min or max of a column unless
+all samples of the column are NaN (the first sample is then kept).
+
+Example usage:
+--------------
+
+  m4 = M4(y)   # x = 0, 1, 2, ...
+
+  @window.event
+  def on_draw(dt):
+      P = m4.update(program["transform"], window.width)
+      if P is not None:
+          paths = AggFastPathCollection(...)
+          paths.append(P)
+"""
+import numpy as np
+from glumpy.transforms import Transform
+from . array_list import _gather
+
+
+def _argreduce(Y, starts, sizes, function):
+    """
+    Position (in Y) of min or max (function is np.fmin or np.fmax) of each
+    (non empty) group of Y, ignoring NaN (first of group if all NaN)
+    """
+
+    values = function.reduceat(Y, starts)
+    position = np.arange(len(Y))
+    position = np.where(Y == np.repeat(values, sizes), position, len(Y))
+    position = np.minimum.reduceat(position, starts)
+    return np.where(position < len(Y), position, starts)
+
+
+def _replaces(function, Y, V):
+    """ Whether Y is a new min or max (function is np.fmin or np.fmax) of V """
+
+    values = function(Y, V)
+    return (values == Y) & (values != V)
+
+
+class M4(object):
+    """ M4 decimation of a series
+
+    Parameters
+    ----------
+
+    y : np.array
+        Series values (may be a memory mapped array)
+
+    x : np.array or None
+        Sorted (increasing) series abscissa. Default is 0, 1, 2, ...
+
+    blocksize : int
+        Size of the smallest block of the min/max pyramid. Pyramid takes
+        about 32/blocksize bytes per sample.
+    """
+
+    def __init__(self, y, x=None, blocksize=64):
+        if x is not None and len(x) != len(y):
+            raise ValueError("x and y must have same size")
+        self._y = y
+        self._x = x
+        self._blocksize = int(blocksize)
+        self._view = None
+        self._levels = self._build()
+
+
+    @property
+    def count(self):
+        """ Number of samples """
+
+        return len(self._y)
+
+
+    def _build(self):
+        """ Build min/max pyramid (argmin and argmax of blocks) """
+
+        y, size = self._y, self._blocksize
+        n = len(y) // size
+        levels = []
+        if not n:
+            return levels
+        Y = np.asarray(y[:n*size]).reshape(n, size)
+        start = np.arange(n)*size
+
+        # First min/max of blocks (first sample of all NaN blocks)
+        vmin = np.fmin.reduce(Y, axis=1).reshape(n, 1)
+        vmax = np.fmax.reduce(Y, axis=1).reshape(n, 1)
+        levels.append((start + (Y == vmin).argmax(axis=1),
+                       start + (Y == vmax).argmax(axis=1)))
+        while len(levels[-1][0]) > 1:
+            imin, imax = levels[-1]
+            n = len(imin)//2
+            a, b = imin[0:2*n:2], imin[1:2*n:2]
+            imin = np.where(_replaces(np.fmin, y[b], y[a]), b, a)
+            a, b = imax[0:2*n:2], imax[1:2*n:2]
+            imax = np.where(_replaces(np.fmax, y[b], y[a]), b, a)
+            levels.append((imin, imax))
+        return levels
+
+
+    def _columns(self, xmin, xmax, width):
+        """ Index of first sample of each column (and of last column end) """
+
+        t = np.linspace(xmin, xmax, width+1)
+        if self._x is None:
+            return np.clip(np.ceil(t), 0, self.count).astype(int)
+        return np.searchsorted(self._x, t, side="left")
+
+
+    def _minmax(self, start, stop):
+        """ Index of min and max sample of ranges [start,stop) """
+
+        y, size = self._y, self._blocksize
+        imin, imax = start.copy(), start.copy()
+        vmin, vmax = y[imin], y[imax]
+
+        def merge(select, index):
+            Y = y[index]
+            lower = _replaces(np.fmin, Y, vmin[select])
+            imin[select[lower]], vmin[select[lower]] = index[lower], Y[lower]
+            upper = _replaces(np.fmax, Y, vmax[select])
+            imax[select[upper]], vmax[select[upper]] = index[upper], Y[upper]
+
+        # Block range covering [start,stop) (bstart >= bstop if none)
+        bstart = (start + size - 1) // size
+        bstop = np.minimum(stop // size, len(self._levels[0][0])
+                           if self._levels else 0)
+        bstop = np.maximum(bstop, bstart)
+
+        # Samples outside of complete blocks, searched sample by sample
+        edges = [(start, np.minimum(bstart*size, stop)),
+                 (np.maximum(bstop*size, start), stop)]
+        for first, last in edges:
+            select = np.flatnonzero(last > first)
+            if not len(select):
+                continue
+            first, sizes = first[select], (last - first)[select]
+            index = _gather(first, sizes)
+            starts = sizes.cumsum() - sizes
+            Y = np.asarray(y[index])
+            merge(select, index[_argreduce(Y, starts, sizes, np.fmin)])
+            merge(select, index[_argreduce(Y, starts, sizes, np.fmax)])
+
+        # Complete blocks, searched level by level (as in a segment tree)
+        for lmin, lmax in self._levels:
+            select = np.flatnonzero(bstart < bstop)
+            if not len(select):
+                break
+            take = select[bstart[select] & 1 == 1]
+            merge(take, lmin[bstart[take]])
+            merge(take, lmax[bstart[take]])
+            bstart[take] += 1
+            take = select[(bstop[select] & 1 == 1) &
+                          (bstart[select] < bstop[select])]
+            bstop[take] -= 1
+            merge(take, lmin[bstop[take]])
+            merge(take, lmax[bstop[take]])
+            bstart //= 2
+            bstop //= 2
+        return imin, imax
+
+
+    def indices(self, xmin, xmax, width):
+        """
+        Indices of samples to be drawn for range [xmin,xmax] over width
+        pixels (first, min, max and last sample of each pixel column and
+        nearest samples outside of range). All samples in range are kept
+        when there are no more than 4 samples per column.
+        """
+
+        width = max(int(width), 1)
+        bounds = self._columns(xmin, xmax, width)
+
+        # Not enough samples for decimation to be worth it
+        if bounds[-1] - bounds[0] <= 4*width:
+            return np.arange(max(bounds[0]-1, 0), min(bounds[-1]+1, self.count))
+
+        start, stop = bounds[:-1], bounds[1:]
+        select = stop > start
+        start, stop = start[select], stop[select]
+        imin, imax = self._minmax(start, stop)
+        I = np.sort(np.column_stack([start, imin, imax, stop-1]), axis=1)
+        I = np.r_[bounds[0]-1, I.ravel(), bounds[-1]]
+        I = I[(I >= 0) & (I < self.count)]
+        if len(I) > 1:
+            I = I[np.r_[True, I[1:] != I[:-1]]]
+        return I
+
+
+    def decimate(self, xmin, xmax, width):
+        """ Decimated (x,y) positions for range [xmin,xmax] over width pixels """
+
+        I = self.indices(xmin, xmax, width)
+        P = np.empty((len(I), 2), dtype=np.float32)
+        P[:, 0] = I if self._x is None else self._x[I]
+        P[:, 1] = self._y[I]
+        return P
+
+
+    def view(self, transform):
+        """ Visible x range (xmin, xmax) through transform """
+
+        P = transform.inverse([[-1,0,0,1], [+1,0,0,1]])
+        xmin, xmax = P[:, 0]
+        return min(xmin, xmax), max(xmin, xmax)
+
+
+    def update(self, transform, width):
+        """
+        Decimated (x,y) positions for the view of transform (e.g. a PanZoom)
+        over width pixels or None if view did not change since last update.
+        """
+
+        if isinstance(transform, Transform):
+            xmin, xmax = self.view(transform)
+        else:
+            xmin, xmax = transform
+        view = float(xmin), float(xmax), int(width)
+        if view == self._view:
+            return None
+        self._view = view
+        return self.decimate(*view)
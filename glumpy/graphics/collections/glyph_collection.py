@@ -5,6 +5,8 @@
 # -----------------------------------------------------------------------------
 import numpy as np
 from glumpy import gl, data, library
+from glumpy.gloo.atlas import PagedAtlas
+from glumpy.transforms import Position3D
 from glumpy.graphics.text import Font, FontManager
 from . collection import Collection
 
@@ -15,6 +17,7 @@ class GlyphCollection(Collection):
     def __init__(self, transform=None, **kwargs):
         dtype = [('position',  (np.float32, 2), '!local', (0,0)),
                  ('texcoord',  (np.float32, 2), '!local', (0,0)),
+                 ('page',      (np.float32, 1), '!local', 0),
                  ('origin',    (np.float32, 3), 'shared', (0,0,0)),
                  ('direction', (np.float32, 3), 'shared', (1,0,0)),
                  ('scale',     (np.float32, 1), 'shared', 0.005),
@@ -35,6 +38,38 @@ class GlyphCollection(Collection):
         self['atlas_data'] = atlas
         self['atlas_data'].interpolation = gl.GL_LINEAR
         self['atlas_shape'] = atlas.shape[1], atlas.shape[0]
+        self['atlas_page'] = 0
+        self._atlas = atlas
+
+        # Font, text and referenced atlas keys of each label
+        self._labels = []
+
+
+    def _use_atlas(self, atlas):
+        """ Use a paged atlas (its pages are bound in turn when drawing) """
+
+        if atlas is self._atlas:
+            return
+        if isinstance(self._atlas, PagedAtlas):
+            self._atlas.remove_handler(self._on_relocate)
+        self._atlas = atlas
+        atlas.add_handler(self._on_relocate)
+        self['atlas_shape'] = atlas._shape[1], atlas._shape[0]
+
+
+    def _on_relocate(self, key, page, region):
+        """ Update baked texture coordinates of a glyph moved in the atlas """
+
+        filename, charcode = key
+        for index, (font, text, keys) in enumerate(self._labels):
+            if key not in keys:
+                continue
+            u0,v0,u1,v1 = font._texcoords(self._atlas.pages[page], region)
+            V = self[index].vertices
+            text = text.replace('\n', '')
+            for j in [j for j, c in enumerate(text) if c == charcode]:
+                V['texcoord'][4*j:4*j+4] = (u0,v0),(u0,v1),(u1,v1),(u1,v0)
+                V['page'][4*j:4*j+4] = page
 
 
     def append(self, text, font, anchor_x='center', anchor_y='center', **kwargs):
@@ -54,10 +89,22 @@ class GlyphCollection(Collection):
             Text horizontal anchor ('top', 'center', 'bottom')
         """
 
+        # Glyphs of a paged atlas are referenced as long as the label lives
+        # such that they cannot be evicted
+        keys = []
+        if isinstance(font.atlas, PagedAtlas):
+            self._use_atlas(font.atlas)
+            for charcode in set(text) - set('\n'):
+                font[charcode]
+                key = font.filename, charcode
+                if key in font.atlas:
+                    font.atlas.acquire(key)
+                    keys.append(key)
+
         V, I = self.bake(text, font, anchor_x, anchor_y)
 
         defaults = self._defaults
-        reserved = ["collection_index", "position", "texcoord"]
+        reserved = ["collection_index", "position", "texcoord", "page"]
         for name in self.vtype.names:
             if name not in reserved:
                 if name in kwargs.keys() or name in defaults.keys():
@@ -73,6 +120,38 @@ class GlyphCollection(Collection):
             U = None
 
         Collection.append(self, vertices=V, indices=I ,uniforms=U)
+        self._labels.append((font, text, keys))
+
+
+    def __delitem__(self, index):
+        """ x.__delitem__(y) <==> del x[y] """
+
+        deleted = np.atleast_1d(np.arange(len(self._labels))[index])
+        Collection.__delitem__(self, index)
+
+        # Release glyphs of deleted labels
+        for i in deleted:
+            font, text, keys = self._labels[i]
+            for key in keys:
+                font.atlas.release(key)
+        alive = np.ones(len(self._labels), dtype=bool)
+        alive[deleted] = False
+        self._labels = [label for label, keep in zip(self._labels, alive) if keep]
+
+
+    def draw(self, mode=None):
+        """ Draw collection (once per page when using a paged atlas) """
+
+        if not isinstance(self._atlas, PagedAtlas):
+            Collection.draw(self, mode)
+            return
+
+        for index, page in enumerate(self._atlas.pages):
+            if page.interpolation != (gl.GL_LINEAR, gl.GL_LINEAR):
+                page.interpolation = gl.GL_LINEAR
+            self['atlas_data'] = page
+            self['atlas_page'] = index
+            Collection.draw(self, mode)
 
 
     def bake(self, text, font, anchor_x='center', anchor_y='center'):
@@ -115,8 +194,8 @@ class GlyphCollection(Collection):
                 u0, v0, u1, v1 = glyph.texcoords
                 vertices[index]['position'] = (x0,y0),(x0,y1),(x1,y1),(x1,y0)
                 vertices[index]['texcoord'] = (u0,v0),(u0,v1),(u1,v1),(u1,v0)
-                indices[index] = index*4
-                indices[index] += 0,1,2, 0,2,3
+                vertices[index]['page'] = glyph.page
+                indices[index] = index*4 + np.array([0,1,2, 0,2,3])
                 pen[0] = pen[0]+glyph.advance[0] + kerning
                 pen[1] = pen[1]+glyph.advance[1]
                 prev = charcode
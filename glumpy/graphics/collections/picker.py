@@ -0,0 +1,206 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright (c) 2014, Nicolas P. Rougier. All rights reserved.
+# Distributed under the terms of the new BSD License.
+# -----------------------------------------------------------------------------
+"""
+GPU picking for collections.
+
+Collections created with picking=True can be rendered (into an offscreen
+framebuffer) with their item indices (collection_index) encoded as colors.
+The item under the mouse is then found by reading back a few pixels around
+the cursor (which are the only ones to be rendered) and by mapping the item
+slot to an item index, whatever the number of items. Collections without
+collection_index (no shared attribute) encode their vertex indices instead.
+Indices are encoded using 24 bits.
+
+Reading is asynchronous: a pick request is rendered during next draw and its
+result is delivered a few frames later, unless wait is True. Picker requests
+these frames (window invalidation) when the window is drawn on demand.
+
+Example usage:
+--------------
+
+  markers = MarkerCollection(picking=True)
+  picker = Picker(window, [markers], callback=on_pick)
+
+  @window.event
+  def on_mouse_motion(x, y, dx, dy):
+      picker.pick(x, y)
+
+  def on_pick(result):
+      if result is not None:
+          collection, index = result
+"""
+import numpy as np
+from glumpy import gl
+from glumpy.gloo.readback import Readback
+from glumpy.gloo.framebuffer import FrameBuffer, ColorBuffer, DepthBuffer
+
+
+def item(collection, vertex):
+    """ Get index of the item owning vertex (None if it has been deleted) """
+
+    V = collection._vertices_list
+    slot = int(np.searchsorted(V._items[:V._count, 1], vertex, side="right"))
+    return slot_item(collection, slot)
+
+
+def slot_item(collection, slot):
+    """ Get index of the item stored in slot (None if it has been deleted) """
+
+    V = collection._vertices_list
+    if slot >= V._count or V._dead[slot]:
+        return None
+    if V.deleted:
+        return int(np.searchsorted(V._live_items(), slot))
+    return slot
+
+
+
+class Picker(object):
+    """ Collections picker
+
+    Parameters
+    ----------
+
+    window : Window
+        Window where collections are drawn
+
+    collections : list
+        Collections (created with picking=True) that can be picked. When
+        several items overlap, the one from the last collection is picked.
+
+    size : int
+        Size (in pixels) of the region around the cursor where items are
+        searched. The nearest item from the cursor is picked.
+
+    callback : callable
+        Function called with each pick result, i.e. (collection, index) or
+        None when there is no item under the cursor.
+    """
+
+    def __init__(self, window, collections, size=5, callback=None):
+        for collection in collections:
+            if not getattr(collection, "picking", False):
+                raise ValueError("Collection must be created with picking=True")
+        if len(collections) > 255:
+            raise ValueError("Cannot pick more than 255 collections")
+        self._window = window
+        self._collections = list(collections)
+        self._size = size
+        self._callback = callback
+        self._request = None
+        self._requests = []
+        self._result = None
+        self._framebuffer = FrameBuffer(
+            color=ColorBuffer(window.width, window.height, gl.GL_RGBA8),
+            depth=DepthBuffer(window.width, window.height))
+        self._readback = Readback(size, size, gl.GL_RGBA, count=2,
+                                  callback=self._resolve)
+        window.push_handlers(self)
+
+
+    @property
+    def result(self):
+        """ Last pick result, i.e. (collection, index) or None """
+
+        return self._result
+
+
+    def pick(self, x, y, wait=False):
+        """
+        Request the item at (x,y) in window coordinates.
+
+        The request is rendered during next draw (only the last request of a
+        frame is rendered) unless wait is True, in which case it is rendered
+        immediately and its result is returned.
+        """
+
+        if not wait:
+            # Request is rendered during next draw (even in on-demand mode)
+            self._request = x, y
+            self._window.invalidate()
+            return None
+        self._request = None
+        self._render(x, y)
+        self._readback.flush()
+        return self._result
+
+
+    def on_draw(self, dt):
+        """ Deliver available results and render pending request """
+
+        self._readback.poll()
+        if self._request is not None:
+            self._render(*self._request)
+            self._request = None
+
+        # Pending readbacks are delivered during next draws
+        if self._requests:
+            self._window.invalidate()
+
+
+    def on_resize(self, width, height):
+        """ Resize offscreen framebuffer """
+
+        self._framebuffer.resize(width, height)
+
+
+    def _render(self, x, y):
+        """ Render collections around (x,y) and start reading them """
+
+        size = self._size
+        width, height = self._framebuffer.width, self._framebuffer.height
+        x, y = int(x), height - 1 - int(y)
+        x0 = min(max(0, x - size//2), max(0, width - size))
+        y0 = min(max(0, y - size//2), max(0, height - size))
+
+        self._framebuffer.activate()
+        blend = gl.glIsEnabled(gl.GL_BLEND)
+        gl.glDisable(gl.GL_BLEND)
+        gl.glEnable(gl.GL_SCISSOR_TEST)
+        gl.glScissor(x0, y0, size, size)
+        gl.glClearColor(0, 0, 0, 0)
+        gl.glClear(gl.GL_COLOR_BUFFER_BIT | gl.GL_DEPTH_BUFFER_BIT)
+        for i, collection in enumerate(self._collections):
+            # Number of item slots (or vertices) that are encoded
+            V = collection._vertices_list
+            if collection.utype is not None or not V._count:
+                count = V._count
+            else:
+                count = V._items[V._count-1, 1]
+            if count >= 2**24:
+                raise ValueError("Cannot pick more than 2^24 items (or vertices)")
+            collection._set_pick_mode(i+1)
+            collection.draw()
+            collection._set_pick_mode(0)
+        gl.glDisable(gl.GL_SCISSOR_TEST)
+        if blend:
+            gl.glEnable(gl.GL_BLEND)
+        self._readback.read(x0, y0)
+        self._framebuffer.deactivate()
+        self._requests.append((x - x0, y - y0))
+
+
+    def _resolve(self, frame):
+        """ Find item nearest to the cursor in a frame read back """
+
+        x, y = self._requests.pop(0)
+        data = frame[::-1].astype(np.uint32)
+        Y, X = np.nonzero(data[..., 3])
+        if not len(X):
+            result = None
+        else:
+            k = np.argmin((X-x)**2 + (Y-y)**2)
+            r, g, b, a = data[Y[k], X[k]]
+            collection = self._collections[a-1]
+            index = r + (g << 8) + (b << 16) - 1
+            if collection.utype is not None:
+                index = slot_item(collection, index)
+            else:
+                index = item(collection, index)
+            result = None if index is None else (collection, index)
+        self._result = result
+        if self._callback is not None:
+            self._callback(result)
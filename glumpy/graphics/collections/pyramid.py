@@ -0,0 +1,333 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright (c) 2014, Nicolas P. Rougier. All rights reserved.
+# Distributed under the terms of the new BSD License.
+# -----------------------------------------------------------------------------
+"""
+Out-of-core multi-resolution (min/max pyramid) series.
+
+A Pyramid stores samples of a series together with power-of-two levels of
+min/max values: level k holds (min,max) of each block of 2**k samples. Levels
+are updated as samples are appended (at a cost proportional to the number of
+new samples) and can be backed by files (using memory maps) such that neither
+samples nor levels need to fit in memory.
+
+A PyramidLoader feeds a fixed size vertex buffer with the level and the window
+matching the current view such that the cost of a view only depends on its
+width (in pixels) and not on its duration.
+
+Example usage:
+--------------
+
+  pyramid = Pyramid(filename="signal.data")
+  pyramid.append(samples)
+
+  loader = PyramidLoader(pyramid, size=4096)
+  program.bind(loader.buffer)
+
+  @window.event
+  def on_draw(dt):
+      count = loader.update(xmin, xmax, window.width)
+      program.draw(gl.GL_LINE_STRIP, ranges=[(0,count)])
+"""
+import os
+import numpy as np
+from glumpy import gloo
+from . array_list import _resize, _memmap
+
+
+class Pyramid(object):
+    """ Min/max pyramid of a series
+
+    Parameters
+    ----------
+
+    data : array_like
+        Initial samples
+
+    dtype : np.dtype
+        Samples type
+
+    filename : str
+        File where samples are stored (count being stored in filename.count
+        and level k in filename.k). If the file exists and no data is given,
+        pyramid is reopened.
+    """
+
+    def __init__(self, data=None, dtype=np.float32, filename=None):
+        self._dtype = np.dtype(dtype)
+        self._filename = filename
+        self._count = 0
+        self._data = None
+        self._levels = []
+        if filename is not None:
+            if data is None and os.path.exists(filename):
+                self._open()
+            else:
+                for name in self._filenames():
+                    os.remove(name)
+                open(filename, "wb").close()
+        if self._data is None:
+            self._reserve(1)
+        if data is not None:
+            self.append(data)
+        self.flush()
+
+
+    @property
+    def count(self):
+        """ Number of samples """
+
+        return self._count
+
+
+    @property
+    def data(self):
+        """ Samples """
+
+        return self._data[:self._count]
+
+
+    @property
+    def filename(self):
+        """ File where samples are stored (or None) """
+
+        return self._filename
+
+
+    def __len__(self):
+        return self._count
+
+
+    def level(self, k):
+        """ (min,max) of blocks of 2**k samples (samples when k is 0) """
+
+        if k == 0:
+            return self.data
+        return self._levels[k-1][:self._count >> k]
+
+
+    def tail(self, k):
+        """
+        (min,max) of the last (incomplete) block of level k, computed from
+        one block of each lower level (None if there is no such block).
+        """
+
+        start = (self._count >> k) << k
+        if start == self._count:
+            return None
+        lower = []
+        for j in range(k-1, -1, -1):
+            if self._count & (1 << j):
+                if j == 0:
+                    lower.append((self._data[start], self._data[start]))
+                else:
+                    lower.append(self._levels[j-1][start >> j])
+                start += 1 << j
+        lower = np.array(lower, dtype=self._dtype)
+        return np.array([lower[:,0].min(), lower[:,1].max()], dtype=self._dtype)
+
+
+    @property
+    def levels(self):
+        """ Number of non empty levels (including samples) """
+
+        return max(self._count, 1).bit_length()
+
+
+    def _filenames(self):
+        """ Existing files of a file backed pyramid """
+
+        names = []
+        filename = self._filename
+        for name in (filename, filename + ".count"):
+            if os.path.exists(name):
+                names.append(name)
+        k = 1
+        while os.path.exists("%s.%d" % (filename, k)):
+            names.append("%s.%d" % (filename, k))
+            k += 1
+        return names
+
+
+    def _open(self):
+        """ Map samples and levels from files """
+
+        filename = self._filename
+        self._count = int(np.fromfile(filename + ".count", np.int64, 1)[0])
+        capacity = os.path.getsize(filename) // self._dtype.itemsize
+        self._data = _memmap(filename, self._dtype, max(1, self._count, capacity))
+        k = 1
+        while os.path.exists("%s.%d" % (filename, k)):
+            self._levels.append(_memmap("%s.%d" % (filename, k), self._dtype,
+                                        max(1, len(self._data) >> k), 2))
+            k += 1
+
+
+    def _reserve(self, capacity):
+        """ Set capacity of samples and levels (in memory or on disk) """
+
+        if self._data is not None and capacity <= len(self._data):
+            return
+        capacity = int(2 ** np.ceil(np.log2(max(capacity, 1))))
+        filename = self._filename
+        if filename is None:
+            if self._data is None:
+                self._data = np.zeros(capacity, dtype=self._dtype)
+            else:
+                self._data = _resize(self._data, capacity)
+        else:
+            self._data = _memmap(filename, self._dtype, capacity)
+        levels = []
+        for k in range(1, int(np.log2(capacity)) + 1):
+            if filename is None:
+                if k <= len(self._levels):
+                    levels.append(_resize(self._levels[k-1], capacity >> k))
+                else:
+                    levels.append(np.zeros((capacity >> k, 2), self._dtype))
+            else:
+                name = "%s.%d" % (filename, k)
+                if not os.path.exists(name):
+                    open(name, "wb").close()
+                levels.append(_memmap(name, self._dtype, capacity >> k, 2))
+        self._levels = levels
+
+
+    def append(self, data):
+        """ Append samples and update levels """
+
+        data = np.asarray(data, dtype=self._dtype).ravel()
+        start, stop = self._count, self._count + len(data)
+        self._reserve(stop)
+        self._data[start:stop] = data
+        self._count = stop
+
+        # Complete blocks of each level
+        source = self._data
+        for k, level in enumerate(self._levels):
+            first, last = start >> (k+1), stop >> (k+1)
+            if last == 0:
+                break
+            if last > first:
+                if k == 0:
+                    Z = source[2*first:2*last].reshape(-1, 2)
+                    level[first:last, 0] = Z.min(axis=1)
+                    level[first:last, 1] = Z.max(axis=1)
+                else:
+                    Z = source[2*first:2*last]
+                    level[first:last, 0] = np.minimum(Z[0::2, 0], Z[1::2, 0])
+                    level[first:last, 1] = np.maximum(Z[0::2, 1], Z[1::2, 1])
+            source = level
+
+
+    def flush(self):
+        """ Write any change to disk (file backed pyramid only) """
+
+        if self._filename is None:
+            return
+        np.array([self._count], dtype=np.int64).tofile(self._filename + ".count")
+        self._data.flush()
+        for level in self._levels:
+            level.flush()
+
+
+
+class PyramidLoader(object):
+    """ Streaming of a pyramid view into a fixed size vertex buffer
+
+    Parameters
+    ----------
+
+    pyramid : Pyramid
+        Pyramid to be streamed
+
+    size : int
+        Maximum width (in pixels) of a view. The vertex buffer holds 4*size+8
+        vertices (two per block of the selected level).
+    """
+
+    def __init__(self, pyramid, size=4096):
+        self._pyramid = pyramid
+        self._size = int(size)
+        dtype = [("position", np.float32, 2)]
+        self._buffer = np.zeros(4*self._size + 8, dtype).view(gloo.VertexBuffer)
+        self._view = None
+        self._level = 0
+        self._count = 0
+
+
+    @property
+    def buffer(self):
+        """ Vertex buffer (with a position attribute) """
+
+        return self._buffer
+
+
+    @property
+    def count(self):
+        """ Number of vertices of current view """
+
+        return self._count
+
+
+    @property
+    def level(self):
+        """ Level of current view """
+
+        return self._level
+
+
+    def update(self, xmin, xmax, width):
+        """
+        Update buffer with samples (or blocks) of range [xmin,xmax] (in
+        samples) over width pixels and return the number of vertices to draw.
+        Vertices x are normalized (xmin and xmax are mapped to -1 and +1).
+        """
+
+        pyramid = self._pyramid
+        width = max(1, min(int(width), self._size))
+        view = float(xmin), float(xmax), width, pyramid.count
+        if view == self._view:
+            return self._count
+        self._view = view
+        xmin, xmax = view[:2]
+        if xmax <= xmin:
+            self._count = 0
+            return 0
+
+        # Coarsest level with at least one block per pixel (the last block
+        # being incomplete, i.e. newest samples, if count is not a multiple
+        # of block size)
+        span = xmax - xmin
+        k = int(np.floor(np.log2(max(span/width, 1))))
+        k = min(k, pyramid.levels-1)
+        while True:
+            size = 2 ** k
+            full = pyramid.count >> k
+            blocks = full + (1 if full*size < pyramid.count else 0)
+            first = max(int(np.floor(xmin/size)) - 1, 0)
+            last = min(int(np.ceil(xmax/size)) + 1, blocks)
+            n = max(last - first, 0) * (1 if k == 0 else 2)
+            if n <= len(self._buffer) or k == pyramid.levels-1:
+                break
+            k += 1
+        n = min(n, len(self._buffer))
+
+        if k == 0:
+            x = np.arange(first, first + n, dtype=np.float64)
+            y = pyramid.data[first:first + n]
+        else:
+            x = (np.arange(first, first + n//2, dtype=np.float64) + 0.5)*size - 0.5
+            y = pyramid.level(k)[first:first + n//2]
+            if first + n//2 > full:
+                x[-1] = (full*size + pyramid.count - 1) / 2.0
+                y = np.concatenate([y, [pyramid.tail(k)]])
+            x = np.repeat(x, 2)
+            y = y.ravel()
+        V = np.empty(n, self._buffer.dtype)
+        V["position"][:, 0] = -1 + 2*(x - xmin)/span
+        V["position"][:, 1] = y
+        self._buffer[:n] = V
+        self._level = k
+        self._count = n
+        return n
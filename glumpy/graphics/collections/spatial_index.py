@@ -0,0 +1,403 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright (c) 2014, Nicolas P. Rougier. All rights reserved.
+# Distributed under the terms of the new BSD License.
+# -----------------------------------------------------------------------------
+"""
+CPU spatial index for collections.
+
+A spatial index is a uniform grid over the (x,y) vertex positions of a point,
+marker or segment collection (segments are indexed using their middle) that
+allows to find the nearest item, items within a radius or items inside a lasso
+(or a rubber band) without testing every vertex. Queries are made in data
+coordinates (i.e. before any transform).
+
+The index follows the collection: vertices appended to the collection are
+kept aside (and tested exhaustively) until there are enough of them to be
+merged into the grid, and deleted items are ignored when the collection uses
+tombstones. Any other deletion (that moves vertices) triggers a full rebuild,
+as does an explicit call to update (needed when vertices are moved in place).
+
+Example usage:
+--------------
+
+  markers = MarkerCollection()
+  markers.append(P)
+  index = SpatialIndex(markers)
+
+  index.nearest(x, y)        # -> (item, distance) or None
+  index.within(x, y, 10)     # -> items within a radius of 10
+  index.lasso(polygon)       # -> items inside polygon
+"""
+import numpy as np
+from . array_list import _gather
+
+
+# Bias applied to cell coordinates such that keys are positive
+_BIAS = 2**30
+
+
+class SpatialIndex(object):
+    """ Uniform grid index over collection vertices
+
+    Parameters
+    ----------
+
+    collection : Collection
+        Collection to be indexed. Vertices must have a 'position' field (points
+        and markers), 'P0' and 'P1' fields (agg segments, 4 vertices per
+        segment) or a 'P' field (raw segments, 2 vertices per segment).
+
+    cellsize : float
+        Size of grid cells in data coordinates. Default is computed such that
+        there are a few vertices per cell.
+    """
+
+    def __init__(self, collection, cellsize=None):
+        names = collection.vtype.names
+        if 'P0' in names and 'P1' in names:
+            self._fields, self._stride = ('P0', 'P1', 0), 4
+        elif 'P' in names:
+            self._fields, self._stride = ('P', 'P', 1), 2
+        elif 'position' in names:
+            self._fields, self._stride = ('position', None, 0), 1
+        else:
+            raise ValueError("Collection vertices have no position")
+        self._collection = collection
+        self._cellsize = cellsize
+        self.update()
+
+
+    @property
+    def cellsize(self):
+        """ Size of grid cells (in data coordinates) """
+        return self._cellsize
+
+
+    def update(self):
+        """ Rebuild the whole index """
+
+        V = self._collection._vertices_list
+        self._version = V._version
+        self._size = 0
+        self._vertices = np.zeros(0, dtype=np.int64)
+        self._cells = np.zeros(0, dtype=np.int64)
+        self._keys = np.zeros(0, dtype=np.int64)
+        self._bounds = np.zeros(1, dtype=np.int64)
+        self._lower = np.array([+np.inf, +np.inf])
+        self._upper = np.array([-np.inf, -np.inf])
+        self._extent = 0.0
+        self._merge()
+
+
+    def _elements(self, start, stop):
+        """ First vertex of each element (point or segment) in [start,stop) """
+
+        stride = self._stride
+        return np.arange(start + (-start % stride), stop, stride)
+
+
+    def _positions(self, vertices):
+        """ Start and end of elements (end is None for points) """
+
+        data = self._collection._vertices_list._data
+        first, second, offset = self._fields
+        P0 = data[first][vertices, :2].astype(np.float64)
+        if second is None:
+            return P0, None
+        return P0, data[second][vertices + offset, :2].astype(np.float64)
+
+
+    def _centers(self, vertices):
+        """ Reference point and half length of elements """
+
+        P0, P1 = self._positions(vertices)
+        if P1 is None:
+            return P0, 0.0
+        L = np.sqrt(((P1 - P0)**2).sum(axis=1))
+        return (P0 + P1)/2, L.max()/2 if len(L) else 0.0
+
+
+    def _cell(self, P):
+        """ Cell coordinates of points """
+
+        C = np.floor((np.asarray(P) - self._origin)/self._cellsize)
+        return np.clip(np.nan_to_num(C), -_BIAS, _BIAS-1).astype(np.int64)
+
+
+    def _key(self, ix, iy):
+        """ Key of cell(s) (cells are sorted by rows) """
+
+        return (iy + _BIAS)*(2*_BIAS) + (ix + _BIAS)
+
+
+    def _merge(self):
+        """ Merge vertices appended since last merge into the grid """
+
+        V = self._collection._vertices_list
+        vertices = self._elements(self._size, V._size)
+        self._size = V._size
+        if not len(vertices):
+            return
+        P, extent = self._centers(vertices)
+        self._extent = max(self._extent, extent)
+        self._lower = np.minimum(self._lower, np.nanmin(P, axis=0))
+        self._upper = np.maximum(self._upper, np.nanmax(P, axis=0))
+
+        # Cell size is chosen on first merge (a few elements per cell)
+        if not len(self._vertices):
+            self._origin = np.where(np.isfinite(self._lower), self._lower, 0)
+            if self._cellsize is None:
+                w, h = np.maximum(self._upper - self._lower, 0)
+                n = len(vertices)
+                if w*h > 0:
+                    self._cellsize = float(np.sqrt(4*w*h/n))
+                elif w + h > 0:
+                    self._cellsize = float(4*(w + h)/n)
+                else:
+                    self._cellsize = 1.0
+
+        C = self._cell(P)
+        cells = self._key(C[:, 0], C[:, 1])
+        order = np.argsort(cells)
+        cells, vertices = cells[order], vertices[order]
+        if len(self._cells):
+            index = np.searchsorted(self._cells, cells, side="right")
+            self._cells = np.insert(self._cells, index, cells)
+            self._vertices = np.insert(self._vertices, index, vertices)
+        else:
+            self._cells, self._vertices = cells, vertices
+        starts = np.flatnonzero(np.diff(self._cells)) + 1
+        self._keys = self._cells[np.concatenate([[0], starts])]
+        self._bounds = np.concatenate([[0], starts, [len(self._cells)]])
+
+
+    def _sync(self):
+        """ Follow collection changes and return vertices not yet merged """
+
+        V = self._collection._vertices_list
+        if V._version != self._version or V._size < self._size:
+            self.update()
+        pending = V._size - self._size
+        if pending > max(1024, len(self._vertices)//8):
+            self._merge()
+        return self._elements(self._size, V._size)
+
+
+    def _range(self, lower, upper):
+        """ Indexed vertices whose cell intersects the [lower,upper] box """
+
+        if not len(self._keys):
+            return np.zeros(0, dtype=np.int64)
+        (ix0, iy0), (ix1, iy1) = self._clip(lower, upper)
+        if ix0 > ix1 or iy0 > iy1:
+            return np.zeros(0, dtype=np.int64)
+        cells = self._row_cells(ix0, ix1, iy0, iy1)
+        starts = self._bounds[cells]
+        return self._vertices[_gather(starts, self._bounds[cells+1] - starts)]
+
+
+    def _clip(self, lower, upper):
+        """ Cell coordinates of a box, clipped to the cells in use """
+
+        lower = np.maximum(lower, self._lower)
+        upper = np.minimum(upper, self._upper)
+        return self._cell(lower), self._cell(upper)
+
+
+    def _row_cells(self, ix0, ix1, iy0, iy1):
+        """ Used cells within a range of cells (in row order) """
+
+        rows = np.arange(iy0, iy1+1)
+        lo = np.searchsorted(self._keys, self._key(ix0, rows))
+        hi = np.searchsorted(self._keys, self._key(ix1, rows), side="right")
+        return _gather(lo, hi - lo)
+
+
+    def _items(self, vertices):
+        """ Items owning vertices (-1 for deleted items) """
+
+        V = self._collection._vertices_list
+        slots = np.searchsorted(V._items[:V._count, 1], vertices, side="right")
+        dead = V._dead[slots]
+        if V.deleted:
+            slots = np.searchsorted(V._live_items(), slots)
+        slots[dead] = -1
+        return slots
+
+
+    def _unique_items(self, vertices):
+        """ Sorted unique items owning vertices (deleted items are discarded) """
+
+        # Sorted vertices are much faster to search and give sorted items
+        I = self._items(np.sort(vertices))
+        I = I[I >= 0]
+        if len(I):
+            I = I[np.concatenate([[True], I[1:] != I[:-1]])]
+        return I
+
+
+    def _distances(self, vertices, x, y):
+        """ Distances of elements to (x,y) """
+
+        P0, P1 = self._positions(vertices)
+        P = np.array([x, y], dtype=np.float64)
+        if P1 is None:
+            return np.sqrt(((P0 - P)**2).sum(axis=1))
+        D = P1 - P0
+        L = (D**2).sum(axis=1)
+        T = ((P - P0)*D).sum(axis=1) / np.where(L > 0, L, 1)
+        T = np.clip(T, 0, 1)[:, np.newaxis]
+        return np.sqrt(((P0 + T*D - P)**2).sum(axis=1))
+
+
+    def _search(self, x, y, radius, pending):
+        """ Items and distances of elements within radius of (x,y) """
+
+        r = radius + self._extent
+        V = np.concatenate([self._range((x-r, y-r), (x+r, y+r)), pending])
+        D = self._distances(V, x, y)
+        I = self._items(V)
+        keep = (D <= radius) & (I >= 0)
+        return I[keep], D[keep]
+
+
+    def within(self, x, y, radius):
+        """ Items within radius of (x,y) (in ascending order) """
+
+        pending = self._sync()
+        r = radius + self._extent
+        V = np.concatenate([self._range((x-r, y-r), (x+r, y+r)), pending])
+        return self._unique_items(V[self._distances(V, x, y) <= radius])
+
+
+    def nearest(self, x, y, radius=None):
+        """
+        Nearest item from (x,y) and its distance, or None if there is no item
+        (within radius if given).
+        """
+
+        pending = self._sync()
+        limit = 0.0
+        if len(self._vertices):
+            corners = np.array([[self._lower[0], self._lower[1]],
+                                [self._lower[0], self._upper[1]],
+                                [self._upper[0], self._lower[1]],
+                                [self._upper[0], self._upper[1]]])
+            D = np.sqrt(((corners - (x, y))**2).sum(axis=1))
+            limit = D.max() + self._extent
+        if len(pending):
+            limit = max(limit, self._distances(pending, x, y).max())
+        if radius is not None:
+            limit = min(limit, radius)
+
+        # Search radius is doubled until an item is found
+        r = min(self._cellsize or limit, limit)
+        while True:
+            I, D = self._search(x, y, r, pending)
+            if len(I):
+                k = np.argmin(D)
+                return int(I[k]), float(D[k])
+            if r >= limit:
+                return None
+            r = min(2*r, limit)
+
+
+    def box(self, xmin, ymin, xmax, ymax):
+        """ Items inside a box, i.e. a rubber band (in ascending order) """
+
+        return self.lasso([(xmin, ymin), (xmax, ymin),
+                           (xmax, ymax), (xmin, ymax)])
+
+
+    def lasso(self, polygon):
+        """
+        Items inside a polygon (in ascending order). Segments are inside when
+        their middle is inside.
+
+        Only cells crossed by the polygon boundary are tested point by point,
+        items of other cells being accepted or rejected as a whole.
+        """
+
+        polygon = np.asarray(polygon, dtype=np.float64)[:, :2]
+        pending = self._sync()
+        V = [pending[self._inside(polygon, pending)]]
+        if len(self._keys):
+            (ix0, iy0), (ix1, iy1) = self._clip(polygon.min(axis=0),
+                                                polygon.max(axis=0))
+            if ix0 <= ix1 and iy0 <= iy1:
+                shape = iy1 - iy0 + 1, ix1 - ix0 + 1
+                edge = self._boundary_cells(polygon, ix0, iy0, shape)
+                inside = self._inside_cells(polygon, ix0, iy0, shape)
+                cells = self._row_cells(ix0, ix1, iy0, iy1)
+                keys = self._keys[cells]
+                X = keys % (2*_BIAS) - _BIAS - ix0
+                Y = keys // (2*_BIAS) - _BIAS - iy0
+                for cells, test in ((cells[inside[Y, X] & ~edge[Y, X]], False),
+                                    (cells[edge[Y, X]], True)):
+                    starts = self._bounds[cells]
+                    sizes = self._bounds[cells+1] - starts
+                    vertices = self._vertices[_gather(starts, sizes)]
+                    if test:
+                        vertices = vertices[self._inside(polygon, vertices)]
+                    V.append(vertices)
+        return self._unique_items(np.concatenate(V))
+
+
+    def _inside(self, polygon, vertices):
+        """ Whether elements are inside polygon (even-odd rule) """
+
+        inside = np.zeros(len(vertices), dtype=bool)
+        if not len(vertices):
+            return inside
+        A, B = polygon, np.roll(polygon, -1, axis=0)
+        for start in range(0, len(vertices), 65536):
+            P, _ = self._centers(vertices[start:start+65536])
+            x, y = P[:, :1], P[:, 1:]
+            cross = (A[:, 1] > y) != (B[:, 1] > y)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                X = A[:, 0] + (y - A[:, 1])*(B[:, 0] - A[:, 0])/(B[:, 1] - A[:, 1])
+            inside[start:start+65536] = ((cross & (x < X)).sum(axis=1) % 2) == 1
+        return inside
+
+
+    def _boundary_cells(self, polygon, ix0, iy0, shape):
+        """ Cells (of a region) that may be crossed by the polygon boundary """
+
+        A, B = polygon, np.roll(polygon, -1, axis=0)
+        L = np.sqrt(((B - A)**2).sum(axis=1))
+        n = np.ceil(4*L/self._cellsize).astype(int) + 1
+        T = np.arange(n.sum()) - np.repeat(n.cumsum() - n, n)
+        T = (T / np.repeat(np.maximum(n - 1, 1), n).astype(float))[:, np.newaxis]
+        P = np.repeat(A, n, axis=0) + T*np.repeat(B - A, n, axis=0)
+        C = self._cell(P) - (ix0, iy0)
+
+        # Samples are dilated by one cell to catch corners between samples
+        edge = np.zeros((shape[0] + 2, shape[1] + 2), dtype=bool)
+        C = np.clip(C + 1, 0, (shape[1] + 1, shape[0] + 1))
+        edge[C[:, 1], C[:, 0]] = True
+        dilated = edge.copy()
+        for dy in -1, 0, 1:
+            for dx in -1, 0, 1:
+                dilated[1:-1, 1:-1] |= edge[1+dy:shape[0]+1+dy, 1+dx:shape[1]+1+dx]
+        return dilated[1:-1, 1:-1]
+
+
+    def _inside_cells(self, polygon, ix0, iy0, shape):
+        """ Whether cell centers (of a region) are inside polygon """
+
+        rows, cols = shape
+        A, B = polygon, np.roll(polygon, -1, axis=0)
+        y = (self._origin[1] + (iy0 + np.arange(rows) + 0.5)*self._cellsize)
+        y = y[:, np.newaxis]
+        cross = (A[:, 1] > y) != (B[:, 1] > y)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            X = A[:, 0] + (y - A[:, 1])*(B[:, 0] - A[:, 0])/(B[:, 1] - A[:, 1])
+
+        # Crossings toggle inside/outside state of cells at their right
+        R, E = np.nonzero(cross)
+        C = np.floor((X[R, E] - self._origin[0])/self._cellsize - 0.5) + 1 - ix0
+        C = np.clip(C, 0, cols).astype(int)
+        toggles = np.zeros((rows, cols + 1), dtype=int)
+        np.add.at(toggles, (R, C), 1)
+        return (toggles.cumsum(axis=1)[:, :cols] % 2) == 1
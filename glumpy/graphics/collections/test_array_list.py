@@ -3,6 +3,9 @@
 # Copyright (c) 2014, Nicolas P. Rougier. All rights reserved.
 # Distributed under the terms of the new BSD License.
 # -----------------------------------------------------------------------------
+import os
+import shutil
+import tempfile
 import unittest
 import numpy as np
 from . array_list import ArrayList
@@ -261,6 +264,83 @@ class ArrayListDefault(unittest.TestCase):
         L = ArrayList(data)
         assert np.allclose(L.data, data)
 
+    # Tombstones
+    # ----------
+    def test_tombstones_delitem(self):
+        L = ArrayList(np.arange(10), [3, 3, 4], tombstones=True)
+        del L[1]
+        assert len(L) == 2
+        assert L.deleted == 1
+        assert np.allclose(L[1], [6, 7, 8, 9])
+        assert np.allclose(L.data, np.arange(10))
+        assert np.allclose(L.ranges, [[0, 3], [6, 10]])
+
+    def test_tombstones_append(self):
+        L = ArrayList(np.arange(10), [3, 3, 4], tombstones=True)
+        del L[0:2]
+        L.append([10, 11])
+        assert len(L) == 2
+        assert np.allclose(L[-1], [10, 11])
+        assert np.allclose(L.ranges, [[6, 12]])
+
+    def test_tombstones_compact(self):
+        L = ArrayList(np.arange(10), [3, 3, 4], tombstones=True)
+        del L[1]
+        L.compact()
+        assert L.deleted == 0
+        assert np.allclose(L.data, [0, 1, 2, 6, 7, 8, 9])
+        assert np.allclose(L.itemsize, [3, 4])
+
+    # Index arrays and masks
+    # ----------------------
+    def test_getitem_array(self):
+        L = ArrayList(np.arange(10), [3, 3, 4])
+        M = L[[2, 0]]
+        assert len(M) == 2
+        assert np.allclose(M[0], [6, 7, 8, 9])
+        assert np.allclose(M[1], [0, 1, 2])
+
+    def test_getitem_mask(self):
+        L = ArrayList(np.arange(10), [3, 3, 4])
+        M = L[np.array([False, True, True])]
+        assert np.allclose(M.data, np.arange(3, 10))
+        assert np.allclose(M.itemsize, [3, 4])
+
+    def test_setitem_array(self):
+        L = ArrayList(np.arange(10), [3, 3, 4])
+        L[[0, 2]] = [-1, -2]
+        assert np.allclose(L.data, [-1, -1, -1, 3, 4, 5, -2, -2, -2, -2])
+
+    def test_delitem_mask(self):
+        L = ArrayList(np.arange(10), [3, 3, 4])
+        del L[np.array([True, False, True])]
+        assert len(L) == 1
+        assert np.allclose(L.data, [3, 4, 5])
+
+    def test_delitem_array_tombstones(self):
+        L = ArrayList(np.arange(10), [3, 3, 4], tombstones=True)
+        del L[0]
+        del L[[-1]]
+        assert len(L) == 1
+        assert np.allclose(L[0], [3, 4, 5])
+
+    # File backed list
+    # ----------------
+    def test_filename(self):
+        path = tempfile.mkdtemp()
+        try:
+            filename = os.path.join(path, "list")
+            L = ArrayList(np.arange(10), [3, 3, 4], filename=filename)
+            for i in range(100):
+                L.append(np.arange(i+1))
+            L.flush()
+            L = ArrayList(filename=filename, dtype=L.dtype)
+            assert len(L) == 103
+            assert np.allclose(L[2], [6, 7, 8, 9])
+            assert np.allclose(L[-1], np.arange(100))
+        finally:
+            shutil.rmtree(path)
+
 
 # -----------------------------------------------------------------------------
 if __name__ == "__main__":
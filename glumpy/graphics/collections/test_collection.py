@@ -4,6 +4,9 @@
 # Copyright (c) 2013, Nicolas P. Rougier. All rights reserved.
 # Distributed under the terms of the new BSD License.
 # -----------------------------------------------------------------------------
+import os
+import shutil
+import tempfile
 import unittest
 import numpy as np
 from . collection import BaseCollection
@@ -58,6 +61,217 @@ class BaseCollectionDefault(unittest.TestCase):
         del C[:9]
         assert np.allclose(C[0].indices , indices)
 
+    def test_extend(self):
+        C = BaseCollection(vtype, utype, itype)
+        C.extend({"position": np.zeros((4,2))}, 4, indices=indices)
+        sizes = np.array([4,3,5])
+        P = np.arange(2*12).reshape(12,2)
+        C.extend({"position": P, "color": [[1,0,0],[0,1,0],[0,0,1]]},
+                 sizes, indices=[0,1,2])
+        assert len(C) == 4
+        assert np.allclose(C._vertices_list["position"][4:], P)
+        assert np.allclose(C._vertices_list["collection_index"],
+                           np.repeat([0,1,2,3], [4,4,3,5]))
+        assert np.allclose(C._indices_list[2], 8+np.arange(3))
+        assert np.allclose(C._indices_list[3], 11+np.arange(3))
+        assert np.allclose(C._uniforms_list["color"][1:], np.eye(3))
+
+    def test_extend_structured(self):
+        C = BaseCollection(vtype, utype, itype)
+        V = np.zeros(40, dtype=vtype)
+        V["position"] = np.arange(40)[:,np.newaxis]
+        C.extend(V, 4, indices=indices)
+        assert len(C) == 10
+        for i in xrange(10):
+            assert np.allclose(C._indices_list[i], 4*i+indices)
+
+    def test_tombstones(self):
+        C = BaseCollection(vtype, utype, itype)
+        C.tombstones = True
+        C.extend({"position": np.arange(2*12).reshape(12,2),
+                  "color": np.arange(3)[:,np.newaxis]}, 4, indices=indices)
+        del C[1]
+        assert len(C) == 2
+        assert np.allclose(C._ranges(), [[0,6], [12,18]])
+        assert np.allclose(C._indices_list[1], 8+indices)
+        C.compact()
+        assert C.deleted == 0
+        assert np.allclose(C._indices_list[1], 4+indices)
+        assert np.allclose(C._vertices_list["collection_index"],
+                           np.repeat([0,1], 4))
+        assert np.allclose(C._uniforms_list["color"][:,0], [0,2])
+
+    def test_delete_mask(self):
+        C = BaseCollection(vtype, utype, itype)
+        C.extend({"position": np.zeros((20,2)),
+                  "color": np.arange(5)[:,np.newaxis]}, 4, indices=indices)
+        del C[C._uniforms_list["color"][:,0] % 2 == 1]
+        assert len(C) == 3
+        assert C.deleted == 0
+        assert np.allclose(C._uniforms_list["color"][:,0], [0,2,4])
+        assert np.allclose(C._indices_list[2], 8+indices)
+        assert np.allclose(C._vertices_list["collection_index"],
+                           np.repeat([0,1,2], 4))
+
+    def test_filename(self):
+        path = tempfile.mkdtemp()
+        try:
+            filename = os.path.join(path, "collection")
+            C = BaseCollection(vtype, utype, itype, filename=filename)
+            C.extend({"position": np.arange(2*12).reshape(12,2),
+                      "color": np.arange(3)[:,np.newaxis]}, 4, indices=indices)
+            del C[0]
+            C.flush()
+            C = BaseCollection(vtype, utype, itype, filename=filename)
+            assert len(C) == 2
+            assert np.allclose(C._vertices_list[0]["position"][0], [8,9])
+            assert np.allclose(C._indices_list[1], 4+indices)
+            assert np.allclose(C._uniforms_list["color"][:,0], [1,2])
+        finally:
+            shutil.rmtree(path)
+
+    def test_glyph_references(self):
+        from glumpy.gloo.atlas import PagedAtlas
+        from glumpy.graphics.text import Font
+        from . glyph_collection import GlyphCollection
+        filename = os.path.join(os.path.dirname(__file__),
+                                "../../data/fonts/Roboto-Regular.ttf")
+        atlas = PagedAtlas((96,96), max_pages=2)
+        font = Font(filename, atlas)
+        C = GlyphCollection()
+        C.append("Hello", font)
+        for charcode in "abcdefgijkmnpqstuvxyz":
+            font[charcode]
+        for i, charcode in enumerate("Hello"):
+            assert (font.filename, charcode) in atlas
+            glyph = font.glyphs[charcode]
+            u0, v0, u1, v1 = glyph.texcoords
+            V = C[0].vertices[4*i:4*i+4]
+            assert np.allclose(V["texcoord"], [(u0,v0),(u0,v1),(u1,v1),(u1,v0)])
+            assert (V["page"] == glyph.page).all()
+        del C[0]
+        assert atlas._entries[(font.filename, "H")][2] == 0
+
+    def test_compact_path(self):
+        from . agg_fast_path_collection import AggFastPathCollection
+        C = AggFastPathCollection(compact=True)
+        assert C.vtype.names == ("curr", "ghost")
+        P = np.array([(0, 0, 0), (1, 0, 0), (1, 1, 0)], np.float32)
+        C.append(P, closed=False)
+        C.append(P, closed=True)
+        assert C._vertices_list.size == 11
+        V = C._vertices_list._data
+        assert np.array_equal(V["curr"][:5], P[[0, 0, 1, 2, 2]])
+        assert np.array_equal(V["curr"][5:11], P[[2, 0, 1, 2, 0, 1]])
+        assert np.array_equal(V["ghost"][:11], [-1,0,0,0,1, -1,0,0,0,0,1])
+        self.assertRaises(ValueError, AggFastPathCollection,
+                          compact=True, color="local")
+
+    def test_pick_item(self):
+        from . picker import item, slot_item
+        C = BaseCollection(vtype, utype, itype)
+        C.tombstones = True
+        C.extend({"position": np.zeros((12,2)),
+                  "color": np.arange(3)[:,np.newaxis]}, 4, indices=indices)
+        assert item(C, 0) == 0
+        assert item(C, 5) == 1
+        assert item(C, 11) == 2
+        del C[1]
+        assert item(C, 5) is None
+        assert item(C, 11) == 1
+        assert slot_item(C, 1) is None
+        assert slot_item(C, 2) == 1
+
+    def test_spatial_index(self):
+        from . spatial_index import SpatialIndex
+        P = np.random.uniform(-100, 100, (1000, 2))
+        C = BaseCollection(vtype, utype, itype)
+        C.tombstones = True
+        C.extend({"position": P}, 1)
+        S = SpatialIndex(C)
+        D = np.sqrt(((P - (10,20))**2).sum(axis=1))
+        assert S.nearest(10, 20)[0] == np.argmin(D)
+        assert np.array_equal(S.within(10, 20, 30), np.flatnonzero(D <= 30))
+        inside = (abs(P) < 50).all(axis=1)
+        assert np.array_equal(S.box(-50, -50, 50, 50), np.flatnonzero(inside))
+        C.extend({"position": [(10,20)]}, 1)
+        del C[np.flatnonzero(inside)]
+        assert S.nearest(10, 20) == (len(C)-1, 0.0)
+        assert not len(S.box(-50, -50, 0, 0))
+
+    def test_bounds(self):
+        C = BaseCollection(vtype, utype, itype)
+        P = np.array([(0,0), (1,1), (10,0), (11,2), (20,5), (21,6)])
+        C.extend({"position": P}, 2, indices=[0,1])
+        assert np.allclose(C.bounds, [(0,0,1,1), (10,0,11,2), (20,5,21,6)])
+        assert np.allclose(C._ranges((9,-1,19,1)), [(2,4)])
+        assert np.allclose(C._ranges((0,0,10,10)), [(0,4)])
+        assert len(C._ranges((30,30,40,40))) == 0
+        C[1]["position"] = (30,30)
+        assert np.allclose(C.bounds[1], (30,30,30,30))
+        assert np.allclose(C._ranges((30,30,40,40)), [(2,4)])
+        C.tombstones = True
+        del C[0]
+        assert np.allclose(C._ranges((-1,-1,40,40)), [(2,6)])
+
+    def test_m4(self):
+        from . decimation import M4
+        np.random.seed(1)
+        Y = np.random.normal(0, 1, 10000)
+        M = M4(Y, blocksize=8)
+        I = M.indices(-0.5, 9999.5, 100)
+        assert I[0] == 0 and I[-1] == 9999
+        assert 400 >= len(I) >= 100
+        for k in range(100):
+            J = np.arange(100*k, 100*(k+1))
+            assert {J[0], J[-1], J[np.argmin(Y[J])], J[np.argmax(Y[J])]} <= set(I)
+        I = M.indices(100, 200, 100)
+        assert np.array_equal(I, np.arange(99, 201))
+
+    def test_m4_nan(self):
+        from . decimation import M4
+        np.random.seed(1)
+        Y = np.random.normal(0, 1, 10000)
+        Y[5000:5100] = np.nan
+        Y[5150] = np.nan
+        M = M4(Y, blocksize=8)
+        I = M.indices(-0.5, 9999.5, 100)
+        for k in range(100):
+            J = np.arange(100*k, 100*(k+1))
+            if np.isnan(Y[J]).all():
+                assert {J[0], J[-1]} <= set(I)
+            else:
+                assert {J[np.nanargmin(Y[J])], J[np.nanargmax(Y[J])]} <= set(I)
+        assert np.isnan(Y[I]).sum() == 2
+
+    def test_pyramid(self):
+        from . pyramid import Pyramid, PyramidLoader
+        Y = np.random.uniform(-1, 1, 1000).astype(np.float32)
+        path = tempfile.mkdtemp()
+        try:
+            filename = os.path.join(path, "pyramid.data")
+            P = Pyramid(filename=filename)
+            for i in range(0, 1000, 300):
+                P.append(Y[i:i+300])
+            P.flush()
+            P = Pyramid(filename=filename)
+            assert P.count == 1000 and P.levels == 10
+            Z = Y[:992].reshape(31, 32)
+            assert np.array_equal(P.level(5)[:, 0], Z.min(axis=1))
+            assert np.array_equal(P.level(5)[:, 1], Z.max(axis=1))
+            L = PyramidLoader(P, size=10)
+            assert L.update(0, 1000, 10) == 2*(1000//64 + 1) and L.level == 6
+            V = L.buffer["position"][2*(1000//64):2*(1000//64 + 1)]
+            assert np.array_equal(V[:, 1], [Y[960:].min(), Y[960:].max()])
+            assert np.array_equal(P.tail(5), [Y[992:].min(), Y[992:].max()])
+            assert P.tail(3) is None
+            assert L.update(100, 110, 10) == 12 and L.level == 0
+            V = L.buffer["position"][:12]
+            assert np.allclose(V[:, 1], Y[99:111])
+            assert np.allclose(V[1:, 0], np.linspace(-1, 1, 11))
+        finally:
+            shutil.rmtree(path)
+
 
 # -----------------------------------------------------------------------------
 if __name__ == "__main__":
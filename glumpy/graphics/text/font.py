@@ -6,6 +6,8 @@
 import sys
 import numpy as np
 from freetype import *
+from glumpy.log import log
+from glumpy.gloo.atlas import PagedAtlas
 from glumpy.ext.sdf import compute_sdf
 # from scipy.ndimage.interpolation import zoom
 
@@ -43,8 +45,8 @@ def zoom(Z, ratio):
     """ Bilinear image zoom """
 
     nrows, ncols = Z.shape
-    x,y = np.meshgrid(np.linspace(0, ncols, (ratio*ncols), endpoint=False),
-                      np.linspace(0, nrows, (ratio*nrows), endpoint=False))
+    x,y = np.meshgrid(np.linspace(0, ncols, int(ratio*ncols), endpoint=False),
+                      np.linspace(0, nrows, int(ratio*nrows), endpoint=False))
     return bilinear_interpolate(Z, x, y)
 
 
@@ -85,6 +87,7 @@ class Glyph:
         self.advance = advance
         self.texcoords = texcoords
         self.kerning = {}
+        self.page = 0
 
 
     def get_kerning(self, charcode):
@@ -116,6 +119,8 @@ class Font:
         self.atlas = atlas
 
         self.glyphs = {}
+        if isinstance(atlas, PagedAtlas):
+            atlas.add_handler(self.on_relocate)
         face = Face(self.filename)
         face.set_char_size(self._lowres_size*64)
         metrics = face.size
@@ -128,9 +133,37 @@ class Font:
     def __getitem__(self, charcode):
         if charcode not in self.glyphs.keys():
             self.load('%c' % charcode)
+        elif isinstance(self.atlas, PagedAtlas):
+            if (self.filename, charcode) not in self.atlas:
+                # Glyph has been evicted from the atlas
+                del self.glyphs[charcode]
+                self.load('%c' % charcode)
+            else:
+                self.atlas.get((self.filename, charcode))
         return self.glyphs[charcode]
 
 
+    def on_relocate(self, key, page, region):
+        """ Fix glyph texture coordinates after an atlas repack """
+
+        filename, charcode = key
+        if filename != self.filename or charcode not in self.glyphs:
+            return
+        glyph = self.glyphs[charcode]
+        glyph.page = page
+        glyph.texcoords = self._texcoords(self.atlas.pages[page], region)
+
+
+    def _texcoords(self, atlas, region):
+        x,y,w,h = region
+        x,y,w,h = x+1, y+1, w-2, h-2
+        u0     = (x +     0.0)/float(atlas.width)
+        v0     = (y +     0.0)/float(atlas.height)
+        u1     = (x + w - 0.0)/float(atlas.width)
+        v1     = (y + h - 0.0)/float(atlas.height)
+        return u0,v0,u1,v1
+
+
     def load_glyph(self, face, charcode):
 
         face.set_char_size( self._hires_size*64 )
@@ -147,10 +180,10 @@ class Font:
 
         # Pad high resolution glyph with a blank border and normalize values
         # between 0 and 1
-        hires_width  = (1+2*self._padding)*width
-        hires_height = (1+2*self._padding)*height
+        hires_width  = int((1+2*self._padding)*width)
+        hires_height = int((1+2*self._padding)*height)
         hires_data = np.zeros( (hires_height,hires_width), np.double)
-        ox,oy = self._padding*width, self._padding*height
+        ox,oy = int(self._padding*width), int(self._padding*height)
         hires_data[oy:oy+height, ox:ox+width] = G/255.0
 
        # Compute distance field at high resolution
@@ -180,20 +213,27 @@ class Font:
             data,offset,advance = self.load_glyph(face, charcode)
 
             h,w = data.shape
-            region = self.atlas.allocate( (h+2,w+2) )
+            page, atlas = 0, self.atlas
+            if isinstance(self.atlas, PagedAtlas):
+                region = self.atlas.allocate((self.filename, charcode), (h+2,w+2))
+                if region is not None:
+                    page, region = region
+                    atlas = self.atlas.pages[page]
+            else:
+                region = self.atlas.allocate( (h+2,w+2) )
             if region is None:
                 log.warn("Cannot store glyph '%c'" % charcode)
                 continue
             x,y,_,_ = region
             x,y = x+1, y+1
-            self.atlas[y:y+h,x:x+w] = data.reshape(h,w,1)
+            if atlas.ndim == 3:
+                atlas[y:y+h,x:x+w] = data.reshape(h,w,1)
+            else:
+                atlas[y:y+h,x:x+w] = data
 
-            u0     = (x +     0.0)/float(self.atlas.width)
-            v0     = (y +     0.0)/float(self.atlas.height)
-            u1     = (x + w - 0.0)/float(self.atlas.width)
-            v1     = (y + h - 0.0)/float(self.atlas.height)
-            texcoords = (u0,v0,u1,v1)
+            texcoords = self._texcoords(atlas, region)
             glyph = Glyph(charcode, data.shape, offset, advance, texcoords)
+            glyph.page = page
             self.glyphs[charcode] = glyph
 
             # Generate kerning (for reference size)
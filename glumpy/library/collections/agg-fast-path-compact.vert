@@ -0,0 +1,108 @@
+// ----------------------------------------------------------------------------
+// Copyright (c) 2014, Nicolas P. Rougier. All Rights Reserved.
+// Distributed under the (new) BSD License.
+// ----------------------------------------------------------------------------
+// Hooks:
+//  <transform> : vec4 function(position, ...)
+//
+// Compact version of agg-fast-path.vert: points are stored once (x,y,z,ghost)
+// in the points texture and each point is drawn using two vertices, prev and
+// next points being fetched from the vertex index.
+// Requires GL_EXT_gpu_shader4 (gl_VertexID and texelFetch2D).
+// ----------------------------------------------------------------------------
+#extension GL_EXT_gpu_shader4 : enable
+#include "misc/viewport-NDC.glsl"
+
+// Externs
+// ------------------------------------
+// extern vec4  color;
+// extern float antialias;
+// extern float linewidth;
+
+// Uniforms
+// ------------------------------------
+uniform sampler2D points;
+uniform vec2      points_shape;
+
+// Varyings
+// ------------------------------------
+varying float v_antialias;
+varying float v_linewidth;
+varying float v_distance;
+varying vec4  v_color;
+
+
+// Point i (x,y,z,ghost) from the points texture
+// ------------------------------------
+vec4 fetch_point(int i)
+{
+    int cols = int(points_shape.y);
+    int row = i / cols;
+    return texelFetch2D(points, ivec2(i - row*cols, row), 0);
+}
+
+
+// Main
+// ------------------------------------
+void main (void)
+{
+    // This function is externally generated
+    fetch_uniforms();
+    v_linewidth = linewidth;
+    v_antialias = antialias;
+    v_color     = color;
+
+    // Point and side of this vertex
+    int i = gl_VertexID / 2;
+    float id = 1.0 - 2.0*float(gl_VertexID - 2*i);
+
+    // Ghost points (path ends) are drawn (transparent) as their neighbour
+    float ghost = fetch_point(i).w;
+    if (ghost < -0.5) {
+        i += 1;
+        id *= 2.0;
+    } else if (ghost > 0.5) {
+        i -= 1;
+        id *= 2.0;
+    }
+    vec3 prev = fetch_point(i-1).xyz;
+    vec3 curr = fetch_point(i).xyz;
+    vec3 next = fetch_point(i+1).xyz;
+
+    // transform prev/curr/next
+    vec4 prev_ = <transform(prev)>;
+    vec4 curr_ = <transform(curr)>;
+    vec4 next_ = <transform(next)>;
+
+    // prev/curr/next in viewport coordinates
+    vec2 _prev = NDC_to_viewport(prev_, viewport.zw);
+    vec2 _curr = NDC_to_viewport(curr_, viewport.zw);
+    vec2 _next = NDC_to_viewport(next_, viewport.zw);
+
+    // Compute vertex final position (in viewport coordinates)
+    float w = linewidth/2.0 + 1.5*antialias;
+    float z;
+    vec2 P;
+    if( curr == prev) {
+        vec2 v = normalize(_next.xy - _curr.xy);
+        vec2 normal = normalize(vec2(-v.y,v.x));
+        P = _curr.xy + normal*w*id;
+    } else if (curr == next) {
+        vec2 v = normalize(_curr.xy - _prev.xy);
+        vec2 normal  = normalize(vec2(-v.y,v.x));
+        P = _curr.xy + normal*w*id;
+    } else {
+        vec2 v0 = normalize(_curr.xy - _prev.xy);
+        vec2 v1 = normalize(_next.xy - _curr.xy);
+        vec2 normal  = normalize(vec2(-v0.y,v0.x));
+        vec2 tangent = normalize(v0+v1);
+        vec2 miter   = vec2(-tangent.y, tangent.x);
+        float l = abs(w / dot(miter,normal));
+        P = _curr.xy + miter*l*sign(id);
+    }
+
+    if( abs(id) > 1.5 ) v_color.a = 0.0;
+
+    v_distance = w*id;
+    gl_Position = viewport_to_NDC(P, viewport.zw, curr_.z / curr_.w);
+}
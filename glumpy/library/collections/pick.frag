@@ -0,0 +1,33 @@
+// ----------------------------------------------------------------------------
+// Copyright (c) 2014, Nicolas P. Rougier. All Rights Reserved.
+// Distributed under the (new) BSD License.
+// ----------------------------------------------------------------------------
+// Picking wrapper: original main is renamed pick_main and, when pick_mode is
+// not null, the fragment color is replaced with the item (or vertex) index
+// (+1) encoded in rgb (24 bits) and pick_mode (collection number) encoded in
+// alpha.
+// Requires GL_EXT_gpu_shader4 (flat varyings).
+// ----------------------------------------------------------------------------
+
+// Uniforms
+// ------------------------------------
+uniform float pick_mode;
+
+// Varyings
+// ------------------------------------
+flat varying float pick_id;
+
+// Main
+// ------------------------------------
+void main(void)
+{
+    pick_main();
+    if (pick_mode > 0.0) {
+        if (gl_FragColor.a < 0.5) discard;
+        float id = pick_id + 1.0;
+        gl_FragColor = vec4(mod(id, 256.0),
+                            mod(floor(id/256.0), 256.0),
+                            floor(id/65536.0),
+                            pick_mode) / 255.0;
+    }
+}
@@ -0,0 +1,25 @@
+// ----------------------------------------------------------------------------
+// Copyright (c) 2014, Nicolas P. Rougier. All Rights Reserved.
+// Distributed under the (new) BSD License.
+// ----------------------------------------------------------------------------
+// Picking wrapper: original main is renamed pick_main and the item index
+// (collection_index) is passed (without interpolation) to the fragment
+// shader. Collections without collection_index pass the vertex index.
+// Requires GL_EXT_gpu_shader4 (gl_VertexID and flat varyings).
+// ----------------------------------------------------------------------------
+
+// Varyings
+// ------------------------------------
+flat varying float pick_id;
+
+// Main
+// ------------------------------------
+void main(void)
+{
+    pick_main();
+#ifdef PICK_COLLECTION_INDEX
+    pick_id = collection_index;
+#else
+    pick_id = float(gl_VertexID);
+#endif
+}
@@ -12,11 +12,13 @@
 // ------------------------------------
 uniform sampler2D atlas_data;
 uniform vec2      atlas_shape;
+uniform float     atlas_page;
 
 // Varyings
 // ------------------------------------
 varying float v_scale;
 varying vec2 v_texcoord;
+varying float v_page;
 varying vec4 v_color;
 
 
@@ -40,6 +42,9 @@ float sample(sampler2D texture, vec2 uv, float w)
 // ------------------------------------
 void main(void)
 {
+    // Glyph is stored in another atlas page
+    if (abs(v_page - atlas_page) > 0.5) discard;
+
     vec4 color = v_color;
 
     // Retrieve distance from texture
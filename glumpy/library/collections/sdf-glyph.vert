@@ -9,6 +9,7 @@
 // ------------------------------------
 // vec2 position;
 // vec2 texcoord;
+// float page;
 // float scale;
 // vec3 origin;
 // vec3 direction
@@ -18,6 +19,7 @@
 // ------------------------------------
 varying float v_scale;
 varying vec2  v_texcoord;
+varying float v_page;
 varying vec4  v_color;
 
 
@@ -53,5 +55,6 @@ void main()
 
     gl_Position = P1_;
     v_texcoord = texcoord;
+    v_page = page;
     v_color = color;
 }
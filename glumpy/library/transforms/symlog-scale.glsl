@@ -20,16 +20,16 @@ vec4 forward(vec4 position)
         else if (x < -1.0)
             x = -1 - log(-x) / log(base.x);
 
-    if( (base.y > 1.0) && (y > 0.0) )
+    if (base.y > 1.0)
         if (y > +1.0)
             y = +1 + log(+y) / log(base.y);
         else if (y < -1.0)
             y = -1 - log(-y) / log(base.y);
 
-    if( (base.z > 1.0) && (z > 0.0) )
+    if (base.z > 1.0)
         if (z > +1.0)
             z = +1 + log(+z) / log(base.z);
-        else if (y < -1.0)
+        else if (z < -1.0)
             z = -1 - log(-z) / log(base.z);
 
     return vec4(x, y, z, 1.0);
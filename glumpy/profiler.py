@@ -0,0 +1,303 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright (c) 2014, Nicolas P. Rougier
+# Distributed under the (new) BSD License. See LICENSE.txt for more info.
+# -----------------------------------------------------------------------------
+"""
+Per-frame CPU/GPU profiler.
+
+When a profiler is active, the following phases are recorded for each frame
+(in seconds) into a rolling buffer:
+
+  frame          : total frame time (between two calls to frame())
+  events         : dispatch of events other than on_draw
+  draw:<handler> : each on_draw handler
+  upload         : buffer/texture uploads (GLObject._update)
+  swap           : buffer swap
+  gpu:<program>  : GPU time of Program.draw (GL_TIME_ELAPSED queries)
+  gpu            : total GPU time
+
+Note that phases may overlap (uploads generally happen during on_draw).
+
+Example usage:
+--------------
+
+  profiler = Profiler(size=600)
+  profiler.start()
+  profiler.overlay(window)
+  app.run()
+  print(profiler.stats())
+  profiler.save("profile.csv")
+"""
+import json
+import ctypes
+import timeit
+import numpy as np
+from glumpy import gl
+from OpenGL.raw.GL.VERSION.GL_3_3 import glGetQueryObjectui64v as _glGetQueryObjectui64v
+
+
+# Current active profiler
+__profiler__ = None
+
+# Wall clock
+clock = timeit.default_timer
+
+
+def active():
+    """ Get current active profiler (or None) """
+    return __profiler__
+
+
+def frame():
+    """ Mark a frame boundary on the active profiler (if any) """
+    if __profiler__ is not None:
+        __profiler__.frame()
+
+
+def timed(phase, function, *args):
+    """ Call function with args and record its duration in phase if profiling """
+    if __profiler__ is None:
+        return function(*args)
+    return __profiler__.call(phase, function, *args)
+
+
+
+class Profiler(object):
+    """ Frame profiler
+
+    Parameters
+    ----------
+
+    size : int
+        Number of frames kept in the rolling buffer
+
+    gpu : bool
+        Whether to use GL timer queries around Program.draw
+
+    jank : float
+        Frame time (in seconds) above which a frame is considered a jank.
+        Default is twice the median frame time.
+    """
+
+    def __init__(self, size=300, gpu=True, jank=None):
+        self._size = size
+        self._gpu = gpu
+        self._jank = jank
+        self._phases = {}
+        self._current = {}
+        self._count = 0
+        self._start = None
+        self._depth = {}
+        self._query = None
+        self._queries = []
+        self._pending = []
+        self._result = ctypes.c_uint64(0)
+        # Frame number of GPU values (late results of a same frame accumulate
+        # while results of a new frame reset the slot)
+        self._stamps = {}
+
+
+    @property
+    def size(self):
+        """ Number of frames kept in the rolling buffer """
+        return self._size
+
+
+    @property
+    def count(self):
+        """ Number of recorded frames """
+        return self._count
+
+
+    def start(self):
+        """ Make this profiler the active one """
+
+        global __profiler__
+        __profiler__ = self
+        self._start = None
+
+
+    def stop(self):
+        """ Stop profiling """
+
+        global __profiler__
+        if __profiler__ is self:
+            __profiler__ = None
+
+
+    def frame(self):
+        """ Mark a frame boundary """
+
+        now = clock()
+        if self._start is not None:
+            self._current["frame"] = now - self._start
+            index = self._count % self._size
+            for phase, value in self._current.items():
+                self._buffer(phase)[index] = value
+            for phase, buffer in self._phases.items():
+                if phase not in self._current and not phase.startswith("gpu"):
+                    buffer[index] = 0
+            self._count += 1
+        self._current = {}
+        self._start = now
+        if self._gpu:
+            self._collect()
+
+
+    def record(self, phase, duration):
+        """ Add duration to phase for current frame """
+
+        self._current[phase] = self._current.get(phase, 0.0) + duration
+
+
+    def call(self, phase, function, *args):
+        """ Call function with args and record its duration in phase
+
+        Only outermost calls of a given phase are recorded such that nested
+        dispatches are not counted twice.
+        """
+
+        depth = self._depth.get(phase, 0)
+        self._depth[phase] = depth + 1
+        start = clock()
+        try:
+            return function(*args)
+        finally:
+            self._depth[phase] = depth
+            if depth == 0:
+                self.record(phase, clock()-start)
+
+
+    def begin_query(self, name):
+        """ Start GPU timing of name (timer queries cannot be nested) """
+
+        if not self._gpu or self._query is not None:
+            return
+        if self._queries:
+            query = self._queries.pop()
+        else:
+            query = int(gl.glGenQueries(1))
+        gl.glBeginQuery(gl.GL_TIME_ELAPSED, query)
+        self._query = query, "gpu:%s" % name
+
+
+    def end_query(self):
+        """ Stop current GPU timing """
+
+        if self._query is None:
+            return
+        gl.glEndQuery(gl.GL_TIME_ELAPSED)
+        query, phase = self._query
+        self._pending.append((query, phase, self._count))
+        self._query = None
+
+
+    def _collect(self):
+        """ Collect available GPU query results (results are late) """
+
+        while self._pending:
+            query, phase, count = self._pending[0]
+            if not gl.glGetQueryObjectiv(query, gl.GL_QUERY_RESULT_AVAILABLE):
+                break
+            self._pending.pop(0)
+            self._queries.append(query)
+            if self._count - count > self._size or count >= self._count:
+                continue
+            _glGetQueryObjectui64v(query, gl.GL_QUERY_RESULT,
+                                   ctypes.byref(self._result))
+            elapsed = self._result.value*1e-9
+            index = count % self._size
+            for name in phase, "gpu":
+                buffer = self._buffer(name)
+                if self._stamps.get(name, {}).get(index) != count:
+                    buffer[index] = 0
+                    self._stamps.setdefault(name, {})[index] = count
+                buffer[index] += elapsed
+
+
+    def _buffer(self, phase):
+        if phase not in self._phases:
+            self._phases[phase] = np.zeros(self._size)
+        return self._phases[phase]
+
+
+    @property
+    def phases(self):
+        """ Names of recorded phases """
+        return sorted(self._phases.keys())
+
+
+    def data(self, phase="frame"):
+        """ Recorded values of phase (oldest first, in seconds) """
+
+        if phase not in self._phases:
+            return np.zeros(0)
+        n = min(self._count, self._size)
+        buffer = self._phases[phase]
+        if self._count <= self._size:
+            return buffer[:n].copy()
+        index = self._count % self._size
+        return np.concatenate([buffer[index:], buffer[:index]])
+
+
+    def stats(self, phase="frame"):
+        """ Mean, p50, p95, p99, max (in seconds) and jank count of phase """
+
+        values = self.data(phase)
+        if not len(values):
+            return { "count" : 0 }
+        p50, p95, p99 = np.percentile(values, [50, 95, 99])
+        frames = self.data("frame")
+        jank = self._jank or 2*np.median(frames)
+        return { "count" : len(values),
+                 "mean"  : float(values.mean()),
+                 "p50"   : float(p50),
+                 "p95"   : float(p95),
+                 "p99"   : float(p99),
+                 "max"   : float(values.max()),
+                 "jank"  : int((frames > jank).sum()) }
+
+
+    def save(self, filename):
+        """ Export recorded data as JSON or CSV (depending on extension) """
+
+        phases = self.phases
+        if filename.lower().endswith(".json"):
+            data = { "phases" : dict((phase, self.data(phase).tolist())
+                                      for phase in phases),
+                     "stats"  : dict((phase, self.stats(phase))
+                                      for phase in phases) }
+            with open(filename, "w") as file:
+                json.dump(data, file, indent=2)
+        else:
+            data = np.column_stack([self.data(phase) for phase in phases])
+            np.savetxt(filename, data, delimiter=",", fmt="%.9f",
+                       header=",".join(phases), comments="")
+
+
+    def overlay(self, window, rows=8, cols=48):
+        """ Display statistics on top of window content """
+
+        from glumpy.app.console import Console
+        console = Console(rows, cols, scale=1, color=(1,1,1,1))
+        console.on_resize(window.width, window.height)
+
+        def overlay(dt):
+            console.clear()
+            phases = ["frame"] + [p for p in self.phases if p != "frame"]
+            for phase in phases[:rows-1]:
+                stats = self.stats(phase)
+                if stats["count"]:
+                    console.write("%-20s %6.2f %6.2f %6.2f ms" % (
+                        phase[:20], 1000*stats["p50"], 1000*stats["p95"],
+                        1000*stats["p99"]))
+            console.write("%-20s %d" % ("jank", self.stats().get("jank", 0)))
+            console.draw()
+
+        def on_resize(width, height):
+            console.on_resize(width, height)
+
+        # Post handlers such that overlay is always drawn last
+        window.push_post_handlers(on_draw=overlay, on_resize=on_resize)
+        return console
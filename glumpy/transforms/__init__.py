@@ -10,6 +10,9 @@ from transform import Transform
 from position2d import Position2D
 from position3d import Position3D
 from linear_scale import LinearScale
+from log_scale import LogScale
+from symlog_scale import SymLogScale
+from polar import PolarTransform
 from pvm_projection import PVMProjection
 from orthographic_projection import OrthographicProjection
 
@@ -4,11 +4,48 @@
 # Copyright (c) 2014, Nicolas P. Rougier
 # Distributed under the (new) BSD License. See LICENSE.txt for more info.
 # -----------------------------------------------------------------------------
-from . import Transform
+import numpy as np
 from glumpy import library
+from . transform import Transform
 
 
 class LinearScale(Transform):
+    """ Linear scaling transform (along x, y and z) """
+
+    _separable = True
+
     def __init__(self, *args, **kwargs):
-        code = library.get("linear-scale-forward.glsl")
+        code = library.get("transforms/linear-scale.glsl")
+        self._scale = np.ones(3)
+        self._scale[...] = kwargs.pop("scale", (1,1,1))
         Transform.__init__(self, code, *args, **kwargs)
+
+    @property
+    def scale(self):
+        """ Scale along x, y and z """
+        return self._scale
+
+    @scale.setter
+    def scale(self, value):
+        self._scale[...] = value
+        if self._programs:
+            self["scale"] = self._scale
+
+    def on_attach(self, program):
+        """ A new program is attached """
+
+        self["scale"] = self._scale
+
+    def _forward(self, P):
+        """ CPU forward of this transform alone """
+
+        Q = np.ones((len(P),4))
+        Q[:,:3] = P[:,:3] * self._scale
+        return Q
+
+    def _inverse(self, P):
+        """ CPU inverse of this transform alone """
+
+        Q = np.ones((len(P),4))
+        Q[:,:3] = P[:,:3] / self._scale
+        return Q
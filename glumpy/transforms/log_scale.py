@@ -5,15 +5,56 @@
 # Distributed under the (new) BSD License. See LICENSE.txt for more info.
 # -----------------------------------------------------------------------------
 import numpy as np
-from glumpy.transforms.transform import Transform
+from glumpy import library
+from . transform import Transform
 
 
 class LogScale(Transform):
     """
-    Logarithmic scaling transform
+    Logarithmic scaling transform (along x, y and z). A base less or equal to
+    1 means no scaling along the corresponding axis and only strictly positive
+    values are scaled.
     """
 
-    def __init__(self, base = (0,0,0)):
-        Transform.__init__(self, "log_scale.glsl")
-        self["base"] = np.zeros(3, np.float32)
-        self["base"][...] = base
+    _separable = True
+
+    def __init__(self, *args, **kwargs):
+        code = library.get("transforms/log-scale.glsl")
+        self._base = np.zeros(3)
+        self._base[...] = kwargs.pop("base", (10,10,0))
+        Transform.__init__(self, code, *args, **kwargs)
+
+    @property
+    def base(self):
+        """ Logarithm base along x, y and z """
+        return self._base
+
+    @base.setter
+    def base(self, value):
+        self._base[...] = value
+        if self._programs:
+            self["base"] = self._base
+
+    def on_attach(self, program):
+        """ A new program is attached """
+
+        self["base"] = self._base
+
+    def _forward(self, P):
+        """ CPU forward of this transform alone """
+
+        Q = np.ones((len(P),4))
+        X, base = P[:,:3], self._base
+        scaled = (base > 1) & (X > 0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            Q[:,:3] = np.where(scaled, np.log(X) / np.log(base), X)
+        return Q
+
+    def _inverse(self, P):
+        """ CPU inverse of this transform alone """
+
+        Q = np.ones((len(P),4))
+        X, base = P[:,:3], self._base
+        with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+            Q[:,:3] = np.where(base > 1, np.power(base, X), X)
+        return Q
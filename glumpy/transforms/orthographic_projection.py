@@ -3,11 +3,14 @@
 # Copyright (c) 2014, Nicolas P. Rougier
 # Distributed under the (new) BSD License. See LICENSE.txt for more info.
 # -----------------------------------------------------------------------------
+import numpy as np
 from glumpy import glm, library
 from . transform import Transform
 
 class OrthographicProjection(Transform):
 
+    _separable = True
+
     def __init__(self, *args, **kwargs):
         code = library.get("transforms/projection.glsl")
 
@@ -28,6 +31,17 @@ class OrthographicProjection(Transform):
         del kwargs["zfar"]
 
         Transform.__init__(self, code, *args, **kwargs)
+        self._projection = np.eye(4)
+
+    def _forward(self, P):
+        """ CPU forward of this transform alone """
+
+        return np.dot(P, self._projection)
+
+    def _inverse(self, P):
+        """ CPU inverse of this transform alone """
+
+        return np.dot(P, np.linalg.inv(self._projection))
 
     def on_resize(self, width, height):
         if self.xinvert: xmin,xmax = width,0
@@ -35,5 +49,6 @@ class OrthographicProjection(Transform):
         if self.yinvert: ymin,ymax = height, 0
         else:            ymin,ymax = 0, height
         znear, zfar = self.znear, self.zfar
-        self["projection"] = glm.ortho(xmin, xmax, ymin, ymax, znear, zfar)
+        self._projection = glm.ortho(xmin, xmax, ymin, ymax, znear, zfar)
+        self["projection"] = self._projection
         Transform.on_resize(self, width, height)
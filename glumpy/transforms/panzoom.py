@@ -11,6 +11,8 @@ from . transform import Transform
 
 class PanZoom(Transform):
 
+    _separable = True
+
     def __init__(self, *args, **kwargs):
         code = library.get("transforms/panzoom.glsl")
         Transform.__init__(self, code, *args, **kwargs)
@@ -26,6 +28,28 @@ class PanZoom(Transform):
         if aspect is not None:
             self.aspect = aspect*np.ones(2)
 
+    def _scale(self):
+        """ Scale as given to the shader """
+
+        if self.aspect is not None:
+            return self.scale * self.aspect
+        return self.scale
+
+    def _forward(self, P):
+        """ CPU forward of this transform alone """
+
+        Q = np.ones((len(P),4))
+        Q[:,:2] = self._scale()*P[:,:2] + self.translate
+        Q[:,2] = P[:,2]
+        return Q
+
+    def _inverse(self, P):
+        """ CPU inverse of this transform alone """
+
+        P = P.copy()
+        P[:,:2] = (P[:,:2] - self.translate) / self._scale()
+        return P
+
     def on_attach(self, program):
         """ A new program is attached """
 
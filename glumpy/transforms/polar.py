@@ -4,13 +4,32 @@
 # Copyright (c) 2014, Nicolas P. Rougier
 # Distributed under the (new) BSD License. See LICENSE.txt for more info.
 # -----------------------------------------------------------------------------
-from glumpy.transforms.transform import Transform
+import numpy as np
+from glumpy import library
+from . transform import Transform
 
 
 class PolarTransform(Transform):
-    """
-    Polar transform
-    """
+    """ Polar transform (x is the radius and y the angle in radians) """
 
-    def __init__(self):
-        Transform.__init__(self, "polar.glsl")
+    def __init__(self, *args, **kwargs):
+        code = library.get("transforms/polar.glsl")
+        Transform.__init__(self, code, *args, **kwargs)
+
+    def _forward(self, P):
+        """ CPU forward of this transform alone """
+
+        Q = np.ones((len(P),4))
+        Q[:,0] = P[:,0] * np.cos(P[:,1])
+        Q[:,1] = P[:,0] * np.sin(P[:,1])
+        Q[:,2] = P[:,2]
+        return Q
+
+    def _inverse(self, P):
+        """ CPU inverse of this transform alone """
+
+        Q = np.ones((len(P),4))
+        Q[:,0] = np.sqrt(P[:,0]**2 + P[:,1]**2)
+        Q[:,1] = np.arctan2(P[:,1], P[:,0])
+        Q[:,2] = P[:,2]
+        return Q
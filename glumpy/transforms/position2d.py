@@ -3,11 +3,27 @@
 # Copyright (c) 2014, Nicolas P. Rougier
 # Distributed under the (new) BSD License. See LICENSE.txt for more info.
 # -----------------------------------------------------------------------------
+import numpy as np
 from glumpy import library
 from . transform import Transform
 
 class Position2D(Transform):
 
+    _separable = True
+
     def __init__(self, *args, **kwargs):
         code = library.get("transforms/position-2d.glsl")
         Transform.__init__(self, code, *args, **kwargs)
+
+    def _forward(self, P):
+        """ CPU forward of this transform alone """
+
+        Q = np.zeros((len(P),4))
+        Q[:,:2] = P[:,:2]
+        Q[:,3] = 1
+        return Q
+
+    def _inverse(self, P):
+        """ CPU inverse of this transform alone """
+
+        return P[:,:2]
@@ -22,6 +22,18 @@ class PVMProjection(Transform):
         self._projection = np.eye(4, dtype=np.float32)
         glm.translate(self._view, 0, 0, -5)
 
+    def _forward(self, P):
+        """ CPU forward of this transform alone (clip coordinates) """
+
+        return np.dot(P, np.dot(np.dot(self._model, self._view), self._projection))
+
+    def _inverse(self, P):
+        """ CPU inverse of this transform alone (from clip coordinates) """
+
+        M = np.dot(np.dot(self._model, self._view), self._projection)
+        P = np.dot(P, np.linalg.inv(M))
+        return P / P[:,3:]
+
     def on_attach(self, program):
         program["view"] = self._view
         program["model"] = self._model
@@ -31,4 +43,5 @@ class PVMProjection(Transform):
         fovy = self._fovy
         aspect = width / float(height)
         znear, zfar = self._znear, self._zfar
-        self['projection'] = glm.perspective(fovy, aspect, znear, zfar)
+        self._projection = glm.perspective(fovy, aspect, znear, zfar)
+        self['projection'] = self._projection
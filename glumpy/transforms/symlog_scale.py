@@ -5,15 +5,57 @@
 # Distributed under the (new) BSD License. See LICENSE.txt for more info.
 # -----------------------------------------------------------------------------
 import numpy as np
-from glumpy.transforms.transform import Transform
+from glumpy import library
+from . transform import Transform
 
 
 class SymLogScale(Transform):
     """
-    Symetric logarithmic scaling transform
+    Symmetric logarithmic scaling transform (along x, y and z). Values in
+    [-1,+1] are not scaled and a base less or equal to 1 means no scaling
+    along the corresponding axis.
     """
 
-    def __init__(self, base = (0,0,0)):
-        Transform.__init__(self, "symlog_scale.glsl")
-        self["base"] = np.zeros(3, np.float32)
-        self["base"][...] = base
+    _separable = True
+
+    def __init__(self, *args, **kwargs):
+        code = library.get("transforms/symlog-scale.glsl")
+        self._base = np.zeros(3)
+        self._base[...] = kwargs.pop("base", (10,10,0))
+        Transform.__init__(self, code, *args, **kwargs)
+
+    @property
+    def base(self):
+        """ Logarithm base along x, y and z """
+        return self._base
+
+    @base.setter
+    def base(self, value):
+        self._base[...] = value
+        if self._programs:
+            self["base"] = self._base
+
+    def on_attach(self, program):
+        """ A new program is attached """
+
+        self["base"] = self._base
+
+    def _forward(self, P):
+        """ CPU forward of this transform alone """
+
+        Q = np.ones((len(P),4))
+        X, base = P[:,:3], self._base
+        with np.errstate(divide="ignore", invalid="ignore"):
+            L = np.log(np.abs(X)) / np.log(base)
+        Q[:,:3] = np.where((base > 1) & (abs(X) > 1), np.sign(X)*(1 + L), X)
+        return Q
+
+    def _inverse(self, P):
+        """ CPU inverse of this transform alone """
+
+        Q = np.ones((len(P),4))
+        X, base = P[:,:3], self._base
+        with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+            E = np.sign(X) * np.power(base, np.abs(X) - 1)
+        Q[:,:3] = np.where((base > 1) & (abs(X) > 1), E, X)
+        return Q
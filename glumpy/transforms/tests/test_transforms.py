@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright (c) 2014, Nicolas P. Rougier. All rights reserved.
+# Distributed under the terms of the new BSD License.
+# -----------------------------------------------------------------------------
+import unittest
+import numpy as np
+from glumpy import glm
+from glumpy.transforms import PanZoom, Viewport, Trackball, Position2D, \
+     Position3D, LinearScale, LogScale, SymLogScale, PolarTransform, \
+     PVMProjection, OrthographicProjection
+
+
+# -----------------------------------------------------------------------------
+class TransformTest(unittest.TestCase):
+
+    def setUp(self):
+        np.random.seed(1)
+        self.P = np.random.uniform(-5, +5, (100,3))
+
+    def check_inverse(self, transform, P):
+        Q = transform.inverse(transform.forward(P))
+        assert np.allclose(Q[:,:P.shape[1]], P)
+
+    def test_position(self):
+        P = self.P
+        Q = Position2D("position").forward(P[:,:2])
+        assert np.allclose(Q, np.c_[P[:,:2], np.zeros(100), np.ones(100)])
+        Q = Position3D("position").forward(P)
+        assert np.allclose(Q, np.c_[P, np.ones(100)])
+        self.check_inverse(Position3D("position"), P)
+
+    def test_panzoom(self):
+        P = self.P
+        transform = PanZoom(Position3D("position"), aspect=None)
+        transform.scale = np.array([2.0, 0.5])
+        transform.translate = np.array([0.1, -0.3])
+        Q = transform.forward(P)
+        # vec4(scale*position.xy + translate, position.z, 1.0)
+        assert np.allclose(Q[:,:2], (2.0,0.5)*P[:,:2] + (0.1,-0.3))
+        assert np.allclose(Q[:,2:], np.c_[P[:,2], np.ones(100)])
+        self.check_inverse(transform, P)
+
+    def test_linear_scale(self):
+        P = self.P
+        transform = LinearScale(Position3D("position"), scale=(2,3,4))
+        Q = transform.forward(P)
+        assert np.allclose(Q, np.c_[P*(2,3,4), np.ones(100)])
+        self.check_inverse(transform, P)
+
+    def test_log_scale(self):
+        P = abs(self.P) + 0.1
+        transform = LogScale(Position3D("position"), base=(10,2,0))
+        Q = transform.forward(P)
+        assert np.allclose(Q[:,0], np.log10(P[:,0]))
+        assert np.allclose(Q[:,1], np.log2(P[:,1]))
+        assert np.allclose(Q[:,2], P[:,2])
+        self.check_inverse(transform, P)
+
+    def test_symlog_scale(self):
+        P = self.P
+        transform = SymLogScale(Position3D("position"), base=(10,10,10))
+        Q = transform.forward(P)
+        inside = abs(P) <= 1
+        assert np.allclose(Q[:,:3][inside], P[inside])
+        expected = np.sign(P)*(1 + np.log10(abs(P)))
+        assert np.allclose(Q[:,:3][~inside], expected[~inside])
+        self.check_inverse(transform, P)
+
+    def test_polar(self):
+        P = self.P
+        P[:,0] = abs(P[:,0])
+        P[:,1] = np.random.uniform(-3, 3, 100)
+        transform = PolarTransform(Position3D("position"))
+        Q = transform.forward(P)
+        assert np.allclose(Q[:,0], P[:,0]*np.cos(P[:,1]))
+        assert np.allclose(Q[:,1], P[:,0]*np.sin(P[:,1]))
+        self.check_inverse(transform, P)
+
+    def test_projection(self):
+        P = self.P
+        transform = OrthographicProjection(Position3D("position"))
+        transform._projection = glm.ortho(0, 800, 0, 600, -1000, 1000)
+        # projection*position (matrices are uploaded as row major)
+        M = transform._projection.T
+        Q = transform.forward(P)
+        assert np.allclose(Q, np.dot(M, np.c_[P, np.ones(100)].T).T)
+        self.check_inverse(transform, P)
+
+    def test_pvm(self):
+        P = self.P
+        for transform in (PVMProjection(Position3D("position")),
+                          Trackball(Position3D("position"))):
+            transform._projection = glm.perspective(40, 1.5, 2.0, 100.0)
+            # projection*view*model*position
+            M = np.dot(np.dot(transform._projection.T, transform._view.T),
+                       transform._model.T)
+            Q = transform.forward(P)
+            assert np.allclose(Q, np.dot(M, np.c_[P, np.ones(100)].T).T)
+            # Inverse from normalized device coordinates
+            R = transform.inverse(Q / Q[:,3:])
+            assert np.allclose(R[:,:3], P)
+
+    def test_viewport(self):
+        viewport = Viewport()
+        viewport._viewport = 0, 0, 800, 600
+        Q = viewport.forward([(-1,-1,0,1), (1,1,0,1), (0,0,0,1)])
+        assert np.allclose(Q[:,:2], [(0,0), (800,600), (400,300)])
+        assert np.allclose(viewport.inverse(Q)[:,:2], [(-1,-1), (1,1), (0,0)])
+
+    def test_chain(self):
+        P = self.P
+        transform = PanZoom(LinearScale(Position3D("position"), scale=(2,2,2)))
+        transform.scale = np.array([3.0, 3.0])
+        Q = transform.forward(P)
+        assert np.allclose(Q[:,:2], 6*P[:,:2])
+        self.check_inverse(transform, P)
+
+        # Viewport has no function and does not change positions
+        chain = transform + Viewport()
+        assert np.allclose(chain.forward(P), Q)
+        self.check_inverse(chain, P)
+
+        # Sum of transforms
+        chain = Position3D("position") + LinearScale(Position3D("position"))
+        assert np.allclose(chain.forward(P), 2*np.c_[P, np.ones(100)])
+        self.assertRaises(NotImplementedError, chain.inverse, P)
+
+    def test_separable(self):
+        assert PanZoom(OrthographicProjection(Position3D())).separable
+        assert LogScale(LinearScale(Position3D())).separable
+        assert not Position3D(PolarTransform()).separable
+        assert not PVMProjection(Position3D()).separable
+
+
+# -----------------------------------------------------------------------------
+if __name__ == "__main__":
+    unittest.main()
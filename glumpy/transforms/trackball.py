@@ -57,10 +57,23 @@ class Trackball(Transform):
     @phi.setter
     def zoom(self, value):
         self._fovy = np.minimum(np.maximum(value, 1.0), 179.0)
-        self['projection'] = glm.perspective(self._fovy, self._aspect,
-                                             self._znear, self._zfar)
+        self._projection = glm.perspective(self._fovy, self._aspect,
+                                           self._znear, self._zfar)
+        self['projection'] = self._projection
 
 
+    def _forward(self, P):
+        """ CPU forward of this transform alone (clip coordinates) """
+
+        return np.dot(P, np.dot(np.dot(self._model, self._view), self._projection))
+
+    def _inverse(self, P):
+        """ CPU inverse of this transform alone (from clip coordinates) """
+
+        M = np.dot(np.dot(self._model, self._view), self._projection)
+        P = np.dot(P, np.linalg.inv(M))
+        return P / P[:,3:]
+
     def on_attach(self, program):
         program["view"] = self._view
         program["model"] = self._model
@@ -70,8 +83,9 @@ class Trackball(Transform):
     def on_resize(self, width, height):
         self._viewport = width, height
         self._aspect = width / float(height)
-        self['projection'] = glm.perspective(self._fovy, self._aspect,
-                                             self._znear, self._zfar)
+        self._projection = glm.perspective(self._fovy, self._aspect,
+                                           self._znear, self._zfar)
+        self['projection'] = self._projection
         Transform.on_resize(self, width, height)
 
 
@@ -91,6 +105,7 @@ class Trackball(Transform):
     def on_mouse_scroll(self, x, y, dx, dy):
 
         self._fovy = np.minimum(np.maximum(self._fovy*(1-dy/100), 1.0), 179.0)
-        self['projection'] = glm.perspective(self._fovy, self._aspect,
-                                             self._znear, self._zfar)
+        self._projection = glm.perspective(self._fovy, self._aspect,
+                                           self._znear, self._zfar)
+        self['projection'] = self._projection
         # Transform.on_mouse_scroll(self, x, y, dx, dy)
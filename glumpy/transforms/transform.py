@@ -10,61 +10,153 @@ from glumpy.gloo import Snippet
 from glumpy.app.window.event import EventDispatcher
 
 
+# Operators used to combine chained transforms on CPU
+_operators = { "+" : np.add,
+               "-" : np.subtract,
+               "*" : np.multiply,
+               "/" : np.divide }
+
+
 class Transform(Snippet,EventDispatcher):
 
+    # Whether this transform alone scales (monotonically) each axis
+    # independently of the others
+    _separable = False
+
     def __init__(self, code, *args, **kwargs):
         Snippet.__init__(self, code, None, *args, **kwargs)
         EventDispatcher.__init__(self)
 
+        # Transforms events are propagated to (see _get_children)
+        self._children = ()
+        self._children_key = None
+
+
+    def _get_children(self):
+        """ Get argument and chained transforms, events are propagated to.
+
+        The list is computed on attach and recomputed only if arguments or
+        chained snippet have changed since then. It is not flattened over
+        the whole transform tree because each transform handler decides
+        whether and when its children get an event (e.g. Trackball does not
+        propagate mouse events).
+        """
+
+        key = self._children_key
+        if key is None or key[0] is not self._args or key[1] is not self._next:
+            children = [snippet for snippet in self._args
+                        if isinstance(snippet, EventDispatcher)]
+            if self._next:
+                operator, snippet = self._next
+                if isinstance(snippet, EventDispatcher):
+                    children.append(snippet)
+            self._children = tuple(children)
+            self._children_key = self._args, self._next
+        return self._children
+
 
     def attach(self, program):
         """ A new program is attached """
 
         Snippet.attach(self,program)
+        self._children_key = None
         self.dispatch_event("on_attach", program)
 
 
-    def on_attach(self, program):
-        for snippet in list(self._args):
-            if isinstance(snippet, Snippet):
-                snippet.dispatch_event("on_attach", program)
+    @property
+    def separable(self):
+        """
+        Whether this transform and its transform arguments scale each axis
+        independently and monotonically, i.e. map axis-aligned boxes to
+        axis-aligned boxes (which is not the case for polar or perspective
+        transforms).
+        """
+
+        if not self._separable:
+            return False
+        for snippet in self._args:
+            if isinstance(snippet, Transform):
+                if not snippet.separable:
+                    return False
+            elif isinstance(snippet, Snippet):
+                return False
+        return True
+
+
+    def forward(self, P):
+        """
+        Map points P (n,k) from the input space of this transform (i.e. the
+        input space of its transform argument if any) to its output space,
+        mirroring what the shader computes. Chained transforms (+, -, *, /)
+        are evaluated on the same input and combined.
+        """
+
+        P = np.array(P, dtype=np.float64, ndmin=2)
+        Q = P
+        for snippet in self._args:
+            if isinstance(snippet, Transform):
+                Q = snippet.forward(P)
+                break
+        Q = self._forward(Q)
         if self._next:
-            operator, snippet = self._next
+            operand, snippet = self._next
+            if isinstance(snippet, Transform) and snippet._objects["functions"]:
+                Q = _operators[operand](Q, snippet.forward(P))
+        return Q
+
+
+    def inverse(self, P):
+        """
+        Map points P (n,4) from the output space of this transform back to
+        the input space of its transform argument (if any).
+        """
+
+        snippet = self
+        while snippet._next:
+            operand, snippet = snippet._next
+            if isinstance(snippet, Transform) and snippet._objects["functions"]:
+                raise NotImplementedError("Chained transforms cannot be inverted")
+        P = self._inverse(np.array(P, dtype=np.float64, ndmin=2))
+        for snippet in self._args:
+            if isinstance(snippet, Transform):
+                return snippet.inverse(P)
+        return P
+
+
+    def _forward(self, P):
+        """ CPU forward of this transform alone """
+
+        raise NotImplementedError("%s has no CPU forward" % self.__class__.__name__)
+
+
+    def _inverse(self, P):
+        """ CPU inverse of this transform alone """
+
+        raise NotImplementedError("%s has no CPU inverse" % self.__class__.__name__)
+
+
+    def on_attach(self, program):
+        for snippet in self._get_children():
             snippet.dispatch_event("on_attach", program)
 
+
     def on_resize(self, width, height):
-        for snippet in list(self._args):
-            if isinstance(snippet, Snippet):
-                snippet.dispatch_event("on_resize", width, height)
-        if self._next:
-            operator, snippet = self._next
+        for snippet in self._get_children():
             snippet.dispatch_event("on_resize", width, height)
 
 
     def on_mouse_drag(self, x, y, dx, dy, button):
-        for snippet in list(self._args):
-            if isinstance(snippet, Snippet):
-                snippet.dispatch_event("on_mouse_drag", x, y, dx, dy, button)
-        if self._next:
-            operator, snippet = self._next
+        for snippet in self._get_children():
             snippet.dispatch_event("on_mouse_drag", x, y, dx, dy, button)
 
 
     def on_mouse_scroll(self, x, y, dx, dy):
-        for snippet in list(self._args):
-            if isinstance(snippet, Snippet):
-                snippet.dispatch_event("on_mouse_scroll", x, y, dx, dy)
-        if self._next:
-            operator, snippet = self._next
+        for snippet in self._get_children():
             snippet.dispatch_event("on_mouse_scroll", x, y, dx, dy)
 
 
     def on_data(self):
-        for snippet in self._args:
-            if isinstance(snippet, Snippet):
-                snippet.dispatch_event("on_data")
-        if self._next:
-            operator, snippet = self._next
+        for snippet in self._get_children():
             snippet.dispatch_event("on_data")
 
 
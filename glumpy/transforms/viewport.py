@@ -3,14 +3,43 @@
 # Copyright (c) 2014, Nicolas P. Rougier
 # Distributed under the (new) BSD License. See LICENSE.txt for more info.
 # -----------------------------------------------------------------------------
+import numpy as np
 from glumpy import library
 from . transform import Transform
 
 class Viewport(Transform):
 
+    _separable = True
+
     def __init__(self, *args, **kwargs):
         code = library.get("transforms/viewport.glsl")
         Transform.__init__(self, code, *args, **kwargs)
+        self._viewport = 0, 0, 1, 1
+
+    def _forward(self, P):
+        """
+        CPU forward (from normalized device coordinates to window coordinates
+        with origin at bottom left). Note that the viewport snippet has no
+        function such that it does not change positions when chained.
+        """
+
+        x, y, width, height = self._viewport
+        Q = np.array(P, dtype=np.float64)
+        Q[:,:2] /= Q[:,3:]
+        Q[:,0] = x + (Q[:,0] + 1)*width/2.0
+        Q[:,1] = y + (Q[:,1] + 1)*height/2.0
+        return Q
+
+    def _inverse(self, P):
+        """ CPU inverse (from window to normalized device coordinates) """
+
+        x, y, width, height = self._viewport
+        Q = np.array(P, dtype=np.float64)
+        Q[:,0] = 2.0*(Q[:,0] - x)/width - 1
+        Q[:,1] = 2.0*(Q[:,1] - y)/height - 1
+        Q[:,3] = 1
+        return Q
 
     def on_resize(self, width, height):
-        self["viewport"] = 0, 0, width, height
+        self._viewport = 0, 0, width, height
+        self["viewport"] = self._viewport